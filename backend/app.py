@@ -1,146 +1,311 @@
-from flask import Flask, jsonify
+import click
+from flask import Flask, Response, current_app, jsonify, g
+from flask.cli import with_appcontext
 from flask_cors import CORS
 from flask_login import LoginManager
 from flask_sqlalchemy import SQLAlchemy
-from flask_session import Session
+from sqlalchemy import text
 from config import Config
+from extensions import cache
+from metrics import init_metrics
 from models.user_model import db, User
 from models.calendar_connection_model import CalendarConnection
-from controllers.auth_controller import auth_bp
-from controllers.calendar_controller import calendar_bp
-from controllers.availability_controller import availability_bp
-from controllers.public_booking_controller import public_bp
-from datetime import datetime
-from db_migrations import apply_migrations
+from functools import lru_cache
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import time
+from db_migrations import apply_migrations, ensure_event_stats
+from utils.fast_json import init_json_provider
+
+OAUTH_STATUS_TTL_SECONDS = 60
+READINESS_CACHE_KEY = 'health:ready'
+READINESS_CACHE_SECONDS = 5
+
+# Error bodies are constant; a fresh Response is still built per request because
+# after_request hooks (CORS, session cookie) mutate response headers.
+NOT_FOUND_BODY = b'{"error":"Not found"}'
+INTERNAL_ERROR_BODY = b'{"error":"Internal server error"}'
+
+login_manager = LoginManager()
+_log_handler = None  # root QueueHandler installed by _configure_logging
+_log_listener = None
+
+
+@lru_cache(maxsize=4)
+def _probe_oauth_status(app, time_bucket):
+    """Construct the OAuth services once per time bucket to report configuration status"""
+    from services.google_service import GoogleCalendarService
+    from services.microsoft_service import MicrosoftCalendarService
+    
+    oauth_status = {}
+    with app.app_context():
+        try:
+            GoogleCalendarService()
+            oauth_status['google'] = 'configured'
+        except Exception as e:
+            oauth_status['google'] = f'not configured: {str(e)}'
+
+        if app.config.get('MICROSOFT_ENABLED', False):
+            try:
+                MicrosoftCalendarService()
+                oauth_status['microsoft'] = 'configured'
+            except Exception as e:
+                oauth_status['microsoft'] = f'not configured: {str(e)}'
+        else:
+            oauth_status['microsoft'] = 'disabled (temporarily)'
+    return oauth_status
+
+
+def init_schema():
+    """Create missing tables and apply additive schema updates (requires app context)"""
+    # Missing tables first: the migrations ALTER existing tables and would fail on a fresh database
+    db.create_all()
+    # Apply additive schema updates (no Alembic in this project)
+    try:
+        apply_migrations(db)
+    except Exception as e:
+        print(f"Warning: DB migrations failed (continuing): {e}")
+    # Trigger-maintained event counts (needs the event_stats table from create_all)
+    try:
+        ensure_event_stats(db)
+    except Exception as e:
+        db.session.rollback()
+        print(f"Warning: event_stats triggers not installed (continuing): {e}")
+
+
+def get_oauth_status(app):
+    """Cached OAuth configuration status, revalidated every OAUTH_STATUS_TTL_SECONDS"""
+    return _probe_oauth_status(app, int(time.time() // OAUTH_STATUS_TTL_SECONDS))
+
+
+def load_user(user_id):
+    """Flask-Login user loader, memoized per request"""
+    # Flask-Login may resolve the user several times per request
+    uid = int(user_id)
+    cached = getattr(g, '_login_user', None)
+    if cached is not None and cached.id == uid:
+        return cached
+    user = db.session.get(User, uid)
+    g._login_user = user
+    return user
+
+
+@click.command('init-db')
+@with_appcontext
+def init_db_command():
+    """Create tables and apply additive schema updates"""
+    init_schema()
+    print("Database schema is up to date")
+
+
+def health_check():
+    """Liveness probe: constant response, no DB or service work"""
+    return Response(current_app.extensions['health_liveness'], mimetype='application/json')
+
+
+def health_ready():
+    """Readiness probe: database round trip plus cached OAuth configuration"""
+    # A healthy result is shared across workers for a few seconds
+    payload = cache.get(READINESS_CACHE_KEY)
+    if payload is not None:
+        return jsonify(payload)
+    
+    try:
+        # Test database connection on a pooled (pre-pinged) connection
+        with db.engine.connect() as conn:
+            conn.execute(text('SELECT 1'))
+        db_status = 'healthy'
+    except Exception as e:
+        db_status = f'unhealthy: {str(e)}'
+    
+    # OAuth configuration (cached, no per-request service construction)
+    oauth_status = get_oauth_status(current_app._get_current_object())
+    microsoft_enabled = current_app.config.get('MICROSOFT_ENABLED', False)
+    ready = db_status == 'healthy'
+    
+    payload = {
+        'status': 'ready' if ready else 'unavailable',
+        'database': db_status,
+        'oauth_configuration': oauth_status,
+        'microsoft_enabled': microsoft_enabled,
+        'timestamp': int(time.time())
+    }
+    if not ready:
+        # Never cache a failure; the next probe re-checks immediately
+        return jsonify(payload), 503
+    cache.set(READINESS_CACHE_KEY, payload, timeout=READINESS_CACHE_SECONDS)
+    return jsonify(payload)
+
+
+def db_pool_status():
+    """Connection pool metrics (no query issued)"""
+    pool = db.engine.pool
+    stats = {'status': pool.status()}
+    for metric in ('size', 'checkedin', 'checkedout', 'overflow'):
+        if hasattr(pool, metric):
+            stats[metric] = getattr(pool, metric)()
+    return jsonify(stats)
+
+
+def root():
+    """API index (static payload serialized once)"""
+    return Response(current_app.extensions['root_body'], mimetype='application/json')
+
+
+def not_found(error):
+    return Response(NOT_FOUND_BODY, status=404, mimetype='application/json')
+
+
+def internal_error(error):
+    db.session.rollback()
+    return Response(INTERNAL_ERROR_BODY, status=500, mimetype='application/json')
+
+
+def _configure_logging(level):
+    """
+    Root logging through a QueueHandler: request and sync threads only enqueue records,
+    a QueueListener thread formats them and writes to stderr.
+    Like logging.basicConfig, leaves an already-configured root logger (e.g. gunicorn's) alone.
+    """
+    global _log_handler
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    root.setLevel(level)
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+    _log_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    root.addHandler(_log_handler)
+    _start_log_listener(stream_handler)
+    atexit.register(_stop_log_listener)
+    # The listener thread doesn't survive fork (gunicorn's preloaded workers, RQ work-horses)
+    os.register_at_fork(after_in_child=_restart_log_listener_after_fork)
+
+
+def _start_log_listener(*handlers):
+    global _log_listener
+    _log_listener = logging.handlers.QueueListener(_log_handler.queue, *handlers)
+    _log_listener.start()
+
+
+def _stop_log_listener():
+    """Stop the listener once it has written out everything already queued"""
+    if _log_listener is not None and _log_listener._thread is not None:
+        _log_listener.stop()
+
+
+def _restart_log_listener_after_fork():
+    # Records the parent queued before the fork are the parent's to write
+    _log_handler.queue = queue.SimpleQueue()
+    _start_log_listener(*_log_listener.handlers)
+
+
+def flush_logging():
+    """
+    Write out queued log records now. For processes that leave through os._exit
+    (RQ work-horses), where the atexit stop never runs.
+    """
+    if _log_listener is not None and _log_listener._thread is not None:
+        _log_listener.stop()
+        _start_log_listener(*_log_listener.handlers)
+
 
 def create_app(config_class=Config):
     """Application factory pattern"""
     app = Flask(__name__)
     app.config.from_object(config_class)
     
+    # Level-gated logging: debug lines cost only a level check unless LOG_LEVEL=DEBUG
+    _configure_logging(app.config.get('LOG_LEVEL', 'INFO'))
+    
+    # orjson-backed jsonify (stdlib provider if orjson isn't installed)
+    init_json_provider(app)
+    
     # Initialize extensions
     db.init_app(app)
     
-    # Initialize Flask-Session
-    Session(app)
+    cache.init_app(app)
     
     # Initialize Flask-Login
-    login_manager = LoginManager()
-    login_manager.init_app(app)
     # Remove the login_view since we're handling login via API endpoints
+    login_manager.init_app(app)
+    login_manager.user_loader(load_user)
     
-    @login_manager.user_loader
-    def load_user(user_id):
-        return User.query.get(int(user_id))
-    
-    # Initialize CORS
-    CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True)
+    # Initialize CORS (skipped when the reverse proxy handles it)
+    if not app.config.get('CORS_HANDLED_BY_PROXY'):
+        CORS(app, origins=app.config['CORS_ORIGINS'], supports_credentials=True)
     
-    # Register blueprints
+    # Register blueprints (imported lazily: the controllers pull in the provider SDKs)
+    from controllers.auth_controller import auth_bp, google_callback, microsoft_callback
+    from controllers.calendar_controller import calendar_bp
+    from controllers.availability_controller import availability_bp
+    from controllers.public_booking_controller import public_bp
     app.register_blueprint(auth_bp, url_prefix='/api/auth')
     app.register_blueprint(calendar_bp, url_prefix='/api/calendar')
     app.register_blueprint(availability_bp, url_prefix='/api/availability')
     app.register_blueprint(public_bp, url_prefix='/api/public')
     
-    # Google OAuth callback redirect (Google calls /oauth2callback by default)
-    @app.route('/oauth2callback')
-    def google_oauth_callback():
-        """Redirect Google OAuth callback to our actual handler"""
-        from flask import request, redirect
-        return redirect(f'/api/auth/google/callback?{request.query_string.decode()}')
-    
-    # Google OAuth callback redirect (Google calls /auth/google/callback by default)
-    @app.route('/auth/google/callback')
-    def google_oauth_callback_alt():
-        """Redirect Google OAuth callback to our actual handler"""
-        from flask import request, redirect
-        return redirect(f'/api/auth/google/callback?{request.query_string.decode()}')
-    
-    # Microsoft OAuth callback redirect (Microsoft calls /outlook_callback by default)
-    @app.route('/outlook_callback')
-    def microsoft_oauth_callback():
-        """Redirect Microsoft OAuth callback to our actual handler"""
-        from flask import request, redirect
-        return redirect(f'/api/auth/microsoft/callback?{request.query_string.decode()}')
-    
-    # Create database tables
-    with app.app_context():
-        # Apply additive schema updates (no Alembic in this project)
-        try:
-            apply_migrations(db)
-        except Exception as e:
-            print(f"Warning: DB migrations failed (continuing): {e}")
-        db.create_all()
+    # Probe OAuth configuration once at startup; /health/ready reuses the cached result
+    app.config['_OAUTH_STATUS'] = get_oauth_status(app)
     
-    # Health check endpoint
-    @app.route('/health')
-    def health_check():
-        try:
-            # Test database connection
-            from sqlalchemy import text
-            db.session.execute(text('SELECT 1'))
-            db_status = 'healthy'
-        except Exception as e:
-            db_status = f'unhealthy: {str(e)}'
-        
-        # Check OAuth configuration
-        oauth_status = {}
-        microsoft_enabled = app.config.get('MICROSOFT_ENABLED', False)
-        
-        try:
-            from services.google_service import GoogleCalendarService
-            GoogleCalendarService()
-            oauth_status['google'] = 'configured'
-        except Exception as e:
-            oauth_status['google'] = f'not configured: {str(e)}'
-        
-        if microsoft_enabled:
-            try:
-                from services.microsoft_service import MicrosoftCalendarService
-                MicrosoftCalendarService()
-                oauth_status['microsoft'] = 'configured'
-            except Exception as e:
-                oauth_status['microsoft'] = f'not configured: {str(e)}'
-        else:
-            oauth_status['microsoft'] = 'disabled (temporarily)'
-        
-        return jsonify({
-            'status': 'healthy',
-            'message': 'Unified Smart Calendar System API is running',
-            'database': db_status,
-            'oauth_configuration': oauth_status,
-            'microsoft_enabled': microsoft_enabled,
-            'timestamp': datetime.utcnow().isoformat()
-        })
-    
-    # Root endpoint
-    @app.route('/')
-    def root():
-        return jsonify({
-            'message': 'Unified Smart Calendar System API',
-            'version': '1.0.0',
-            'endpoints': {
-                'health': '/health',
-                'auth': '/api/auth',
-                'calendar': '/api/calendar'
-            }
-        })
+    # Provider-default OAuth callback paths dispatch straight to the real handlers
+    # (no browser redirect hop); the query string is preserved on the request.
+    app.add_url_rule('/oauth2callback', 'google_oauth_callback', google_callback)
+    app.add_url_rule('/auth/google/callback', 'google_oauth_callback_alt', google_callback)
+    app.add_url_rule('/outlook_callback', 'microsoft_oauth_callback', microsoft_callback)
     
-    # Error handlers
-    @app.errorhandler(404)
-    def not_found(error):
-        return jsonify({'error': 'Not found'}), 404
+    # Schema is managed out of band (`flask init-db` / init_db.py), never on worker boot
+    app.cli.add_command(init_db_command)
     
-    @app.errorhandler(500)
-    def internal_error(error):
-        db.session.rollback()
-        return jsonify({'error': 'Internal server error'}), 500
+    # Static payloads are serialized once per app
+    app.extensions['health_liveness'] = app.json.dumps({
+        'status': 'ok',
+        'message': 'Unified Smart Calendar System API is running'
+    }).encode()
+    app.extensions['root_body'] = app.json.dumps({
+        'message': 'Unified Smart Calendar System API',
+        'version': '1.0.0',
+        'endpoints': {
+            'health': '/health',
+            'readiness': '/health/ready',
+            'auth': '/api/auth',
+            'calendar': '/api/calendar'
+        }
+    }).encode()
+    
+    app.add_url_rule('/health', 'health_check', health_check)
+    app.add_url_rule('/health/ready', 'health_ready', health_ready)
+    app.add_url_rule('/health/db-pool', 'db_pool_status', db_pool_status)
+    app.add_url_rule('/', 'root', root)
+    
+    # Prometheus /metrics (when prometheus-flask-exporter is installed)
+    init_metrics(app)
+    
+    # Error handlers
+    app.register_error_handler(404, not_found)
+    app.register_error_handler(500, internal_error)
     
     return app
 
+
+def __getattr__(name):
+    """
+    WSGI servers (gunicorn `app:app`) and the Flask CLI get the app instance on first
+    access, so importing create_app (init_db.py, RQ workers, tests) doesn't build one.
+    """
+    global app
+    if name == 'app':
+        app = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 if __name__ == '__main__':
     app = create_app()
+    # Local dev server: make sure the schema exists before serving
+    with app.app_context():
+        init_schema()
     app.run(debug=True, host='0.0.0.0', port=5000)
-
-# When running under WSGI servers (gunicorn) expose the app instance
-app = create_app()
@@ -8,6 +8,20 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or 'sqlite:///unified_calendar.db'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
+    # Connection pool shared by every request (including health checks).
+    # SQLite's default pools don't accept sizing arguments, so only pre-ping/recycle apply there.
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_pre_ping': True,
+        'pool_recycle': 1800,
+        # Compiled-statement cache (SQLAlchemy default is 500 entries)
+        'query_cache_size': int(os.environ.get('DB_QUERY_CACHE_SIZE', 1200)),
+    }
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS.update({
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 20)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        })
+    
     # Google OAuth Configuration
     GOOGLE_CLIENT_ID = os.environ.get('GOOGLE_CLIENT_ID')
     GOOGLE_CLIENT_SECRET = os.environ.get('GOOGLE_CLIENT_SECRET')
@@ -20,22 +34,40 @@ class Config:
     MICROSOFT_REDIRECT_URI = os.environ.get('MICROSOFT_REDIRECT_URI', 'http://localhost:5000/api/auth/microsoft/callback')
     MICROSOFT_TENANT_ID = os.environ.get('MICROSOFT_TENANT_ID')
     
+    # Shared Redis (cache); optional in local dev
+    REDIS_URL = os.environ.get('REDIS_URL')
+    
     # Session Configuration
-    SESSION_TYPE = 'filesystem'
+    # Flask's signed-cookie session: it only holds the login id and short-lived
+    # OAuth state, and tokens live in the database, so no server-side store is needed.
     PERMANENT_SESSION_LIFETIME = 3600  # 1 hour
     SESSION_COOKIE_SECURE = False  # Set to True in production with HTTPS
     SESSION_COOKIE_HTTPONLY = True
     SESSION_COOKIE_SAMESITE = 'Lax'
     SESSION_COOKIE_NAME = 'session'
     
+    # Flask-Caching: shared across workers via Redis when available
+    CACHE_TYPE = 'RedisCache' if REDIS_URL else 'SimpleCache'
+    CACHE_REDIS_URL = REDIS_URL
+    CACHE_DEFAULT_TIMEOUT = 10
+    
+    # Python logging level for app loggers (DEBUG shows OAuth state/session traces)
+    LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    
+    # Prometheus metrics at /metrics (requires prometheus-flask-exporter)
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true').lower() == 'true'
+    
     # Flask-Login Configuration
     REMEMBER_COOKIE_DURATION = 3600  # 1 hour
     REMEMBER_COOKIE_SECURE = False  # Set to True in production with HTTPS
     REMEMBER_COOKIE_HTTPONLY = True
-    REMEMBER_COOKIE_REFRESH_EACH_REQUEST = True
+    # Re-issuing the remember cookie on every request only adds a Set-Cookie header to each response
+    REMEMBER_COOKIE_REFRESH_EACH_REQUEST = False
     
     # CORS Configuration
     CORS_ORIGINS = ['http://localhost:3000', 'http://localhost:5173']
+    # Set when a reverse proxy (see nginx.conf) adds CORS headers and answers preflights
+    CORS_HANDLED_BY_PROXY = os.environ.get('CORS_HANDLED_BY_PROXY', 'false').lower() == 'true'
     
     # Timezone Configuration
     DEFAULT_TIMEZONE = os.environ.get('DEFAULT_TIMEZONE', 'UTC')
@@ -1,4 +1,4 @@
-from flask import Blueprint, request, jsonify, session, redirect
+from flask import Blueprint, request, jsonify, redirect
 from flask_login import login_user, logout_user, login_required, current_user
 from models.user_model import User, db
 from models.calendar_connection_model import CalendarConnection
@@ -6,27 +6,19 @@ from models.event_model import Event
 from models.event_mirror_mapping_model import EventMirrorMapping
 from services.google_service import GoogleCalendarService
 from services.microsoft_service import MicrosoftCalendarService
-import json
-import base64
+from services.service_registry import shared_service
+from services.sync_queue import enqueue_initial_sync
+from services import user_cache
+from utils.oauth_state import decode_oauth_state
+from utils.auth_snapshot import clear_auth_snapshot, read_auth_snapshot, set_auth_snapshot
+from sqlalchemy import and_, or_, select, update
+import logging
 import os
 
-
-def decode_oauth_state(state_str):
-    """Decode base64-encoded JSON state payload."""
-    if not state_str:
-        return {}
-    try:
-        padding = '=' * (-len(state_str) % 4)
-        decoded_bytes = base64.urlsafe_b64decode(state_str + padding)
-        data = json.loads(decoded_bytes.decode('utf-8'))
-        if isinstance(data, dict):
-            return data
-    except Exception as e:
-        print(f"State decode failed: {e}")
-    return {}
+logger = logging.getLogger(__name__)
 
 
-def _reassign_connection_data(provider: str, old_user_id: int, new_user_id: int, account_email: str):
+def _reassign_connection_data(connection_id: int, old_user_id: int, new_user_id: int, account_email: str):
     """
     Ensure all events and mirror mappings that belong to a calendar connection
     follow the connection when it is reassigned to a different user.
@@ -34,45 +26,249 @@ def _reassign_connection_data(provider: str, old_user_id: int, new_user_id: int,
     if old_user_id is None or new_user_id is None or old_user_id == new_user_id:
         return
 
-    provider = provider.lower()
-    email_prefix = f"{account_email}:"
+    # Update events stored for this connection (indexed equality on connection_id).
+    # rowcount reports how many rows moved; no pre-check SELECT is needed
+    moved_events = db.session.execute(
+        update(Event)
+        .where(
+            Event.connection_id == connection_id,
+            Event.user_id == old_user_id
+        )
+        .values(user_id=new_user_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+
+    # Update mirror mappings referencing this connection
+    moved_mappings = db.session.execute(
+        update(EventMirrorMapping)
+        .where(EventMirrorMapping.user_id == old_user_id)
+        .values(user_id=new_user_id)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    logger.info(
+        "Reassigned %s events and %s mirror mappings for %s from user %s to %s",
+        moved_events, moved_mappings, account_email, old_user_id, new_user_id
+    )
+
+    # The previous owner may have just lost its last active connection
+    old_user = db.session.get(User, old_user_id)
+    if old_user:
+        db.session.flush()
+        _refresh_has_any_connection(old_user)
+
+
+def _refresh_has_any_connection(user):
+    """Recompute User.has_any_connection from User.has_any_connection_clause() in one query"""
+    user.has_any_connection = bool(db.session.execute(
+        select(User.has_any_connection_clause()).where(User.id == user.id)
+    ).scalar())
+
+
+def resolve_target_user(provider: str, account_email: str, stored_user_id=None, stored_provider=None):
+    """
+    Decide which user should own a freshly authorized calendar account.
+
+    Returns (target_user or None, existing_connection_id or None). Candidates are
+    loaded in one query that projects only the connection id; priority is the
+    user from the signed state (same provider), the logged-in user, the owner of
+    an existing connection for the account, then a user with the account's email.
+    """
+    use_stored = bool(stored_user_id) and stored_provider == provider
+    matches = [User.email == account_email, CalendarConnection.id.isnot(None)]
+    if use_stored:
+        matches.append(User.id == stored_user_id)
 
-    # Update events stored for this connection (provider_event_id uses "email:event_id" format)
-    events_to_update = Event.query.filter(
-        Event.user_id == old_user_id,
-        Event.provider == provider,
-        Event.provider_event_id.like(f"{email_prefix}%")
+    rows = db.session.execute(
+        select(User, CalendarConnection.id)
+        .outerjoin(CalendarConnection, and_(
+            CalendarConnection.user_id == User.id,
+            CalendarConnection.provider == provider,
+            CalendarConnection.provider_account_email == account_email
+        ))
+        .where(or_(*matches))
+        .order_by(CalendarConnection.id)
     ).all()
-    for event in events_to_update:
-        event.user_id = new_user_id
 
-    # Update mirror mappings referencing this connection
-    mappings_to_update = EventMirrorMapping.query.filter_by(user_id=old_user_id).all()
-    for mapping in mappings_to_update:
-        mapping.user_id = new_user_id
+    stored_user = None
+    email_user = None
+    connection_owner = None
+    existing_connection_id = None
+    for user, connection_id in rows:
+        if use_stored and user.id == stored_user_id:
+            stored_user = user
+        if user.email == account_email and email_user is None:
+            email_user = user
+        if connection_id is not None and existing_connection_id is None:
+            existing_connection_id = connection_id
+            connection_owner = user
+
+    if stored_user:
+        logger.debug("Using stored user from state: %s (ID: %s)", stored_user.email, stored_user.id)
+        return stored_user, existing_connection_id
+    if use_stored:
+        logger.info("Stored user ID %s not found", stored_user_id)
+    if current_user.is_authenticated:
+        logger.debug("Using currently logged in user: %s (ID: %s)", current_user.email, current_user.id)
+        return current_user._get_current_object(), existing_connection_id
+    if connection_owner:
+        logger.debug("Using user from existing connection: %s (ID: %s)", connection_owner.email, connection_owner.id)
+        return connection_owner, existing_connection_id
+    if email_user:
+        logger.debug("Using user found by email: %s (ID: %s)", email_user.email, email_user.id)
+    return email_user, existing_connection_id
 
 auth_bp = Blueprint('auth', __name__)
 
 # Get frontend URL from environment (for redirects after OAuth callback)
 FRONTEND_URL = os.getenv('FRONTEND_URL', 'http://localhost:5173')
 
+# Provider-specific bits of the OAuth callback
+OAUTH_PROVIDERS = {
+    'google': {
+        'label': 'Google',
+        'access_token_key': 'token',
+        'default_calendar_id': 'primary',
+        'set_legacy_token': User.set_google_token,
+    },
+    'microsoft': {
+        'label': 'Microsoft',
+        'access_token_key': 'access_token',
+        'default_calendar_id': 'default',
+        'set_legacy_token': User.set_microsoft_token,
+    },
+}
+
+
+def _callback_error_redirect(label):
+    """Redirect for provider errors / missing code or state, or None when the callback can proceed"""
+    code = request.args.get('code')
+    state = request.args.get('state')
+    error = request.args.get('error')
+    
+    # Log all received parameters for debugging
+    logger.debug("%s callback received - Query params: %s", label, dict(request.args))
+    
+    # Check for OAuth errors from the provider
+    if error:
+        error_description = request.args.get('error_description', 'Unknown error')
+        logger.info("%s OAuth error: %s - %s", label, error, error_description)
+        return redirect(f'{FRONTEND_URL}/?error={error}&error_description={error_description}')
+    
+    if not code:
+        logger.info("%s callback called without code. Query params: %s", label, dict(request.args))
+        return redirect(f'{FRONTEND_URL}/?error=no_code&message=No authorization code received from {label}')
+    
+    if not state:
+        logger.info("%s callback called without state. Query params: %s", label, dict(request.args))
+        return redirect(f'{FRONTEND_URL}/?error=no_state&message=No state parameter received from {label}')
+    
+    return None
+
+
+def _complete_oauth_callback(provider, token_info, user_info, state):
+    """
+    Shared tail of the OAuth callbacks: resolve the owning user, upsert the
+    CalendarConnection, log the user in and schedule the initial sync.
+    """
+    settings = OAUTH_PROVIDERS[provider]
+    label = settings['label']
+    account_email = user_info.get('email', 'user@example.com')
+    account_name = user_info.get('name', f'{label} User')
+    
+    logger.debug("%s account email: %s", label, account_email)
+    logger.debug("%s account name: %s", label, account_name)
+    
+    # Signed state from get_auth_url carries the "Add Account" target user (no session lookup)
+    state_payload = decode_oauth_state(state)
+    stored_user_id = state_payload.get('target_user_id')
+    stored_provider = state_payload.get('provider')
+    
+    # Determine which user should own this connection
+    target_user, existing_connection_id = resolve_target_user(
+        provider, account_email, stored_user_id, stored_provider
+    )
+    if not target_user:
+        target_user = User(email=account_email, name=account_name)
+        # No flush needed: the connection below references the user object and
+        # SQLAlchemy fills in the foreign key at commit
+        db.session.add(target_user)
+        logger.info("Created new user for %s account: %s", label, account_email)
+    
+    # Ensure public booking username exists (used for /book/{username})
+    if not getattr(target_user, 'public_username', None):
+        try:
+            target_user.ensure_public_username()
+        except Exception:
+            pass
+    
+    # Only load the full connection row when the account is already connected
+    connection = db.session.get(CalendarConnection, existing_connection_id) if existing_connection_id else None
+    previous_owner_id = connection.user_id if connection else None
+    
+    # Ensure connection exists and belongs to target_user
+    if connection:
+        if connection.user_id != target_user.id:
+            logger.info("Reassigning %s connection %s from user %s to %s", label, account_email, connection.user_id, target_user.id)
+            old_user_id = connection.user_id
+            connection.user_id = target_user.id
+            _reassign_connection_data(connection.id, old_user_id, target_user.id, account_email)
+    else:
+        connection = CalendarConnection(
+            user=target_user,
+            provider=provider,
+            provider_account_email=account_email,
+            provider_account_name=account_name,
+            calendar_id=settings['default_calendar_id']
+        )
+        db.session.add(connection)
+        logger.info("Created new CalendarConnection for %s", account_email)
+    
+    connection.set_token(token_info)
+    connection.is_connected = True
+    connection.is_active = True
+    connection.provider_account_name = account_name
+    
+    # Keep legacy User token fields updated for backward compatibility
+    settings['set_legacy_token'](target_user, token_info)
+    target_user.has_any_connection = True
+    
+    db.session.commit()
+    user_cache.invalidate(target_user.id)
+    if previous_owner_id != target_user.id:
+        user_cache.invalidate(previous_owner_id)
+    
+    # Log in/keep logged in the target user
+    login_user(target_user, remember=True)
+    
+    # Initial sync runs in the background so the redirect isn't held up by provider APIs
+    try:
+        enqueue_initial_sync(connection.id, provider)
+    except Exception as sync_error:
+        logger.exception("Could not schedule auto-sync for %s: %s", account_email, sync_error)
+        # Don't fail the login if scheduling fails
+    
+    # Redirect to frontend with a fresh /check-auth snapshot for the logged-in user
+    return set_auth_snapshot(redirect(f'{FRONTEND_URL}/'), user_cache.user_fields(target_user))
+
+
 @auth_bp.route('/check-auth')
 def check_auth():
     """Check if user is authenticated without requiring login"""
-    if current_user.is_authenticated:
+    # Fast path: signed snapshot cookie for the session user, no user load
+    snapshot_user = read_auth_snapshot()
+    if snapshot_user is not None:
         return jsonify({
             'authenticated': True,
-            'user': {
-                'id': current_user.id,
-                'email': current_user.email,
-                'name': current_user.name,
-                'public_username': getattr(current_user, 'public_username', None),
-                'default_slot_duration_minutes': getattr(current_user, 'default_slot_duration_minutes', 30),
-                'google_connected': current_user.google_calendar_connected,
-                'microsoft_connected': current_user.microsoft_calendar_connected,
-                'has_connected_calendars': current_user.has_connected_calendars()
-            }
+            'user': snapshot_user
         })
+    
+    if current_user.is_authenticated:
+        snapshot = user_cache.get_user_snapshot(current_user)
+        response = jsonify({
+            'authenticated': True,
+            'user': snapshot['user']
+        })
+        return set_auth_snapshot(response, snapshot['user'])
     else:
         return jsonify({'authenticated': False}), 401
 
@@ -80,242 +276,75 @@ def check_auth():
 def google_login():
     """Initiate Google OAuth login"""
     try:
-        # Store current user ID in session if logged in (for adding account to existing user)
-        if current_user.is_authenticated:
-            session['adding_account_user_id'] = current_user.id
-            session['adding_account_provider'] = 'google'
-            print(f"Storing user {current_user.id} in session for Google account addition")
-        
-        google_service = GoogleCalendarService()
+        google_service = shared_service(GoogleCalendarService)
+        # Adding an account to a logged-in user: the target user travels in the signed state
         target_user_id = current_user.id if current_user.is_authenticated else None
         auth_url = google_service.get_auth_url(target_user_id=target_user_id)
         
-        # Debug: Print session info
-        print(f"Session ID: {session.sid if hasattr(session, 'sid') else 'No session ID'}")
-        print(f"Stored state after auth URL generation: {session.get('google_oauth_state')}")
-        
         return jsonify({'auth_url': auth_url})
     except Exception as e:
-        print(f"Google login error: {str(e)}")
+        logger.exception("Google login error: %s", e)
         return jsonify({'error': f'Google OAuth configuration error: {str(e)}'}), 500
 
 @auth_bp.route('/google/callback')
 def google_callback():
     """Handle Google OAuth callback - supports multi-account via CalendarConnection"""
     try:
+        error_response = _callback_error_redirect('Google')
+        if error_response:
+            return error_response
+        
         code = request.args.get('code')
         state = request.args.get('state')
-        error = request.args.get('error')
-        
-        # Log all received parameters for debugging
-        print(f"Google callback received - Query params: {dict(request.args)}")
-        
-        # Check for OAuth errors from Google
-        if error:
-            error_description = request.args.get('error_description', 'Unknown error')
-            print(f"Google OAuth error: {error} - {error_description}")
-            return redirect(f'{FRONTEND_URL}/?error={error}&error_description={error_description}')
-        
-        if not code:
-            print(f"Google callback called without code. Query params: {dict(request.args)}")
-            return redirect(f'{FRONTEND_URL}/?error=no_code&message=No authorization code received from Google')
-        
-        if not state:
-            print(f"Google callback called without state. Query params: {dict(request.args)}")
-            return redirect(f'{FRONTEND_URL}/?error=no_state&message=No state parameter received from Google')
+        logger.debug("Received state: %s", state)
         
-        # Debug: Print state information
-        print(f"Received state: {state}")
-        print(f"Stored state: {session.get('google_oauth_state')}")
-        
-        google_service = GoogleCalendarService()
+        google_service = shared_service(GoogleCalendarService)
         token_info = google_service.handle_callback(code, state)
+        user_info = google_service.get_user_info(token_info[OAUTH_PROVIDERS['google']['access_token_key']])
         
-        # Get user info from Google
-        user_info = google_service.get_user_info(token_info['token'])
-        google_account_email = user_info.get('email', 'user@example.com')
-        google_account_name = user_info.get('name', 'Google User')
-        
-        print(f"Google account email: {google_account_email}")
-        print(f"Google account name: {google_account_name}")
-        
-        # Decode state payload for additional metadata
-        state_payload = decode_oauth_state(state)
-        state_user_id = state_payload.get('target_user_id')
-        state_provider = state_payload.get('provider')
-        
-        # Check if we stored a user ID in session (from "Add Account" button click)
-        stored_user_id = session.get('adding_account_user_id') or state_user_id
-        stored_provider = session.get('adding_account_provider') or state_provider
-        if stored_user_id is not None:
-            try:
-                stored_user_id = int(stored_user_id)
-            except (TypeError, ValueError):
-                print(f"Invalid stored_user_id value: {stored_user_id}")
-                stored_user_id = None
-        
-        # Clear the stored values
-        session.pop('adding_account_user_id', None)
-        session.pop('adding_account_provider', None)
-        
-        # Determine which user should own this Google connection
-        existing_connection_any_user = CalendarConnection.query.filter_by(
-            provider='google',
-            provider_account_email=google_account_email
-        ).first()
-        
-        target_user = None
-        if stored_user_id and stored_provider == 'google':
-            target_user = User.query.get(stored_user_id)
-            if target_user:
-                print(f"Using stored user from state/session: {target_user.email} (ID: {target_user.id})")
-            else:
-                print(f"Stored user ID {stored_user_id} not found")
-        if not target_user and current_user.is_authenticated:
-            target_user = current_user
-            print(f"Using currently logged in user: {target_user.email} (ID: {target_user.id})")
-        if not target_user and existing_connection_any_user:
-            target_user = existing_connection_any_user.user
-            print(f"Using user from existing connection: {target_user.email} (ID: {target_user.id})")
-        if not target_user:
-            target_user = User.query.filter_by(email=google_account_email).first()
-            if target_user:
-                print(f"Using user found by email: {target_user.email} (ID: {target_user.id})")
-        if not target_user:
-            target_user = User(email=google_account_email, name=google_account_name)
-            db.session.add(target_user)
-            db.session.flush()
-            print(f"Created new user for Google account: {target_user.email} (ID: {target_user.id})")
-
-        # Ensure public booking username exists (used for /book/{username})
-        if not getattr(target_user, 'public_username', None):
-            try:
-                target_user.ensure_public_username()
-            except Exception:
-                pass
-        
-        # Ensure connection exists and belongs to target_user
-        if existing_connection_any_user:
-            connection = existing_connection_any_user
-            if connection.user_id != target_user.id:
-                print(f"Reassigning Google connection {google_account_email} from user {connection.user_id} to {target_user.id}")
-                old_user_id = connection.user_id
-                connection.user_id = target_user.id
-                _reassign_connection_data('google', old_user_id, target_user.id, google_account_email)
-        else:
-            connection = CalendarConnection(
-                user_id=target_user.id,
-                provider='google',
-                provider_account_email=google_account_email,
-                provider_account_name=google_account_name,
-                calendar_id='primary'
-            )
-            db.session.add(connection)
-            print(f"Created new CalendarConnection for {google_account_email}")
-        
-        connection.set_token(token_info)
-        connection.is_connected = True
-        connection.is_active = True
-        connection.provider_account_name = google_account_name
-        
-        # Keep legacy token info updated
-        target_user.set_google_token(token_info)
-        
-        db.session.commit()
-        
-        # Log in/keep logged in the target user
-        login_user(target_user, remember=True)
-        user = target_user
-        
-        # Auto-sync Google Calendar events for this connection
-        try:
-            connection = CalendarConnection.query.filter_by(
-                user_id=user.id,
-                provider='google',
-                provider_account_email=google_account_email
-            ).first()
-            
-            if connection:
-                print(f"Auto-syncing events for connection: {google_account_email}")
-                google_service.sync_events_for_connection(connection, days_back=30, days_forward=30)
-            else:
-                # Fallback to legacy sync
-                print(f"Falling back to legacy sync for user: {user.email}")
-                google_service.sync_events(user, days_back=30, days_forward=30)
-        except Exception as sync_error:
-            print(f"Auto-sync failed: {sync_error}")
-            import traceback
-            traceback.print_exc()
-            # Don't fail the login if sync fails
-        
-        # Redirect to frontend
-        return redirect(f'{FRONTEND_URL}/')
+        return _complete_oauth_callback('google', token_info, user_info, state)
         
     except Exception as e:
-        print(f"Google callback error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Google callback error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/login/microsoft')
 def microsoft_login():
     """Initiate Microsoft OAuth login"""
     try:
-        # Store current user ID in session if logged in (for adding account to existing user)
-        if current_user.is_authenticated:
-            session['adding_account_user_id'] = current_user.id
-            session['adding_account_provider'] = 'microsoft'
-            print(f"Storing user {current_user.id} in session for Microsoft account addition")
-        
-        microsoft_service = MicrosoftCalendarService()
+        microsoft_service = shared_service(MicrosoftCalendarService)
+        # Adding an account to a logged-in user: the target user travels in the signed state
         target_user_id = current_user.id if current_user.is_authenticated else None
         auth_url = microsoft_service.get_auth_url(target_user_id=target_user_id)
         return jsonify({'auth_url': auth_url})
     except Exception as e:
-        print(f"Microsoft login error: {str(e)}")
+        logger.exception("Microsoft login error: %s", e)
         return jsonify({'error': f'Microsoft OAuth configuration error: {str(e)}'}), 500
 
 @auth_bp.route('/microsoft/callback')
 def microsoft_callback():
     """Handle Microsoft OAuth callback - supports multi-account via CalendarConnection"""
     try:
+        error_response = _callback_error_redirect('Microsoft')
+        if error_response:
+            return error_response
+        
         code = request.args.get('code')
         state = request.args.get('state')
-        error = request.args.get('error')
         
-        # Log all received parameters for debugging
-        print(f"Microsoft callback received - Query params: {dict(request.args)}")
-        
-        # Check for OAuth errors from Microsoft
-        if error:
-            error_description = request.args.get('error_description', 'Unknown error')
-            print(f"Microsoft OAuth error: {error} - {error_description}")
-            return redirect(f'{FRONTEND_URL}/?error={error}&error_description={error_description}')
-        
-        if not code:
-            print(f"Microsoft callback called without code. Query params: {dict(request.args)}")
-            return redirect(f'{FRONTEND_URL}/?error=no_code&message=No authorization code received from Microsoft')
-        
-        if not state:
-            print(f"Microsoft callback called without state. Query params: {dict(request.args)}")
-            return redirect(f'{FRONTEND_URL}/?error=no_state&message=No state parameter received from Microsoft')
-        
-        microsoft_service = MicrosoftCalendarService()
+        microsoft_service = shared_service(MicrosoftCalendarService)
         
         # Try to exchange code for tokens
         try:
             token_info = microsoft_service.handle_callback(code, state)
         except Exception as token_error:
             error_msg = str(token_error)
-            print(f"Token exchange error: {error_msg}")
+            logger.warning("Token exchange error: %s", error_msg)
             
             # If code was already redeemed, it means the connection might have been created
             # but the redirect failed. We'll redirect to frontend with a helpful message.
             if "already redeemed" in error_msg.lower() or "AADSTS54005" in error_msg:
-                print("Authorization code already redeemed. This usually means:")
-                print("  1. The connection was already created successfully")
-                print("  2. Or the code was used in a previous attempt")
-                print("Redirecting to frontend - user should check their connections or try again")
+                logger.info("Authorization code already redeemed (connection may already exist or the code was reused); redirecting to frontend")
                 
                 # Redirect to frontend - user can check if connection exists or try again
                 return redirect(f'{FRONTEND_URL}/?microsoft_auth=retry&message=Authorization code was already used. Please check if your Microsoft account is already connected, or try connecting again.')
@@ -323,130 +352,12 @@ def microsoft_callback():
                 # Re-raise other errors
                 raise
         
-        # Get user info from Microsoft
-        user_info = microsoft_service.get_user_info(token_info['access_token'])
-        microsoft_account_email = user_info.get('email', 'user@example.com')
-        microsoft_account_name = user_info.get('name', 'Microsoft User')
-        
-        print(f"Microsoft account email: {microsoft_account_email}")
-        print(f"Microsoft account name: {microsoft_account_name}")
+        user_info = microsoft_service.get_user_info(token_info[OAUTH_PROVIDERS['microsoft']['access_token_key']])
         
-        # Decode state payload metadata
-        state_payload = decode_oauth_state(state)
-        state_user_id = state_payload.get('target_user_id')
-        state_provider = state_payload.get('provider')
-        
-        # Check if we stored a user ID in session (from "Add Account" button click")
-        stored_user_id = session.get('adding_account_user_id') or state_user_id
-        stored_provider = session.get('adding_account_provider') or state_provider
-        if stored_user_id is not None:
-            try:
-                stored_user_id = int(stored_user_id)
-            except (TypeError, ValueError):
-                print(f"Invalid stored_user_id value: {stored_user_id}")
-                stored_user_id = None
-        
-        # Clear the stored values
-        session.pop('adding_account_user_id', None)
-        session.pop('adding_account_provider', None)
-        
-        existing_connection_any_user = CalendarConnection.query.filter_by(
-            provider='microsoft',
-            provider_account_email=microsoft_account_email
-        ).first()
-        
-        target_user = None
-        if stored_user_id and stored_provider == 'microsoft':
-            target_user = User.query.get(stored_user_id)
-            if target_user:
-                print(f"Using stored user from state/session: {target_user.email} (ID: {target_user.id})")
-            else:
-                print(f"Stored user ID {stored_user_id} not found")
-        if not target_user and current_user.is_authenticated:
-            target_user = current_user
-            print(f"Using currently logged in user: {target_user.email} (ID: {target_user.id})")
-        if not target_user and existing_connection_any_user:
-            target_user = existing_connection_any_user.user
-            print(f"Using user from existing connection: {target_user.email} (ID: {target_user.id})")
-        if not target_user:
-            target_user = User.query.filter_by(email=microsoft_account_email).first()
-            if target_user:
-                print(f"Using user found by email: {target_user.email} (ID: {target_user.id})")
-        if not target_user:
-            target_user = User(email=microsoft_account_email, name=microsoft_account_name)
-            db.session.add(target_user)
-            db.session.flush()  # Flush to get user.id before creating connection
-            print(f"Created new user: {microsoft_account_email} (ID: {target_user.id})")
-
-        # Ensure public booking username exists (used for /book/{username})
-        if not getattr(target_user, 'public_username', None):
-            try:
-                target_user.ensure_public_username()
-            except Exception:
-                pass
-        
-        if existing_connection_any_user:
-            connection = existing_connection_any_user
-            if connection.user_id != target_user.id:
-                print(f"Reassigning Microsoft connection {microsoft_account_email} from user {connection.user_id} to {target_user.id}")
-                old_user_id = connection.user_id
-                connection.user_id = target_user.id
-                _reassign_connection_data('microsoft', old_user_id, target_user.id, microsoft_account_email)
-        else:
-            connection = CalendarConnection(
-                user_id=target_user.id,
-                provider='microsoft',
-                provider_account_email=microsoft_account_email,
-                provider_account_name=microsoft_account_name,
-                calendar_id='default'
-            )
-            db.session.add(connection)
-            print(f"Created CalendarConnection for {microsoft_account_email}")
-        
-        connection.set_token(token_info)
-        connection.is_connected = True
-        connection.is_active = True
-        connection.provider_account_name = microsoft_account_name
-        
-        # Also set legacy User model fields for backward compatibility
-        target_user.set_microsoft_token(token_info)
-        
-        db.session.commit()
-        
-        # Log in user
-        login_user(target_user, remember=True)
-        user = target_user
-        
-        # Auto-sync Microsoft Calendar events for this connection
-        try:
-            connection = CalendarConnection.query.filter_by(
-                user_id=user.id,
-                provider='microsoft',
-                provider_account_email=microsoft_account_email
-            ).first()
-            
-            if connection:
-                print(f"Auto-syncing events for connection: {microsoft_account_email}")
-                # Note: Microsoft service doesn't have sync_events_for_connection yet
-                # Fallback to legacy sync for now
-                microsoft_service.sync_events(user, days_back=30, days_forward=30)
-            else:
-                # Fallback to legacy sync
-                print(f"Falling back to legacy sync for user: {user.email}")
-                microsoft_service.sync_events(user, days_back=30, days_forward=30)
-        except Exception as sync_error:
-            print(f"Auto-sync failed: {sync_error}")
-            import traceback
-            traceback.print_exc()
-            # Don't fail the login if sync fails
-        
-        # Redirect to frontend
-        return redirect(f'{FRONTEND_URL}/')
+        return _complete_oauth_callback('microsoft', token_info, user_info, state)
         
     except Exception as e:
-        print(f"Microsoft callback error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Microsoft callback error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @auth_bp.route('/logout')
@@ -454,32 +365,34 @@ def microsoft_callback():
 def logout():
     """Logout user"""
     logout_user()
-    return jsonify({'message': 'Logged out successfully'})
+    return clear_auth_snapshot(jsonify({'message': 'Logged out successfully'}))
 
 @auth_bp.route('/user/profile')
 @login_required
 def get_user_profile():
     """Get current user profile"""
+    user_data = user_cache.get_user_snapshot(current_user)['user']
     return jsonify({
-        'id': current_user.id,
-        'email': current_user.email,
-        'name': current_user.name,
-        'google_connected': current_user.google_calendar_connected,
-        'microsoft_connected': current_user.microsoft_calendar_connected,
-        'has_connected_calendars': current_user.has_connected_calendars()
+        'id': user_data['id'],
+        'email': user_data['email'],
+        'name': user_data['name'],
+        'google_connected': user_data['google_connected'],
+        'microsoft_connected': user_data['microsoft_connected'],
+        'has_connected_calendars': user_data['has_connected_calendars']
     })
 
 @auth_bp.route('/user/connections')
 @login_required
 def get_user_connections():
     """Get user's calendar connections status (legacy format)"""
+    user_data = user_cache.get_user_snapshot(current_user)['user']
     return jsonify({
         'google': {
-            'connected': current_user.google_calendar_connected,
+            'connected': user_data['google_connected'],
             'last_sync': None  # You could add last sync timestamp to User model
         },
         'microsoft': {
-            'connected': current_user.microsoft_calendar_connected,
+            'connected': user_data['microsoft_connected'],
             'last_sync': None
         }
     })
@@ -489,24 +402,17 @@ def get_user_connections():
 def list_all_connections():
     """Get all calendar connections for the current user (multi-account support)"""
     try:
-        # Get all connections for current user
-        connections = CalendarConnection.query.filter_by(
-            user_id=current_user.id
-        ).order_by(CalendarConnection.created_at.desc()).all()
+        # All connections for current user, newest first (served from the per-user snapshot)
+        connections_list = user_cache.get_user_snapshot(current_user)['connections']
         
-        # Convert to dictionary format
-        connections_list = [conn.to_dict() for conn in connections]
-        
-        print(f"Found {len(connections_list)} connections for user {current_user.email}")
+        logger.debug("Found %d connections for user %s", len(connections_list), current_user.email)
         
         return jsonify({
             'connections': connections_list,
             'count': len(connections_list)
         })
     except Exception as e:
-        print(f"Error listing connections: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error listing connections: %s", e)
         return jsonify({'error': str(e), 'connections': []}), 500
 
 @auth_bp.route('/user/connections/<int:connection_id>', methods=['DELETE'])
@@ -514,27 +420,28 @@ def list_all_connections():
 def remove_connection(connection_id):
     """Remove a calendar connection"""
     try:
-        connection = CalendarConnection.query.filter_by(
-            id=connection_id,
-            user_id=current_user.id
-        ).first()
+        # Primary-key lookup (identity map first), then ownership check
+        connection = db.session.get(CalendarConnection, connection_id)
         
-        if not connection:
+        if not connection or connection.user_id != current_user.id:
             return jsonify({'error': 'Connection not found'}), 404
         
         # Mark as inactive instead of deleting (soft delete)
         connection.is_active = False
         connection.is_connected = False
+        db.session.flush()
+        _refresh_has_any_connection(current_user)
         db.session.commit()
+        user_cache.invalidate(current_user.id)
         
-        print(f"Removed connection {connection_id} for user {current_user.email}")
+        logger.info("Removed connection %s for user %s", connection_id, current_user.email)
         
-        return jsonify({
+        return clear_auth_snapshot(jsonify({
             'message': 'Connection removed successfully',
             'connection_id': connection_id
-        })
+        }))
     except Exception as e:
-        print(f"Error removing connection: {str(e)}")
+        logger.exception("Error removing connection: %s", e)
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -543,25 +450,26 @@ def remove_connection(connection_id):
 def toggle_connection(connection_id):
     """Toggle a connection's active status"""
     try:
-        connection = CalendarConnection.query.filter_by(
-            id=connection_id,
-            user_id=current_user.id
-        ).first()
+        # Primary-key lookup (identity map first), then ownership check
+        connection = db.session.get(CalendarConnection, connection_id)
         
-        if not connection:
+        if not connection or connection.user_id != current_user.id:
             return jsonify({'error': 'Connection not found'}), 404
         
         connection.is_active = not connection.is_active
+        db.session.flush()
+        _refresh_has_any_connection(current_user)
         db.session.commit()
+        user_cache.invalidate(current_user.id)
         
-        print(f"Toggled connection {connection_id} to {'active' if connection.is_active else 'inactive'}")
+        logger.info("Toggled connection %s to %s", connection_id, 'active' if connection.is_active else 'inactive')
         
-        return jsonify({
+        return clear_auth_snapshot(jsonify({
             'message': f"Connection {'activated' if connection.is_active else 'deactivated'}",
             'connection': connection.to_dict()
-        })
+        }))
     except Exception as e:
-        print(f"Error toggling connection: {str(e)}")
+        logger.exception("Error toggling connection: %s", e)
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -570,11 +478,11 @@ def test_oauth():
     """Test OAuth configuration"""
     try:
         # Test Google OAuth
-        google_service = GoogleCalendarService()
+        google_service = shared_service(GoogleCalendarService)
         google_auth_url = google_service.get_auth_url()
         
         # Test Microsoft OAuth
-        microsoft_service = MicrosoftCalendarService()
+        microsoft_service = shared_service(MicrosoftCalendarService)
         microsoft_auth_url = microsoft_service.get_auth_url()
         
         return jsonify({
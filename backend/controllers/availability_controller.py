@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
 
 from services.availability_service import AvailabilityService
+from utils.auth_snapshot import clear_auth_snapshot
 
 
 availability_bp = Blueprint("availability", __name__)
@@ -23,7 +24,8 @@ def set_my_availability():
     try:
         payload = request.get_json() or {}
         data = AvailabilityService.set_owner_availability(current_user.id, payload)
-        return jsonify(data)
+        # default_slot_duration_minutes/public_username are part of the /check-auth snapshot
+        return clear_auth_snapshot(jsonify(data))
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
@@ -1,22 +1,44 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, current_app, g, request, jsonify, stream_with_context, url_for
 from flask_login import login_required, current_user
+from collections import Counter, defaultdict
 from datetime import datetime, timedelta
+from functools import wraps
+import hashlib
+import json
+import logging
+import traceback
+import pytz
 from models.event_model import Event, db
+from models.event_stats_model import EventStats
+from models.calendar_connection_model import CalendarConnection
+from models.user_model import User
+from sqlalchemy import Integer, String, case, cast, delete, func, literal, literal_column, null, select, union_all, update
 from services.google_service import GoogleCalendarService
 from services.microsoft_service import MicrosoftCalendarService
+from services.service_registry import shared_service
 from services.conflict_service import ConflictDetectionService
 from services.bidirectional_sync_service import BidirectionalSyncService
 from services.event_creation_service import EventCreationService
 from services.meeting_detection_service import MeetingDetectionService
+from services.sync_queue import (
+    enqueue_connection_sync, enqueue_sync_endpoint, get_sync_job_status, iter_connection_syncs,
+    sync_connections_concurrently, sync_users_concurrently
+)
+from utils import fast_json
+
+logger = logging.getLogger(__name__)
 
 calendar_bp = Blueprint('calendar', __name__)
 
+# Connection-based sync services by CalendarConnection.provider (instances come from shared_service)
+SYNC_SERVICES = {'google': GoogleCalendarService, 'microsoft': MicrosoftCalendarService}
+PROVIDER_LABELS = {'google': 'Google', 'microsoft': 'Microsoft'}
+
+IST_TZ = pytz.timezone('Asia/Kolkata')
+
 @calendar_bp.route('/debug/microsoft')
 def debug_microsoft_sync():
     """Debug endpoint to diagnose Microsoft sync issues"""
-    from models.calendar_connection_model import CalendarConnection
-    from models.user_model import User
-    
     debug_info = {
         'status': 'debug',
         'steps': []
@@ -73,7 +95,7 @@ def debug_microsoft_sync():
         
         # Step 3: Try to create Microsoft service
         try:
-            ms_service = MicrosoftCalendarService()
+            ms_service = shared_service(MicrosoftCalendarService)
             debug_info['steps'].append({
                 'step': 3,
                 'name': 'Create Microsoft service',
@@ -97,7 +119,6 @@ def debug_microsoft_sync():
                 'result': 'Success'
             })
         except Exception as e:
-            import traceback
             debug_info['steps'].append({
                 'step': 4,
                 'name': 'Get Graph client',
@@ -109,9 +130,7 @@ def debug_microsoft_sync():
         
         # Step 5: Try to fetch events from API
         try:
-            import pytz
-            ist_tz = pytz.timezone('Asia/Kolkata')
-            now = datetime.now(ist_tz)
+            now = datetime.now(IST_TZ)
             start_date = (now - timedelta(days=30)).isoformat()
             end_date = (now + timedelta(days=30)).isoformat()
             
@@ -131,7 +150,6 @@ def debug_microsoft_sync():
                 } for e in events[:5]]
             })
         except Exception as e:
-            import traceback
             debug_info['steps'].append({
                 'step': 5,
                 'name': 'Fetch events from API',
@@ -141,43 +159,42 @@ def debug_microsoft_sync():
             debug_info['error'] = f'Failed to fetch events: {str(e)}'
             return jsonify(debug_info)
         
-        # Step 6: Check database for Microsoft events
+        # Step 6: Check database for Microsoft events (count from event_stats, only 5 rows loaded)
+        stats = db.session.get(EventStats, (conn.user_id, 'microsoft'))
+        db_event_count = stats.total if stats else 0
         db_events = Event.query.filter_by(
             user_id=conn.user_id,
             provider='microsoft'
-        ).all()
+        ).limit(5).all()
         
         debug_info['steps'].append({
             'step': 6,
             'name': 'Check database',
-            'result': f'Found {len(db_events)} Microsoft events in database',
+            'result': f'Found {db_event_count} Microsoft events in database',
             'sample_events': [{
                 'id': e.id,
                 'title': e.title,
                 'provider_event_id': e.provider_event_id[:50] + '...' if e.provider_event_id and len(e.provider_event_id) > 50 else e.provider_event_id
-            } for e in db_events[:5]]
+            } for e in db_events]
         })
         
         debug_info['summary'] = {
             'api_events': len(events),
-            'db_events': len(db_events),
+            'db_events': db_event_count,
             'connection_email': conn.provider_account_email
         }
         
         return jsonify(debug_info)
         
     except Exception as e:
-        import traceback
         debug_info['error'] = str(e)
         debug_info['traceback'] = traceback.format_exc()
         return jsonify(debug_info)
 
 @calendar_bp.route('/debug/microsoft/sync')
+@login_required
 def debug_microsoft_force_sync():
     """Force sync Microsoft events and return detailed results"""
-    from models.calendar_connection_model import CalendarConnection
-    from flask_login import current_user
-    
     result = {
         'status': 'starting',
         'steps': []
@@ -211,81 +228,81 @@ def debug_microsoft_force_sync():
             'last_synced_before': str(conn.last_synced)
         })
         
-        # Run sync
-        ms_service = MicrosoftCalendarService()
-        
-        try:
-            synced_count = ms_service.sync_events_for_connection(conn, days_back=30, days_forward=30)
-            result['steps'].append({
-                'step': 2,
-                'name': 'Sync completed',
-                'synced_count': synced_count
-            })
-        except Exception as e:
-            import traceback
-            result['steps'].append({
-                'step': 2,
-                'name': 'Sync failed',
-                'error': str(e),
-                'traceback': traceback.format_exc()
-            })
-            result['error'] = str(e)
-            return jsonify(result)
-        
-        # Check database after sync
-        db.session.refresh(conn)
-        
-        db_events = Event.query.filter_by(
-            user_id=conn.user_id,
-            provider='microsoft'
-        ).all()
-        
-        # Count real events vs mirror events
-        real_events = [e for e in db_events if not e.title.startswith('[Mirror]')]
-        mirror_events = [e for e in db_events if e.title.startswith('[Mirror]')]
-        
+        # Run the sync on the sync queue (RQ worker, or a background thread without Redis)
+        # instead of holding this request open for the whole Graph round trip
+        job_id = enqueue_connection_sync(conn.id, days_back=30, days_forward=30, owner_id=current_user.id)
         result['steps'].append({
-            'step': 3,
-            'name': 'Check database after sync',
-            'total_events': len(db_events),
-            'real_events': len(real_events),
-            'mirror_events': len(mirror_events),
-            'last_synced_after': str(conn.last_synced),
-            'sample_real_events': [{
-                'id': e.id,
-                'title': e.title,
-                'start_time': str(e.start_time),
-                'provider_event_id': e.provider_event_id[:60] + '...' if len(e.provider_event_id or '') > 60 else e.provider_event_id
-            } for e in real_events[:5]]
+            'step': 2,
+            'name': 'Sync queued',
+            'job_id': job_id
         })
+        result['status'] = 'queued'
+        result['job_id'] = job_id
+        result['status_url'] = url_for('calendar.debug_microsoft_sync_status', job_id=job_id)
         
-        result['status'] = 'success'
-        result['summary'] = {
-            'synced_count': synced_count,
-            'real_events_in_db': len(real_events),
-            'mirror_events_in_db': len(mirror_events),
-            'last_synced': str(conn.last_synced)
-        }
-        
-        return jsonify(result)
+        return jsonify(result), 202
         
     except Exception as e:
-        import traceback
         result['error'] = str(e)
         result['traceback'] = traceback.format_exc()
         return jsonify(result)
 
+@calendar_bp.route('/debug/microsoft/sync/status/<job_id>')
+@login_required
+def debug_microsoft_sync_status(job_id):
+    """Status of a sync the current user queued by /debug/microsoft/sync ('queued', 'started', 'finished' or 'failed')"""
+    job = get_sync_job_status(job_id, current_user.id)
+    if job is None:
+        return jsonify({'error': 'Unknown job', 'job_id': job_id}), 404
+    
+    job['job_id'] = job_id
+    if job['status'] == 'finished':
+        job['synced_count'] = job['result']
+    return jsonify(job)
+
+def respond_async_when_preferred(view):
+    """
+    Queue a sync route and answer 202 when the client sends `Prefer: respond-async` (RFC 7240).
+
+    The job re-runs the same view in the background; poll the returned status_url for
+    its status code and JSON body. Without the header the route runs inline as before,
+    as do anonymous requests (only the user who queued a job can read its status).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if 'respond-async' not in request.headers.get('Prefer', '') or not current_user.is_authenticated:
+            return view(*args, **kwargs)
+        job_id = enqueue_sync_endpoint(request.endpoint, request.path, owner_id=current_user.id)
+        return jsonify({
+            'status': 'queued',
+            'job_id': job_id,
+            'status_url': url_for('calendar.sync_job_status', job_id=job_id)
+        }), 202, {'Preference-Applied': 'respond-async'}
+    return wrapper
+
+@calendar_bp.route('/sync/status/<job_id>', methods=['GET'])
+@login_required
+def sync_job_status(job_id):
+    """Status of a sync the current user queued with `Prefer: respond-async` ('queued', 'started', 'finished' or 'failed')"""
+    job = get_sync_job_status(job_id, current_user.id)
+    if job is None:
+        return jsonify({'error': 'Unknown job', 'job_id': job_id}), 404
+    
+    job['job_id'] = job_id
+    return jsonify(job)
+
 @calendar_bp.route('/test')
 def test_calendar():
     """Test endpoint for calendar API"""
     try:
-        # Get basic stats
-        total_events = Event.query.count()
-        total_users = db.session.query(db.func.count(Event.user_id.distinct())).scalar()
-        
-        # Get events by provider
-        google_events = Event.query.filter_by(provider='google').count()
-        microsoft_events = Event.query.filter_by(provider='microsoft').count()
+        # Basic stats and per-provider counts from the trigger-maintained event_stats table
+        # (one row per user/provider) instead of scanning events
+        total_events, total_users, google_events, microsoft_events = db.session.query(
+            func.coalesce(func.sum(EventStats.total), 0),
+            func.count(case((EventStats.total > 0, EventStats.user_id)).distinct()),
+            func.coalesce(func.sum(case((EventStats.provider == 'google', EventStats.total), else_=0)), 0),
+            func.coalesce(func.sum(case((EventStats.provider == 'microsoft', EventStats.total), else_=0)), 0)
+        ).one()
         
         return jsonify({
             'status': 'success',
@@ -306,32 +323,24 @@ def test_calendar():
 
 def get_test_user():
     """Get or create test user for development"""
-    from models.user_model import User
-    
     user = User.query.first()
     if not user:
         user = User(email="test@example.com", name="Test User")
         db.session.add(user)
         db.session.commit()
-        print(f"Created test user: {user.email}")
+        logger.info("Created test user: %s", user.email)
     return user
 
 def create_sample_events(user):
     """Create sample events for testing the calendar display"""
-    from datetime import datetime, timedelta
-    import pytz
-    
     # Check if sample events already exist
     existing_events = Event.query.filter_by(user_id=user.id).count()
     if existing_events > 0:
-        print(f"User already has {existing_events} events, skipping sample creation")
+        logger.debug("User already has %d events, skipping sample creation", existing_events)
         return Event.query.filter_by(user_id=user.id).all()
     
-    sample_events = []
-    
     # Get current date in IST
-    ist_tz = pytz.timezone('Asia/Kolkata')
-    now = datetime.now(ist_tz)
+    now = datetime.now(IST_TZ)
     
     # Sample events for the next 30 days - NO INTENTIONAL CONFLICTS
     events_data = [
@@ -418,41 +427,67 @@ def create_sample_events(user):
         }
     ]
     
-    for event_data in events_data:
-        event = Event(
-            user_id=user.id,
-            title=event_data['title'],
-            description=event_data['description'],
-            location=event_data['location'],
-            start_time=event_data['start_time'].replace(tzinfo=None),  # Store as naive datetime
-            end_time=event_data['end_time'].replace(tzinfo=None),
-            all_day=event_data['all_day'],
-            provider=event_data['provider'],
-            provider_event_id=f"sample_{len(sample_events)}",
-            calendar_id='primary',
-            organizer=user.email,
-            last_synced=now.replace(tzinfo=None)
-        )
-        
-        # Set attendees for some events
-        if event_data['title'] in ['Team Meeting', 'Client Presentation']:
-            event.set_attendees([
-                {'email': 'colleague1@example.com', 'name': 'John Doe'},
-                {'email': 'colleague2@example.com', 'name': 'Jane Smith'}
-            ])
-        
-        sample_events.append(event)
-        db.session.add(event)
+    # Attendees are a JSON text column on events, so one row per event covers everything
+    sample_attendees = json.dumps([
+        {'email': 'colleague1@example.com', 'name': 'John Doe'},
+        {'email': 'colleague2@example.com', 'name': 'Jane Smith'}
+    ])
+    last_synced = now.replace(tzinfo=None)
+    sample_rows = []
+    for index, event_data in enumerate(events_data):
+        start_time = event_data['start_time'].replace(tzinfo=None)  # Store as naive datetime
+        end_time = event_data['end_time'].replace(tzinfo=None)
+        sample_rows.append({
+            'user_id': user.id,
+            'title': event_data['title'],
+            'description': event_data['description'],
+            'location': event_data['location'],
+            'start_time': start_time,
+            'end_time': end_time,
+            'all_day': event_data['all_day'],
+            'provider': event_data['provider'],
+            'provider_event_id': f"sample_{index}",
+            'calendar_id': 'primary',
+            'organizer': user.email,
+            'last_synced': last_synced,
+            # Bulk inserts skip the ORM before_insert hook, so set the hash here
+            'dedup_hash': Event.compute_dedup_hash(event_data['title'], start_time, end_time, event_data['provider']),
+            'attendees': sample_attendees if event_data['title'] in ['Team Meeting', 'Client Presentation'] else None
+        })
     
     try:
+        db.session.bulk_insert_mappings(Event, sample_rows)
         db.session.commit()
-        print(f"Created {len(sample_events)} sample events for user {user.email}")
-        return sample_events
+        logger.info("Created %d sample events for user %s", len(sample_rows), user.email)
+        return sample_rows
     except Exception as e:
         db.session.rollback()
-        print(f"Error creating sample events: {e}")
+        logger.exception("Error creating sample events: %s", e)
         return []
 
+def _dedupe_events_select(*criteria):
+    """Core SELECT of Event.list_columns() matching criteria, keeping only the oldest row of each duplicate group, ordered by start_time"""
+    identifier = func.coalesce(
+        Event.provider_event_id,
+        Event.organizer,
+        literal('event-') + cast(Event.id, String)
+    )
+    # dedup_hash covers (lower(trim(title)), start minute, end minute, provider), computed on write
+    row_number = func.row_number().over(
+        partition_by=(
+            func.coalesce(Event.dedup_hash, literal('event-') + cast(Event.id, String)),
+            identifier
+        ),
+        order_by=(Event.created_at, Event.id)
+    ).label('rn')
+    ranked = select(*Event.list_columns(), row_number).where(*criteria).subquery()
+    return (
+        select(*(ranked.c[column.key] for column in Event.list_columns()))
+        .where(ranked.c.rn == 1)
+        .order_by(ranked.c.start_time)
+    )
+
+
 @calendar_bp.route('/events', methods=['GET'])
 @login_required
 def get_events():
@@ -464,180 +499,125 @@ def get_events():
         provider = request.args.get('provider')  # 'google', 'microsoft', or None for all
         
         user_id = current_user.id
-        print(f"Getting events for user {user_id} from connected accounts")
-        print(f"Query params: start_date={start_date}, end_date={end_date}, provider={provider}")
-        
-        # Get all active connections for this user
-        from models.calendar_connection_model import CalendarConnection
-        connections = CalendarConnection.query.filter_by(
-            user_id=user_id,
-            is_active=True,
-            is_connected=True
-        ).all()
-        
-        # Get connected account emails
-        connected_emails = [conn.provider_account_email for conn in connections]
-        connected_providers = list(set([conn.provider for conn in connections]))  # Unique providers
-        
-        print(f"Found {len(connections)} active connections for user {user_id}")
-        for conn in connections:
-            print(f"  - {conn.provider}: {conn.provider_account_email}")
+        logger.debug("Getting events for user %s: start_date=%s, end_date=%s, provider=%s",
+                     user_id, start_date, end_date, provider)
+        
+        # Parse the range up front: the normalized filters are part of the ETag
+        start_datetime = datetime.fromisoformat(start_date.replace('Z', '+00:00')) if start_date else None
+        end_datetime = datetime.fromisoformat(end_date.replace('Z', '+00:00')) if end_date else None
+        
+        # Conditional GET: any insert/update/delete of the user's events changes max(updated_at)
+        # or the row count, so an unchanged tag for the same filters means the previous
+        # response is still valid
+        last_updated, event_count = db.session.query(
+            func.max(Event.updated_at), func.count(Event.id)
+        ).filter(Event.user_id == user_id).one()
+        filters_key = '|'.join(
+            value.isoformat() if isinstance(value, datetime) else (value or '')
+            for value in (start_datetime, end_datetime, provider)
+        )
+        filters_digest = hashlib.blake2s(filters_key.encode('utf-8'), digest_size=8).hexdigest()
+        etag = f"{user_id}-{last_updated.timestamp() if last_updated else 0}-{event_count}-{filters_digest}"
+        if etag in request.if_none_match:
+            not_modified = current_app.response_class(status=304)
+            not_modified.set_etag(etag)
+            not_modified.headers['Cache-Control'] = 'private, no-cache'
+            return not_modified
         
         # Build a simpler query for local/dev use:
         # - Show all non-[Mirror] events belonging to this user
         # - Respect the requested date range and provider, but DO NOT
         #   aggressively filter by CalendarConnection metadata.
         # This keeps behaviour consistent with the summary you see on the dashboard.
-        query = Event.query.filter(Event.user_id == user_id)
-        query = query.filter(~Event.title.ilike('[mirror]%'))
- 
-        # Debug: Check all events for this user before date/provider filtering
-        all_user_events = Event.query.filter(Event.user_id == user_id).all()
-        print(f"DEBUG: Total events for user {user_id} (before date/provider filtering): {len(all_user_events)}")
-        for e in all_user_events[:5]:
-            print(f"  - {e.provider}: {e.title} (organizer: {e.organizer or 'None'}, provider_event_id: {e.provider_event_id or 'None'})")
+        criteria = [Event.user_id == user_id, Event.is_mirror.is_(False)]
         
-        if start_date:
-            start_datetime = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-            query = query.filter(Event.start_time >= start_datetime)
+        if start_datetime:
+            criteria.append(Event.start_time >= start_datetime)
         
-        if end_date:
-            end_datetime = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-            query = query.filter(Event.end_time <= end_datetime)
+        if end_datetime:
+            criteria.append(Event.end_time <= end_datetime)
         
         if provider:
-            query = query.filter(Event.provider == provider)
-        
-        # Order by start time
-        events = query.order_by(Event.start_time).all()
-        
-        print(f"Found {len(events)} events from connected accounts (after filtering)")
-        
-        # Debug: Show which filter conditions matched
-        if len(events) == 0 and len(all_user_events) > 0:
-            print("WARNING: Events exist for user but didn't match filter conditions!")
-            print("Checking why events didn't match...")
-            for e in all_user_events:
-                matched = False
-                reasons = []
-                if e.user_id == user_id and e.provider in connected_providers:
-                    matched = True
-                    reasons.append("user_id + provider match")
-                if e.organizer and e.organizer in connected_emails:
-                    matched = True
-                    reasons.append("organizer match")
-                if e.provider_event_id and any(e.provider_event_id.startswith(f"{email}:") for email in connected_emails):
-                    matched = True
-                    reasons.append("provider_event_id match")
-                if not matched:
-                    print(f"  ❌ Event '{e.title}' didn't match:")
-                    print(f"     user_id: {e.user_id} (expected: {user_id})")
-                    print(f"     provider: {e.provider} (expected: {connected_providers})")
-                    print(f"     organizer: {e.organizer} (expected one of: {connected_emails})")
-                    print(f"     provider_event_id: {e.provider_event_id}")
-        
-        # If no events found, return empty array
-        if len(events) == 0:
-            print("No events found for connected accounts")
-            return jsonify({
-                'events': [],
-                'count': 0,
-                'status': 'success'
-            })
+            criteria.append(Event.provider == provider)
+        
+        # Deduplicate in SQL: keep the oldest row per (title, start minute, end minute,
+        # provider, provider identifier) so the same meeting synced twice shows once, while
+        # Google and Microsoft copies of a meeting both remain. ROW_NUMBER works on both
+        # SQLite and Postgres. Plain column rows (no ORM objects) are streamed in batches
+        # (server-side cursor on Postgres) and serialized as they arrive.
+        rows = db.session.execute(
+            _dedupe_events_select(*criteria).execution_options(yield_per=500, autoflush=False)
+        )
+        events_data = [Event.serialize(row) for row in rows]
+        logger.debug("Found %d events from connected accounts (after filtering)", len(events_data))
         
-        # Group events by provider for debugging
-        events_by_provider = {}
-        for event in events:
-            provider = event.provider or 'unknown'
-            if provider not in events_by_provider:
-                events_by_provider[provider] = []
-            events_by_provider[provider].append(event)
-        
-        print(f"Events by provider:")
-        for provider, provider_events in events_by_provider.items():
-            print(f"  {provider}: {len(provider_events)} events")
-            for event in provider_events:
-                print(f"    - {event.title} (organizer: {event.organizer}) at {event.start_time}")
-        
-        # Deduplicate events based on title, start time, end time, AND provider
-        # This prevents the same meeting from appearing twice when synced from different providers
-        # BUT allows different providers to have separate meetings with the same title/time
-        unique_events = []
-        seen_events = set()
-        
-        # Sort events by creation time to prioritize older events
-        events.sort(key=lambda x: x.created_at)
-        
-        for event in events:
-            # Create a unique key based on title, start time, end time, AND provider
-            # This ensures Google and Microsoft events with same title/time are both shown
-            # Normalize the title to handle case differences and extra spaces
-            normalized_title = event.title.lower().strip()
-            
-            # Create a more flexible key that allows for small time differences
-            # (in case of timezone conversion issues)
-            start_time_str = event.start_time.strftime('%Y-%m-%d %H:%M')
-            end_time_str = event.end_time.strftime('%Y-%m-%d %H:%M')
-            
-            # Include provider in the key to allow same title/time from different providers
-            provider_event_identifier = event.provider_event_id or event.organizer or f"event-{event.id}"
-            event_key = (normalized_title, start_time_str, end_time_str, event.provider, provider_event_identifier)
-            
-            if event_key not in seen_events:
-                seen_events.add(event_key)
-                unique_events.append(event)
-                print(f"Added unique event: {event.title} ({event.provider}) at {event.start_time}")
-            else:
-                print(f"Skipped duplicate event: {event.title} ({event.provider}) at {event.start_time}")
-                # Log the duplicate for debugging
-                existing_event = next(e for e in unique_events if (
-                    e.title.lower().strip() == normalized_title and
-                    e.start_time.strftime('%Y-%m-%d %H:%M') == start_time_str and
-                    e.end_time.strftime('%Y-%m-%d %H:%M') == end_time_str and
-                    e.provider == event.provider
-                ))
-                print(f"  - Conflicts with: {existing_event.title} ({existing_event.provider}) at {existing_event.start_time}")
-        
-        print(f"After deduplication: {len(unique_events)} unique events")
-        
-        # Convert to dictionary format
-        events_data = [event.to_dict() for event in unique_events]
-        
-        print(f"Returning {len(events_data)} events")
+        # Opt-in diagnostics (debug app + ?debug=1): explain why a user's events didn't match
+        if not events_data and current_app.debug and request.args.get('debug'):
+            _log_unmatched_events(user_id)
         
-        return jsonify({
+        response = jsonify({
             'events': events_data,
             'count': len(events_data),
             'status': 'success'
         })
+        response.set_etag(etag)
+        # Let the browser keep the body but revalidate with If-None-Match on every poll
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
         
     except Exception as e:
-        print(f"Error getting events: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error getting events: %s", e)
         return jsonify({'error': str(e)}), 500
 
+
+def _log_unmatched_events(user_id):
+    """Debug helper: log which of the user's events fail the connection-based match rules"""
+    # Only this diagnostic needs the connection list, so get_events doesn't load it per request
+    connections = CalendarConnection.query.autoflush(False).filter_by(
+        user_id=user_id,
+        is_active=True,
+        is_connected=True
+    ).all()
+    logger.debug("Found %d active connections for user %s", len(connections), user_id)
+    total = db.session.query(func.count(Event.id)).filter(Event.user_id == user_id).scalar()
+    logger.debug("Total events for user %s (before date/provider filtering): %s", user_id, total)
+    if not total:
+        return
+    
+    connected_emails = [conn.provider_account_email for conn in connections]
+    connected_providers = {conn.provider for conn in connections}
+    logger.debug("Events exist for user but didn't match filter conditions; checking why")
+    for e in Event.query.autoflush(False).filter(Event.user_id == user_id).yield_per(500):
+        matched = (
+            e.provider in connected_providers
+            or (e.organizer and e.organizer in connected_emails)
+            or (e.provider_event_id and any(e.provider_event_id.startswith(f"{email}:") for email in connected_emails))
+        )
+        if not matched:
+            logger.debug(
+                "Event '%s' didn't match: provider=%s (expected %s), organizer=%s (expected one of %s), provider_event_id=%s",
+                e.title, e.provider, sorted(connected_providers), e.organizer, connected_emails, e.provider_event_id
+            )
+
 @calendar_bp.route('/events/<int:event_id>', methods=['GET'])
 def get_event(event_id):
     """Get a specific event from any user"""
     try:
-        event = Event.query.filter_by(id=event_id).first()
+        event = Event.query.autoflush(False).filter_by(id=event_id).first()
         
         if not event:
             return jsonify({'error': 'Event not found'}), 404
         
         return jsonify(event.to_dict()), 200
     except Exception as e:
-        print(f"Error getting event {event_id}: {str(e)}")
+        logger.exception("Error getting event %s: %s", event_id, e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/sync/google', methods=['POST'])
+@respond_async_when_preferred
 def sync_google_events():
     """Sync events from Google Calendar for all Google-connected accounts (supports multiple accounts)"""
     try:
-        from models.calendar_connection_model import CalendarConnection
-        from models.user_model import User
-        
         # Get all active Google calendar connections
         google_connections = CalendarConnection.query.filter_by(
             provider='google',
@@ -658,17 +638,20 @@ def sync_google_events():
             
             # Use legacy sync for backward compatibility
             total_synced = 0
-            google_service = GoogleCalendarService()
+            google_service = shared_service(GoogleCalendarService)
             
-            for user in google_users:
-                try:
-                    print(f"Syncing Google calendar for user: {user.email} (legacy)")
-                    synced_count = google_service.sync_events(user, days_back=30, days_forward=30)
-                    total_synced += synced_count
-                    print(f"Synced {synced_count} events for {user.email}")
-                except Exception as e:
-                    print(f"Error syncing Google calendar for {user.email}: {e}")
+            def sync_user(user):
+                logger.debug("Syncing Google calendar for user: %s (legacy)", user.email)
+                return google_service.sync_events(user, days_back=30, days_forward=30)
+            
+            users_by_id = {user.id: user for user in google_users}
+            for user_id, synced_count, error in sync_users_concurrently(users_by_id, sync_user):
+                email = users_by_id[user_id].email
+                if error is not None:
+                    logger.warning("Error syncing Google calendar for %s: %s", email, error)
                     continue
+                total_synced += synced_count
+                logger.info("Synced %d events for %s", synced_count, email)
             
             return jsonify({
                 'message': f'Google Calendar sync completed for {len(google_users)} users (legacy)',
@@ -680,45 +663,47 @@ def sync_google_events():
         # Sync all Google connections
         total_synced = 0
         accounts_synced = 0
-        google_service = GoogleCalendarService()
+        google_service = shared_service(GoogleCalendarService)
         sync_results = []
         all_user_ids = set()  # Track all user IDs for conflict detection
         
-        for connection in google_connections:
-            try:
-                print(f"Syncing Google calendar for account: {connection.provider_account_email}")
-                synced_count = google_service.sync_events_for_connection(connection, days_back=30, days_forward=30)
-                total_synced += synced_count
-                accounts_synced += 1
-                all_user_ids.add(connection.user_id)  # Add user ID for conflict detection
-                sync_results.append({
-                    'account_email': connection.provider_account_email,
-                    'account_name': connection.provider_account_name,
-                    'synced_count': synced_count
-                })
-                print(f"Synced {synced_count} events for {connection.provider_account_email}")
-            except Exception as e:
-                print(f"Error syncing Google calendar for {connection.provider_account_email}: {e}")
+        # Provider calls are I/O-bound: sync the connections concurrently
+        connections_by_id = {connection.id: connection for connection in google_connections}
+        results = sync_connections_concurrently(
+            connections_by_id,
+            lambda connection: google_service.sync_events_for_connection(connection, days_back=30, days_forward=30)
+        )
+        for connection_id, synced_count, error in results:
+            connection = connections_by_id[connection_id]
+            if error is not None:
+                logger.warning("Error syncing Google calendar for %s: %s", connection.provider_account_email, error)
                 sync_results.append({
                     'account_email': connection.provider_account_email,
                     'account_name': connection.provider_account_name,
-                    'error': str(e)
+                    'error': str(error)
                 })
                 continue
+            total_synced += synced_count
+            accounts_synced += 1
+            all_user_ids.add(connection.user_id)  # Add user ID for conflict detection
+            sync_results.append({
+                'account_email': connection.provider_account_email,
+                'account_name': connection.provider_account_name,
+                'synced_count': synced_count
+            })
+            logger.info("Synced %d events for %s", synced_count, connection.provider_account_email)
         
         # Automatically detect conflicts after sync for all users
         conflicts_detected = 0
         if all_user_ids:
             try:
-                from services.conflict_service import ConflictDetectionService
-                conflict_service = ConflictDetectionService()
-                for user_id in all_user_ids:
-                    print(f"Detecting conflicts for user {user_id} after sync...")
-                    user_conflicts = conflict_service.detect_conflicts(user_id)
+                logger.debug("Detecting conflicts for users %s after sync", sorted(all_user_ids))
+                conflicts_by_user = ConflictDetectionService().detect_conflicts_for_users(all_user_ids)
+                for user_id, user_conflicts in conflicts_by_user.items():
                     conflicts_detected += len(user_conflicts)
-                    print(f"Detected {len(user_conflicts)} conflicts for user {user_id}")
+                    logger.info("Detected %d conflicts for user %s", len(user_conflicts), user_id)
             except Exception as e:
-                print(f"Error detecting conflicts after sync: {e}")
+                logger.exception("Error detecting conflicts after sync: %s", e)
         
         return jsonify({
             'message': f'Google Calendar sync completed for {accounts_synced} account(s)',
@@ -730,18 +715,14 @@ def sync_google_events():
         })
         
     except Exception as e:
-        print(f"Google sync error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Google sync error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/sync/microsoft', methods=['POST'])
+@respond_async_when_preferred
 def sync_microsoft_events():
     """Sync events from Microsoft Calendar for all Microsoft-connected accounts (supports multiple accounts)"""
     try:
-        from models.calendar_connection_model import CalendarConnection
-        from models.user_model import User
-        
         # Get all active Microsoft calendar connections
         microsoft_connections = CalendarConnection.query.filter_by(
             provider='microsoft',
@@ -762,17 +743,20 @@ def sync_microsoft_events():
             
             # Use legacy sync for backward compatibility
             total_synced = 0
-            microsoft_service = MicrosoftCalendarService()
+            microsoft_service = shared_service(MicrosoftCalendarService)
             
-            for user in microsoft_users:
-                try:
-                    print(f"Syncing Microsoft calendar for user: {user.email} (legacy)")
-                    synced_count = microsoft_service.sync_events(user, days_back=30, days_forward=30)
-                    total_synced += synced_count
-                    print(f"Synced {synced_count} events for {user.email}")
-                except Exception as e:
-                    print(f"Error syncing Microsoft calendar for {user.email}: {e}")
+            def sync_user(user):
+                logger.debug("Syncing Microsoft calendar for user: %s (legacy)", user.email)
+                return microsoft_service.sync_events(user, days_back=30, days_forward=30)
+            
+            users_by_id = {user.id: user for user in microsoft_users}
+            for user_id, synced_count, error in sync_users_concurrently(users_by_id, sync_user):
+                email = users_by_id[user_id].email
+                if error is not None:
+                    logger.warning("Error syncing Microsoft calendar for %s: %s", email, error)
                     continue
+                total_synced += synced_count
+                logger.info("Synced %d events for %s", synced_count, email)
             
             return jsonify({
                 'message': f'Microsoft Calendar sync completed for {len(microsoft_users)} users (legacy)',
@@ -785,54 +769,47 @@ def sync_microsoft_events():
         total_synced = 0
         accounts_synced = 0
         all_user_ids = set()
-        microsoft_service = MicrosoftCalendarService()
+        microsoft_service = shared_service(MicrosoftCalendarService)
         sync_results = []
         
-        for connection in microsoft_connections:
-            try:
-                print(f"Syncing Microsoft calendar for account: {connection.provider_account_email}")
-                user = User.query.get(connection.user_id)
-                if not user:
-                    print(f"User {connection.user_id} not found for connection {connection.id}")
-                    continue
-                
-                all_user_ids.add(user.id)
-                
-                # Use connection-based sync (same as Google)
-                synced_count = microsoft_service.sync_events_for_connection(connection, days_back=30, days_forward=30)
-                total_synced += synced_count
-                accounts_synced += 1
-                
-                print(f"Synced {synced_count} events for {connection.provider_account_email}")
-                sync_results.append({
-                    'account_email': connection.provider_account_email,
-                    'account_name': connection.provider_account_name,
-                    'synced_count': synced_count
-                })
-            except Exception as e:
-                print(f"Error syncing Microsoft calendar for {connection.provider_account_email}: {e}")
-                import traceback
-                traceback.print_exc()
+        # Provider calls are I/O-bound: sync the connections concurrently
+        connections_by_id = {connection.id: connection for connection in microsoft_connections}
+        results = sync_connections_concurrently(
+            connections_by_id,
+            # Use connection-based sync (same as Google)
+            lambda connection: microsoft_service.sync_events_for_connection(connection, days_back=30, days_forward=30)
+        )
+        for connection_id, synced_count, error in results:
+            connection = connections_by_id[connection_id]
+            if error is not None:
+                logger.warning("Error syncing Microsoft calendar for %s: %s", connection.provider_account_email, error)
                 sync_results.append({
                     'account_email': connection.provider_account_email,
                     'account_name': connection.provider_account_name,
-                    'error': str(e)
+                    'error': str(error)
                 })
                 continue
+            total_synced += synced_count
+            accounts_synced += 1
+            all_user_ids.add(connection.user_id)
+            logger.info("Synced %d events for %s", synced_count, connection.provider_account_email)
+            sync_results.append({
+                'account_email': connection.provider_account_email,
+                'account_name': connection.provider_account_name,
+                'synced_count': synced_count
+            })
         
         # Automatically detect conflicts after sync for all users
         conflicts_detected = 0
         if all_user_ids:
             try:
-                from services.conflict_service import ConflictDetectionService
-                conflict_service = ConflictDetectionService()
-                for user_id in all_user_ids:
-                    print(f"Detecting conflicts for user {user_id} after sync...")
-                    user_conflicts = conflict_service.detect_conflicts(user_id)
+                logger.debug("Detecting conflicts for users %s after sync", sorted(all_user_ids))
+                conflicts_by_user = ConflictDetectionService().detect_conflicts_for_users(all_user_ids)
+                for user_id, user_conflicts in conflicts_by_user.items():
                     conflicts_detected += len(user_conflicts)
-                    print(f"Detected {len(user_conflicts)} conflicts for user {user_id}")
+                    logger.info("Detected %d conflicts for user %s", len(user_conflicts), user_id)
             except Exception as e:
-                print(f"Error detecting conflicts after sync: {e}")
+                logger.exception("Error detecting conflicts after sync: %s", e)
         
         return jsonify({
             'message': f'Microsoft Calendar sync completed for {accounts_synced} account(s)',
@@ -844,53 +821,70 @@ def sync_microsoft_events():
         })
         
     except Exception as e:
-        print(f"Microsoft sync error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Microsoft sync error: %s", e)
         return jsonify({'error': str(e)}), 500
 
+def _connected_accounts():
+    """
+    Every syncable account as (connection_id, user_id, provider, email) rows, memoized for the request.
+
+    Active CalendarConnections come first; users linked through the legacy User flags
+    follow with provider 'google_legacy' / 'microsoft_legacy' and no connection_id.
+    One UNION ALL query replaces the separate connection and User scans.
+    """
+    if 'connected_accounts' not in g:
+        connections = select(
+            CalendarConnection.id.label('connection_id'),
+            CalendarConnection.user_id.label('user_id'),
+            CalendarConnection.provider.label('provider'),
+            CalendarConnection.provider_account_email.label('email')
+        ).where(CalendarConnection.is_active.is_(True), CalendarConnection.is_connected.is_(True))
+        legacy = [
+            select(cast(null(), Integer), User.id, literal(provider), User.email).where(flag.is_(True))
+            for provider, flag in (
+                ('google_legacy', User.google_calendar_connected),
+                ('microsoft_legacy', User.microsoft_calendar_connected)
+            )
+        ]
+        g.connected_accounts = db.session.execute(union_all(connections, *legacy)).all()
+    return g.connected_accounts
+
+
+@calendar_bp.record_once
+def _resolve_legacy_providers(state):
+    """Fix the legacy account providers the sync fallbacks use from MICROSOFT_ENABLED at registration"""
+    providers = {'google_legacy'}
+    if state.app.config.get('MICROSOFT_ENABLED', False):
+        providers.add('microsoft_legacy')
+    state.app.config['_LEGACY_SYNC_PROVIDERS'] = frozenset(providers)
+
+
+def _legacy_user_ids(accounts):
+    """Ids of users synced through the legacy User flags (Microsoft only when enabled)"""
+    providers = current_app.config['_LEGACY_SYNC_PROVIDERS']
+    return list(dict.fromkeys(account.user_id for account in accounts if account.provider in providers))
+
+
 @calendar_bp.route('/sync/all', methods=['POST'])
+@respond_async_when_preferred
 def sync_all_events():
     """Sync events from all connected calendars for all users (supports multiple Google accounts)"""
-    from flask import current_app
-    from flask_login import current_user
-    from models.calendar_connection_model import CalendarConnection
-    from models.user_model import User
-    
     microsoft_enabled = current_app.config.get('MICROSOFT_ENABLED', False)
     try:
-        print("Starting sync all for all connected accounts")
+        logger.info("Starting sync all for all connected accounts")
         
-        # Get all active calendar connections
-        google_connections = CalendarConnection.query.filter_by(
-            provider='google',
-            is_active=True,
-            is_connected=True
-        ).all()
-        
-        # Always get Microsoft connections (don't check flag)
-        microsoft_connections = CalendarConnection.query.filter_by(
-            provider='microsoft',
-            is_active=True,
-            is_connected=True
-        ).all()
+        # Always include Microsoft connections (don't check flag)
+        accounts = _connected_accounts()
+        connection_accounts = {
+            account.connection_id: account for account in accounts
+            if account.connection_id is not None and account.provider in SYNC_SERVICES
+        }
+        provider_counts = Counter(account.provider for account in connection_accounts.values())
         
         # Fallback to legacy User model if no connections found
-        use_legacy = len(google_connections) == 0 and len(microsoft_connections) == 0
-        
-        if use_legacy:
-            # Legacy sync using User model
-            if microsoft_enabled:
-                all_users = User.query.filter(
-                    (User.google_calendar_connected == True) | 
-                    (User.microsoft_calendar_connected == True)
-                ).all()
-            else:
-                all_users = User.query.filter(
-                    User.google_calendar_connected == True
-                ).all()
-            
-            if not all_users:
+        if not connection_accounts:
+            legacy_user_ids = _legacy_user_ids(accounts)
+            if not legacy_user_ids:
                 return jsonify({
                     'message': 'No users with connected calendars found',
                     'total_synced': 0,
@@ -901,27 +895,35 @@ def sync_all_events():
             total_synced = 0
             google_synced = 0
             microsoft_synced = 0
-            google_service = GoogleCalendarService()
-            microsoft_service = MicrosoftCalendarService()
+            google_service = shared_service(GoogleCalendarService)
+            microsoft_service = shared_service(MicrosoftCalendarService)
             
-            for user in all_users:
-                print(f"Syncing calendars for user: {user.email} (legacy)")
+            def sync_user(user):
+                """(google_count, microsoft_count) for one user; a provider failure counts as 0"""
+                logger.debug("Syncing calendars for user: %s (legacy)", user.email)
+                google_count = microsoft_count = 0
                 
                 if user.google_calendar_connected:
                     try:
-                        synced_count = google_service.sync_events(user, days_back=30, days_forward=30)
-                        google_synced += synced_count
-                        total_synced += synced_count
+                        google_count = google_service.sync_events(user, days_back=30, days_forward=30)
                     except Exception as e:
-                        print(f"Error syncing Google calendar for {user.email}: {e}")
+                        logger.exception("Error syncing Google calendar for %s: %s", user.email, e)
                 
                 if microsoft_enabled and user.microsoft_calendar_connected:
                     try:
-                        synced_count = microsoft_service.sync_events(user, days_back=30, days_forward=30)
-                        microsoft_synced += synced_count
-                        total_synced += synced_count
+                        microsoft_count = microsoft_service.sync_events(user, days_back=30, days_forward=30)
                     except Exception as e:
-                        print(f"Error syncing Microsoft calendar for {user.email}: {e}")
+                        logger.exception("Error syncing Microsoft calendar for %s: %s", user.email, e)
+                return google_count, microsoft_count
+            
+            # Users are synced concurrently (provider calls are I/O-bound)
+            for user_id, counts, error in sync_users_concurrently(legacy_user_ids, sync_user):
+                if error is not None:
+                    logger.warning("Error syncing calendars for user %s: %s", user_id, error)
+                    continue
+                google_synced += counts[0]
+                microsoft_synced += counts[1]
+                total_synced += counts[0] + counts[1]
             
             return jsonify({
                 'message': f'Successfully synced {total_synced} total events from all calendars (legacy)',
@@ -930,136 +932,128 @@ def sync_all_events():
                     'google': google_synced,
                     'microsoft': microsoft_synced
                 },
-                'users_synced': len(all_users),
+                'users_synced': len(legacy_user_ids),
                 'conflicts_detected': 0
             })
         
-        # New multi-account sync
-        total_synced = 0
-        google_synced = 0
-        microsoft_synced = 0
-        google_service = GoogleCalendarService()
-        microsoft_service = MicrosoftCalendarService()
-        sync_results = []
-        all_user_ids = set()  # Track all user IDs for conflict detection
+        # New multi-account sync: one service per provider present, dispatched by connection.provider
+        services = {provider: shared_service(SYNC_SERVICES[provider]) for provider in provider_counts}
         
-        # Sync all Google accounts
-        for connection in google_connections:
-            try:
-                print(f"Syncing Google calendar for account: {connection.provider_account_email}")
-                synced_count = google_service.sync_events_for_connection(connection, days_back=30, days_forward=30)
-                google_synced += synced_count
-                total_synced += synced_count
-                all_user_ids.add(connection.user_id)  # Add user ID for conflict detection
-                sync_results.append({
-                    'provider': 'google',
-                    'account_email': connection.provider_account_email,
-                    'synced_count': synced_count
-                })
-            except Exception as e:
-                print(f"Error syncing Google calendar for {connection.provider_account_email}: {e}")
-                sync_results.append({
-                    'provider': 'google',
-                    'account_email': connection.provider_account_email,
-                    'error': str(e)
-                })
+        # Sync all Google and Microsoft accounts concurrently (provider calls are I/O-bound)
+        def sync_connection(connection):
+            # Connection-based sync for both providers - uses the token from CalendarConnection
+            return services[connection.provider].sync_events_for_connection(connection, days_back=30, days_forward=30)
         
-        # Sync all Microsoft accounts
-        for connection in microsoft_connections:
-            try:
-                print(f"Syncing Microsoft calendar for account: {connection.provider_account_email}")
-                # Use connection-based sync (same as Google) - this uses the token from CalendarConnection
-                synced_count = microsoft_service.sync_events_for_connection(connection, days_back=30, days_forward=30)
-                microsoft_synced += synced_count
-                total_synced += synced_count
-                all_user_ids.add(connection.user_id)  # Add user ID for conflict detection
+        def sync_all_results(results):
+            """Yield ('account', result) per (connection_id, synced_count, error) in results, then ('summary', response body)"""
+            synced_by_provider = defaultdict(int)
+            sync_results = []
+            all_user_ids = set()  # Track all user IDs for conflict detection
+            
+            for connection_id, synced_count, error in results:
+                account = connection_accounts[connection_id]
+                provider_label = PROVIDER_LABELS[account.provider]
+                if error is not None:
+                    logger.warning("Error syncing %s calendar for %s: %s", provider_label, account.email, error)
+                    sync_results.append({
+                        'provider': account.provider,
+                        'account_email': account.email,
+                        'error': str(error)
+                    })
+                    yield 'account', sync_results[-1]
+                    continue
+                synced_by_provider[account.provider] += synced_count
+                all_user_ids.add(account.user_id)  # Add user ID for conflict detection
                 sync_results.append({
-                    'provider': 'microsoft',
-                    'account_email': connection.provider_account_email,
+                    'provider': account.provider,
+                    'account_email': account.email,
                     'synced_count': synced_count
                 })
-                print(f"Synced {synced_count} events for Microsoft account: {connection.provider_account_email}")
-            except Exception as e:
-                print(f"Error syncing Microsoft calendar for {connection.provider_account_email}: {e}")
-                import traceback
-                traceback.print_exc()
-                sync_results.append({
-                    'provider': 'microsoft',
-                    'account_email': connection.provider_account_email,
-                    'error': str(e)
-                })
-        
-        # Automatically detect conflicts after sync for all users
-        conflicts_detected = 0
-        if all_user_ids:
-            try:
-                from services.conflict_service import ConflictDetectionService
-                conflict_service = ConflictDetectionService()
-                for user_id in all_user_ids:
-                    print(f"Detecting conflicts for user {user_id} after sync...")
-                    user_conflicts = conflict_service.detect_conflicts(user_id)
-                    conflicts_detected += len(user_conflicts)
-                    print(f"Detected {len(user_conflicts)} conflicts for user {user_id}")
-            except Exception as e:
-                print(f"Error detecting conflicts after sync: {e}")
+                logger.info("Synced %d events for %s account: %s", synced_count, provider_label, account.email)
+                yield 'account', sync_results[-1]
+            
+            # Automatically detect conflicts after sync for all users
+            conflicts_detected = 0
+            if all_user_ids:
+                try:
+                    logger.debug("Detecting conflicts for users %s after sync", sorted(all_user_ids))
+                    conflicts_by_user = ConflictDetectionService().detect_conflicts_for_users(all_user_ids)
+                    for user_id, user_conflicts in conflicts_by_user.items():
+                        conflicts_detected += len(user_conflicts)
+                        logger.info("Detected %d conflicts for user %s", len(user_conflicts), user_id)
+                except Exception as e:
+                    logger.exception("Error detecting conflicts after sync: %s", e)
+            
+            total_synced = sum(synced_by_provider.values())
+            logger.info("Sync all completed: %d total events from %d Google account(s), %d conflicts detected", total_synced, provider_counts['google'], conflicts_detected)
+            
+            yield 'summary', {
+                'message': f'Successfully synced {total_synced} total events from all calendars',
+                'total_synced': total_synced,
+                'sync_results': {
+                    **{provider: synced_by_provider[provider] for provider in SYNC_SERVICES},
+                    **{f'{provider}_accounts': provider_counts[provider] for provider in SYNC_SERVICES}
+                },
+                'accounts_synced': len(connection_accounts),
+                'detailed_results': sync_results,
+                'conflicts_detected': conflicts_detected
+            }
         
-        print(f"Sync all completed: {total_synced} total events from {len(google_connections)} Google account(s), {conflicts_detected} conflicts detected")
+        # NDJSON clients get one line per account as it finishes, then the summary line
+        if request.accept_mimetypes.best_match(['application/json', 'application/x-ndjson']) == 'application/x-ndjson':
+            def generate():
+                try:
+                    for kind, body in sync_all_results(iter_connection_syncs(connection_accounts, sync_connection)):
+                        yield fast_json.dumps({'type': kind, **body}) + b'\n'
+                except Exception as e:
+                    logger.exception("Sync all error: %s", e)
+                    yield fast_json.dumps({'type': 'error', 'error': str(e)}) + b'\n'
+            
+            return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
         
-        return jsonify({
-            'message': f'Successfully synced {total_synced} total events from all calendars',
-            'total_synced': total_synced,
-            'sync_results': {
-                'google': google_synced,
-                'microsoft': microsoft_synced,
-                'google_accounts': len(google_connections),
-                'microsoft_accounts': len(microsoft_connections)
-            },
-            'accounts_synced': len(google_connections) + len(microsoft_connections),
-            'detailed_results': sync_results,
-            'conflicts_detected': conflicts_detected
-        })
+        summary = None
+        for kind, body in sync_all_results(sync_connections_concurrently(connection_accounts, sync_connection)):
+            if kind == 'summary':
+                summary = body
+        return jsonify(summary)
         
     except Exception as e:
-        print(f"Sync all error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Sync all error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/sync/bidirectional', methods=['POST'])
+@respond_async_when_preferred
 def sync_bidirectional():
     """Sync events bidirectionally between:
     - Google and Microsoft calendars (if Microsoft is enabled)
     - Multiple Google accounts (Google ↔ Google)
     """
-    from flask import current_app
-    from models.calendar_connection_model import CalendarConnection
-    
     # Check if we have at least 2 Google accounts or Microsoft enabled
-    google_connections = CalendarConnection.query.filter_by(
-        provider='google',
-        is_active=True,
-        is_connected=True
-    ).all()
+    # (the loaded connections are handed to the service so it doesn't query them again)
+    google_connections = BidirectionalSyncService.active_connections('google')
+    google_accounts = len(google_connections)
     
     microsoft_enabled = current_app.config.get('MICROSOFT_ENABLED', False)
     
-    if len(google_connections) < 2 and not microsoft_enabled:
+    if google_accounts < 2 and not microsoft_enabled:
         return jsonify({
             'error': 'Bidirectional sync requires at least 2 Google accounts OR Microsoft to be enabled',
             'message': 'Please connect at least 2 Google accounts, or enable Microsoft Calendar integration.'
         }), 400
     
     try:
-        print("Starting bidirectional sync...")
+        logger.info("Starting bidirectional sync")
         
         # Bidirectional sync NEVER sends notifications (this is just mirroring existing events)
-        print(f"Bidirectional sync: NEVER sending notifications (this is just mirroring existing events)")
+        logger.debug("Bidirectional sync: NEVER sending notifications (this is just mirroring existing events)")
         
         bidirectional_service = BidirectionalSyncService()
         result = bidirectional_service.sync_bidirectional(
             days_back=30, 
             days_forward=30,
-            send_notifications=False  # Always false for bidirectional sync
+            send_notifications=False,  # Always false for bidirectional sync
+            google_connections=google_connections,
+            microsoft_connections=BidirectionalSyncService.active_connections('microsoft')
         )
         
         return jsonify({
@@ -1073,32 +1067,21 @@ def sync_bidirectional():
         })
         
     except Exception as e:
-        print(f"Bidirectional sync error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Bidirectional sync error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/sync/view-only', methods=['POST'])
+@respond_async_when_preferred
 def sync_view_only():
     """Sync events for view-only purposes (no creation in external calendars)"""
     try:
-        print("Starting view-only sync...")
+        logger.info("Starting view-only sync")
         
         # Get all users with connected calendars (only Google if Microsoft is disabled)
-        from flask import current_app
-        from models.user_model import User
         microsoft_enabled = current_app.config.get('MICROSOFT_ENABLED', False)
-        if microsoft_enabled:
-            all_users = User.query.filter(
-                (User.google_calendar_connected == True) | 
-                (User.microsoft_calendar_connected == True)
-            ).all()
-        else:
-            all_users = User.query.filter(
-                User.google_calendar_connected == True
-            ).all()
+        legacy_user_ids = _legacy_user_ids(_connected_accounts())
         
-        if not all_users:
+        if not legacy_user_ids:
             return jsonify({
                 'message': 'No users with connected calendars found',
                 'total_synced': 0,
@@ -1109,33 +1092,41 @@ def sync_view_only():
         google_synced = 0
         microsoft_synced = 0
         
-        google_service = GoogleCalendarService()
-        microsoft_service = MicrosoftCalendarService()
+        google_service = shared_service(GoogleCalendarService)
+        microsoft_service = shared_service(MicrosoftCalendarService)
         
-        for user in all_users:
-            print(f"View-only syncing calendars for user: {user.email}")
+        def sync_user(user):
+            """(google_count, microsoft_count) for one user; a provider failure counts as 0"""
+            logger.debug("View-only syncing calendars for user: %s", user.email)
+            google_count = microsoft_count = 0
             
             # Sync Google calendar if connected (read-only)
             if user.google_calendar_connected:
                 try:
-                    synced_count = google_service.sync_events(user, days_back=30, days_forward=30)
-                    google_synced += synced_count
-                    total_synced += synced_count
-                    print(f"View-only synced {synced_count} Google events for {user.email}")
+                    google_count = google_service.sync_events(user, days_back=30, days_forward=30)
+                    logger.debug("View-only synced %d Google events for %s", google_count, user.email)
                 except Exception as e:
-                    print(f"Error view-only syncing Google calendar for {user.email}: {e}")
+                    logger.exception("Error view-only syncing Google calendar for %s: %s", user.email, e)
             
             # Sync Microsoft calendar if connected and enabled (read-only)
             if microsoft_enabled and user.microsoft_calendar_connected:
                 try:
-                    synced_count = microsoft_service.sync_events(user, days_back=30, days_forward=30)
-                    microsoft_synced += synced_count
-                    total_synced += synced_count
-                    print(f"View-only synced {synced_count} Microsoft events for {user.email}")
+                    microsoft_count = microsoft_service.sync_events(user, days_back=30, days_forward=30)
+                    logger.debug("View-only synced %d Microsoft events for %s", microsoft_count, user.email)
                 except Exception as e:
-                    print(f"Error view-only syncing Microsoft calendar for {user.email}: {e}")
+                    logger.exception("Error view-only syncing Microsoft calendar for %s: %s", user.email, e)
+            return google_count, microsoft_count
+        
+        # Users are synced concurrently (provider calls are I/O-bound)
+        for user_id, counts, error in sync_users_concurrently(legacy_user_ids, sync_user):
+            if error is not None:
+                logger.warning("Error view-only syncing calendars for user %s: %s", user_id, error)
+                continue
+            google_synced += counts[0]
+            microsoft_synced += counts[1]
+            total_synced += counts[0] + counts[1]
         
-        print(f"View-only sync completed: {total_synced} total events fetched for display")
+        logger.info("View-only sync completed: %d total events fetched for display", total_synced)
         
         return jsonify({
             'message': f'Successfully fetched {total_synced} events for unified view (no external calendar creation)',
@@ -1144,14 +1135,12 @@ def sync_view_only():
                 'google': google_synced,
                 'microsoft': microsoft_synced
             },
-            'users_synced': len(all_users),
+            'users_synced': len(legacy_user_ids),
             'sync_type': 'view_only'
         })
         
     except Exception as e:
-        print(f"View-only sync error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("View-only sync error: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/conflicts', methods=['GET'])
@@ -1159,14 +1148,13 @@ def get_conflicts():
     """Get calendar conflicts for the current user"""
     try:
         # Try to get logged-in user first
-        from flask_login import current_user
         if current_user.is_authenticated:
             user = current_user
         else:
             # Fallback to test user for development
             user = get_test_user()
         
-        print(f"Detecting conflicts for user: {user.id} ({user.email})")
+        logger.debug("Detecting conflicts for user: %s (%s)", user.id, user.email)
         
         # Get query parameters
         start_date = request.args.get('start_date')
@@ -1180,16 +1168,14 @@ def get_conflicts():
             if end_date:
                 end_date = datetime.fromisoformat(end_date.replace('Z', '+00:00')).date()
             
-            conflicts = conflict_service.detect_conflicts(
+            conflicts = conflict_service.detect_conflicts_cached(
                 user.id, 
                 start_date=start_date, 
                 end_date=end_date
             )
-            print(f"Found {len(conflicts)} conflicts for user {user.id}")
+            logger.debug("Found %d conflicts for user %s", len(conflicts), user.id)
         except Exception as e:
-            print(f"Conflict detection error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Conflict detection error: %s", e)
             conflicts = []
         
         return jsonify({
@@ -1200,9 +1186,7 @@ def get_conflicts():
         })
         
     except Exception as e:
-        print(f"Error getting conflicts: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error getting conflicts: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/free-slots', methods=['GET'])
@@ -1210,14 +1194,13 @@ def get_free_slots():
     """Get free time slots for scheduling"""
     try:
         # Try to get logged-in user first
-        from flask_login import current_user
         if current_user.is_authenticated:
             user = current_user
         else:
             # Fallback to test user for development
             user = get_test_user()
         
-        print(f"Finding free slots for user: {user.id} ({user.email})")
+        logger.debug("Finding free slots for user: %s (%s)", user.id, user.email)
         
         # Get query parameters
         date_str = request.args.get('date')
@@ -1243,11 +1226,9 @@ def get_free_slots():
                 start_hour=start_hour,
                 end_hour=end_hour
             )
-            print(f"Found {len(free_slots)} free slots for user {user.id}")
+            logger.debug("Found %d free slots for user %s", len(free_slots), user.id)
         except Exception as e:
-            print(f"Free slots detection error: {str(e)}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Free slots detection error: %s", e)
             free_slots = []
         
         return jsonify({
@@ -1259,9 +1240,7 @@ def get_free_slots():
         })
         
     except Exception as e:
-        print(f"Error getting free slots: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error getting free slots: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/suggest-meeting', methods=['POST'])
@@ -1293,7 +1272,7 @@ def suggest_meeting_time():
                 preferred_hours=preferred_hours
             )
         except Exception as e:
-            print(f"Meeting suggestion error: {str(e)}")
+            logger.exception("Meeting suggestion error: %s", e)
             suggestions = []
         
         return jsonify({
@@ -1302,7 +1281,7 @@ def suggest_meeting_time():
         })
         
     except Exception as e:
-        print(f"Error suggesting meeting times: {str(e)}")
+        logger.exception("Error suggesting meeting times: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/summary', methods=['GET'])
@@ -1310,14 +1289,13 @@ def get_calendar_summary():
     """Get calendar summary and statistics"""
     try:
         # Try to get logged-in user first
-        from flask_login import current_user
         if current_user.is_authenticated:
             user = current_user
         else:
             # Fallback to test user for development
             user = get_test_user()
         
-        print(f"Generating summary for user: {user.id} ({user.email})")
+        logger.debug("Generating summary for user: %s (%s)", user.id, user.email)
         
         # Get query parameters
         start_date = request.args.get('start_date')
@@ -1335,26 +1313,30 @@ def get_calendar_summary():
                 start_date=start_date,
                 end_date=end_date
             )
-            print(f"Summary generated successfully: {summary.get('total_events', 0)} events")
+            logger.debug("Summary generated successfully: %s events", summary.get('total_events', 0))
         except Exception as e:
-            print(f"Summary generation error: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            # Return basic summary if service fails
-            events = Event.query.filter_by(user_id=user.id).all()
+            logger.exception("Summary generation error: %s", e)
+            # Return basic summary if service fails: per-provider counts from one aggregate query
+            # (CASE rather than FILTER so it also runs on SQLite)
+            db.session.rollback()
+            counts = db.session.execute(
+                select(
+                    func.count(Event.id).label('total'),
+                    func.coalesce(func.sum(case((Event.provider == 'google', 1), else_=0)), 0).label('google'),
+                    func.coalesce(func.sum(case((Event.provider == 'microsoft', 1), else_=0)), 0).label('microsoft')
+                ).where(Event.user_id == user.id)
+            ).one()
             summary = {
-                'total_events': len(events),
-                'google_events': len([e for e in events if e.provider == 'google']),
-                'microsoft_events': len([e for e in events if e.provider == 'microsoft']),
+                'total_events': counts.total,
+                'google_events': counts.google,
+                'microsoft_events': counts.microsoft,
                 'conflicts': 0
             }
         
         return jsonify(summary)
         
     except Exception as e:
-        print(f"Error getting summary: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error getting summary: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/test', methods=['GET'])
@@ -1394,9 +1376,7 @@ def create_sample_events_endpoint():
         })
         
     except Exception as e:
-        print(f"Error creating sample events: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error creating sample events: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/clear-events', methods=['DELETE'])
@@ -1405,18 +1385,21 @@ def clear_events():
     try:
         user = get_test_user()
         
-        # Clear all events for the user
-        Event.query.filter_by(user_id=user.id).delete()
+        # Clear all events for the user (one DELETE, nothing loaded or synchronized in the session)
+        result = db.session.execute(
+            delete(Event).where(Event.user_id == user.id),
+            execution_options={'synchronize_session': False}
+        )
         db.session.commit()
         
         return jsonify({
             'message': 'All events cleared successfully',
-            'cleared_count': 0
+            'cleared_count': result.rowcount
         })
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error clearing events: {e}")
+        logger.exception("Error clearing events: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/clear-conflicts', methods=['POST'])
@@ -1425,12 +1408,11 @@ def clear_conflicts():
     try:
         user = get_test_user()
         
-        # Clear all conflict flags
-        events = Event.query.filter_by(user_id=user.id).all()
-        for event in events:
-            event.has_conflict = False
-            event.conflict_with = None
-        
+        # Clear all conflict flags with one UPDATE
+        result = db.session.execute(
+            update(Event).where(Event.user_id == user.id).values(has_conflict=False, conflict_with=None),
+            execution_options={'synchronize_session': False}
+        )
         db.session.commit()
         
         # Re-run conflict detection
@@ -1440,74 +1422,133 @@ def clear_conflicts():
         return jsonify({
             'message': 'Conflicts cleared and re-detected',
             'conflicts_found': len(conflicts),
-            'total_events': len(events)
+            'total_events': result.rowcount
         })
         
     except Exception as e:
         db.session.rollback()
-        print(f"Error clearing conflicts: {e}")
+        logger.exception("Error clearing conflicts: %s", e)
         return jsonify({'error': str(e)}), 500
 
+def _duplicate_group_columns():
+    """(title, start minute, end minute) grouping expressions check_duplicates groups events by"""
+    if db.session.get_bind().dialect.name == 'postgresql':
+        def minute(column):
+            return func.date_trunc('minute', column)
+    else:
+        def minute(column):
+            return func.strftime('%Y-%m-%d %H:%M', column)
+    return (
+        # Inline '' (not a bind parameter) so PostgreSQL matches the ix_events_dedup expression
+        func.coalesce(func.lower(func.trim(Event.title)), literal_column("''")).label('title_key'),
+        minute(Event.start_time).label('start_key'),
+        minute(Event.end_time).label('end_key')
+    )
+
+
+CHECK_DUPLICATES_FETCH_SIZE = 500
+
+
+def _duplicate_group_json(event_list):
+    """One entry of the check-duplicates 'duplicates' array, as JSON bytes"""
+    return fast_json.dumps({
+        'title': event_list[0].title,
+        'start_time': event_list[0].start_time.isoformat(),
+        'end_time': event_list[0].end_time.isoformat(),
+        'events': [
+            {
+                'id': event.id,
+                'provider': event.provider,
+                'created_at': event.created_at.isoformat(),
+                'title': event.title
+            }
+            for event in event_list
+        ]
+    })
+
+
 @calendar_bp.route('/check-duplicates', methods=['GET'])
 def check_duplicates():
     """Check for duplicate events and provide detailed information"""
     try:
         user = get_test_user()
         
-        # Get all events for the user
-        events = Event.query.filter_by(user_id=user.id).order_by(Event.start_time).all()
-        
-        # Group events by their unique key
-        event_groups = {}
-        for event in events:
-            normalized_title = event.title.lower().strip()
-            start_time_str = event.start_time.strftime('%Y-%m-%d %H:%M')
-            end_time_str = event.end_time.strftime('%Y-%m-%d %H:%M')
-            
-            event_key = (normalized_title, start_time_str, end_time_str)
-            
-            if event_key not in event_groups:
-                event_groups[event_key] = []
-            event_groups[event_key].append(event)
-        
-        # Find duplicates
-        duplicates = []
-        for event_key, event_list in event_groups.items():
-            if len(event_list) > 1:
-                duplicates.append({
-                    'title': event_list[0].title,
-                    'start_time': event_list[0].start_time.isoformat(),
-                    'end_time': event_list[0].end_time.isoformat(),
-                    'events': [
-                        {
-                            'id': event.id,
-                            'provider': event.provider,
-                            'created_at': event.created_at.isoformat(),
-                            'title': event.title
-                        }
-                        for event in event_list
-                    ]
-                })
+        # Group in the database: only the events of duplicate groups come back to Python
+        key_columns = _duplicate_group_columns()
+        groups = (
+            select(*key_columns, func.count().label('n'))
+            .where(Event.user_id == user.id)
+            .group_by(*key_columns)
+            .subquery()
+        )
+        unique_events, total_events, duplicates_found = db.session.execute(
+            select(
+                func.count(),
+                func.coalesce(func.sum(groups.c.n), 0),
+                func.coalesce(func.sum(case((groups.c.n > 1, 1), else_=0)), 0)
+            ).select_from(groups)
+        ).one()
+        
+        duplicate_keys = (
+            select(groups.c.title_key, groups.c.start_key, groups.c.end_key)
+            .where(groups.c.n > 1)
+            .subquery()
+        )
+        # Ordered by group key so each group's events arrive together and can be written out as they complete
+        rows = db.session.execute(
+            select(
+                *key_columns,
+                Event.id, Event.provider, Event.created_at, Event.title, Event.start_time, Event.end_time
+            )
+            .join(duplicate_keys, (key_columns[0] == duplicate_keys.c.title_key)
+                  & (key_columns[1] == duplicate_keys.c.start_key)
+                  & (key_columns[2] == duplicate_keys.c.end_key))
+            .where(Event.user_id == user.id)
+            .order_by(key_columns[1], key_columns[2], key_columns[0], Event.start_time, Event.id)
+            .execution_options(yield_per=CHECK_DUPLICATES_FETCH_SIZE)
+        )
         
-        return jsonify({
-            'total_events': len(events),
-            'unique_events': len(event_groups),
-            'duplicates_found': len(duplicates),
-            'duplicates': duplicates
+        header = fast_json.dumps({
+            'total_events': int(total_events),
+            'unique_events': unique_events,
+            'duplicates_found': int(duplicates_found)
         })
         
+        def generate():
+            # Same object as the JSON response, with the duplicates array streamed one group at a time
+            yield header[:-1] + b',"duplicates":['
+            separator = b''
+            group_key, event_list = None, []
+            try:
+                for row in rows:
+                    row_key = (row.title_key, row.start_key, row.end_key)
+                    if event_list and row_key != group_key:
+                        yield separator + _duplicate_group_json(event_list)
+                        separator, event_list = b',', []
+                    group_key = row_key
+                    event_list.append(row)
+                if event_list:
+                    yield separator + _duplicate_group_json(event_list)
+            except Exception as e:
+                # The 200 status is already sent: close the document with an error field instead
+                logger.exception("Error streaming duplicates: %s", e)
+                yield b'],"error":' + fast_json.dumps(str(e)) + b'}\n'
+                return
+            yield b']}\n'
+        
+        return Response(stream_with_context(generate()), mimetype='application/json')
+        
     except Exception as e:
-        print(f"Error checking duplicates: {e}")
+        logger.exception("Error checking duplicates: %s", e)
         return jsonify({'error': str(e)}), 500
 
 @calendar_bp.route('/create-event', methods=['POST'])
 def create_new_event():
     """Create a NEW event and send notifications to participants"""
-    from flask import current_app
     microsoft_enabled = current_app.config.get('MICROSOFT_ENABLED', False)
     
     try:
-        print("Creating NEW event with notifications...")
+        logger.debug("Creating new event with notifications")
         
         data = request.get_json() or {}
         
@@ -1541,10 +1582,10 @@ def create_new_event():
         if not microsoft_enabled:
             if target_calendar in ['microsoft', 'both']:
                 target_calendar = 'google'
-                print("Microsoft is disabled. Creating event in Google Calendar only.")
+                logger.info("Microsoft is disabled. Creating event in Google Calendar only.")
         
         # Create the event
-        event_creation_service = EventCreationService()
+        event_creation_service = shared_service(EventCreationService)
         result = event_creation_service.create_new_event(event_data, target_calendar)
         
         return jsonify({
@@ -1556,7 +1597,5 @@ def create_new_event():
         })
         
     except Exception as e:
-        print(f"Event creation error: {str(e)}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Event creation error: %s", e)
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
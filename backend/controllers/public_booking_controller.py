@@ -1,3 +1,5 @@
+import traceback
+
 from flask import Blueprint, request, jsonify
 
 from services.public_booking_service import PublicBookingService
@@ -52,7 +54,6 @@ def create_public_booking():
     except Exception as e:
         msg = str(e)
         print(f"Booking error: {msg}")
-        import traceback
         traceback.print_exc()
         if "no longer available" in msg.lower():
             return jsonify({"status": "error", "error": "slot_no_longer_available"}), 409
@@ -7,78 +7,294 @@ changes (new columns/indexes), we apply safe ALTER TABLE statements at startup.
 Important: Keep migrations additive + idempotent to avoid breaking existing installs.
 """
 
-from sqlalchemy import text
+from contextlib import nullcontext
 
+from sqlalchemy import bindparam, text, update
 
-def _column_exists(db, table_name: str, column_name: str) -> bool:
-    engine_name = db.engine.dialect.name
 
-    if engine_name == "sqlite":
-        rows = db.session.execute(text(f"PRAGMA table_info({table_name})")).fetchall()
-        return any(r[1] == column_name for r in rows)  # r[1] is column name
+MIGRATED_TABLES = ("users", "events", "calendar_connections")
 
-    # Postgres / others
-    rows = db.session.execute(
-        text(
+
+def _load_schema(conn, tables=MIGRATED_TABLES):
+    """
+    Existing (table, column) and (table, index) pairs for the given tables.
+
+    One introspection query on Postgres (columns and indexes together); SQLite answers
+    per table through PRAGMAs.
+    """
+    columns, indexes = set(), set()
+
+    if conn.dialect.name == "sqlite":
+        for table_name in tables:
+            rows = conn.execute(text(f"PRAGMA table_info({table_name})")).fetchall()
+            columns.update((table_name, r[1]) for r in rows)  # r[1] is column name
+            rows = conn.execute(text(f"PRAGMA index_list({table_name})")).fetchall()
+            indexes.update((table_name, r[1]) for r in rows)  # rows: (seq, name, unique, origin, partial)
+        return columns, indexes
+
+    if conn.dialect.name == "postgresql":
+        sql = """
+            SELECT 'column' AS kind, table_name AS table_name, column_name AS name
+            FROM information_schema.columns
+            WHERE table_name IN :tables
+            UNION ALL
+            SELECT 'index', tablename, indexname
+            FROM pg_indexes
+            WHERE tablename IN :tables
             """
-            SELECT 1
+    else:
+        sql = """
+            SELECT 'column' AS kind, table_name AS table_name, column_name AS name
             FROM information_schema.columns
-            WHERE table_name = :table AND column_name = :col
-            LIMIT 1
+            WHERE table_name IN :tables
             """
-        ),
-        {"table": table_name, "col": column_name},
+    rows = conn.execute(
+        text(sql).bindparams(bindparam("tables", expanding=True)), {"tables": list(tables)}
     ).fetchall()
-    return len(rows) > 0
+    for kind, table_name, name in rows:
+        (columns if kind == "column" else indexes).add((table_name, name))
+    return columns, indexes
+
+
+def _create_index(
+    conn, index_name: str, table_name: str, columns: str, unique: bool = False, where: str = None, include: str = None
+):
+    """
+    CREATE INDEX IF NOT EXISTS (supported by both SQLite and Postgres); `where` makes it partial.
+    `include` adds covering columns on Postgres (SQLite has no INCLUDE and ignores it).
+    """
+    unique_sql = "UNIQUE " if unique else ""
+    include_sql = f" INCLUDE ({include})" if include and conn.dialect.name == "postgresql" else ""
+    where_sql = f" WHERE {where}" if where else ""
+    conn.execute(
+        text(f"CREATE {unique_sql}INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns}){include_sql}{where_sql}")
+    )
+
+
+def _backfill_has_any_connection(conn):
+    """Set users.has_any_connection wherever User.has_any_connection_clause() holds."""
+    from models.user_model import User
 
+    conn.execute(update(User.__table__).where(User.has_any_connection_clause()).values(has_any_connection=True))
 
-def _index_exists(db, index_name: str) -> bool:
-    engine_name = db.engine.dialect.name
 
-    if engine_name == "sqlite":
-        rows = db.session.execute(text("PRAGMA index_list(users)")).fetchall()
-        # rows: (seq, name, unique, origin, partial)
-        return any(r[1] == index_name for r in rows)
+def _backfill_event_dedup_hash(conn, batch_size: int = 1000):
+    """Fill events.dedup_hash for rows written before the column (or by Core statements that skip the ORM hook)."""
+    from models.event_model import Event
 
-    if engine_name == "postgresql":
-        rows = db.session.execute(
+    # Usual case on startup: nothing to fill, answered from the (empty) partial index
+    if conn.execute(text("SELECT 1 FROM events WHERE dedup_hash IS NULL LIMIT 1")).first() is None:
+        return
+    while True:
+        rows = conn.execute(
             text(
                 """
-                SELECT 1
-                FROM pg_indexes
-                WHERE indexname = :idx
-                LIMIT 1
+                SELECT id, title, start_time, end_time, provider
+                FROM events
+                WHERE dedup_hash IS NULL
+                LIMIT :limit
                 """
             ),
-            {"idx": index_name},
+            {"limit": batch_size},
         ).fetchall()
-        return len(rows) > 0
+        if not rows:
+            return
+        conn.execute(
+            text("UPDATE events SET dedup_hash = :hash WHERE id = :id"),
+            [
+                {"id": r.id, "hash": Event.compute_dedup_hash(r.title, _as_datetime(r.start_time), _as_datetime(r.end_time), r.provider)}
+                for r in rows
+            ],
+        )
 
-    return False
+
+def _as_datetime(value):
+    # Raw text() selects return SQLite DATETIME columns as strings
+    if isinstance(value, str):
+        from datetime import datetime
+        return datetime.fromisoformat(value)
+    return value
 
 
 def apply_migrations(db):
     """
     Apply additive schema updates.
-    Call this after db.init_app() and inside app.app_context().
+    Call this after db.create_all() (it only ALTERs existing tables), inside app.app_context().
+    Runs in one transaction on its own connection (engine.begin()): it commits at the end,
+    or rolls back every change if any statement fails.
     """
-    # Users.public_username + users.default_slot_duration_minutes
-    if not _column_exists(db, "users", "public_username"):
-        db.session.execute(text("ALTER TABLE users ADD COLUMN public_username VARCHAR(120)"))
-
-    if not _column_exists(db, "users", "default_slot_duration_minutes"):
-        db.session.execute(text("ALTER TABLE users ADD COLUMN default_slot_duration_minutes INTEGER DEFAULT 30"))
-
-    # Unique index for public_username (nullable => allowed)
-    # (SQLite supports multiple NULLs, Postgres too.)
-    idx_name = "ix_users_public_username"
-    if not _index_exists(db, idx_name):
-        try:
-            db.session.execute(text(f"CREATE UNIQUE INDEX {idx_name} ON users(public_username)"))
-        except Exception:
-            # Index may already exist under a different name; ignore.
-            pass
+    with db.engine.begin() as conn:
+        # Every column/index check below reads this one snapshot
+        columns, indexes = _load_schema(conn)
 
-    db.session.commit()
+        # Users.public_username + users.default_slot_duration_minutes
+        if ("users", "public_username") not in columns:
+            conn.execute(text("ALTER TABLE users ADD COLUMN public_username VARCHAR(120)"))
+
+        if ("users", "default_slot_duration_minutes") not in columns:
+            conn.execute(text("ALTER TABLE users ADD COLUMN default_slot_duration_minutes INTEGER DEFAULT 30"))
+
+        # users.has_any_connection (denormalized "has connected calendars" flag)
+        if ("users", "has_any_connection") not in columns:
+            conn.execute(text("ALTER TABLE users ADD COLUMN has_any_connection BOOLEAN NOT NULL DEFAULT FALSE"))
+            _backfill_has_any_connection(conn)
+
+        # events.connection_id (owning CalendarConnection), backfilled from the "email:event_id" prefix
+        if ("events", "connection_id") not in columns:
+            conn.execute(text("ALTER TABLE events ADD COLUMN connection_id INTEGER REFERENCES calendar_connections(id)"))
+            conn.execute(
+                text(
+                    """
+                    UPDATE events SET connection_id = (
+                        SELECT cc.id FROM calendar_connections cc
+                        WHERE cc.user_id = events.user_id
+                          AND cc.provider = events.provider
+                          AND events.provider_event_id LIKE cc.provider_account_email || ':%'
+                        ORDER BY cc.id
+                        LIMIT 1
+                    )
+                    WHERE connection_id IS NULL
+                    """
+                )
+            )
+        _create_index(conn, "ix_events_connection_id", "events", "connection_id")
+
+        # events.dedup_hash (precomputed duplicate-group key), backfilled in Python since it's a blake2s digest
+        if ("events", "dedup_hash") not in columns:
+            conn.execute(text("ALTER TABLE events ADD COLUMN dedup_hash VARCHAR(32)"))
+        _create_index(conn, "ix_events_dedup_hash_missing", "events", "id", where="dedup_hash IS NULL")
+        _backfill_event_dedup_hash(conn)
+        _create_index(conn, "ix_event_user_dedup_hash", "events", "user_id, dedup_hash")
+
+        # events.is_mirror (bidirectional-sync placeholders), replacing the ilike('[mirror]%') filter
+        false_sql = "0" if conn.dialect.name == "sqlite" else "false"
+        if ("events", "is_mirror") not in columns:
+            conn.execute(text(f"ALTER TABLE events ADD COLUMN is_mirror BOOLEAN NOT NULL DEFAULT {false_sql}"))
+            conn.execute(text("UPDATE events SET is_mirror = (lower(title) LIKE '[mirror]%')"))
+        _create_index(conn, "ix_event_user_nonmirror_start", "events", "user_id, start_time", where=f"is_mirror = {false_sql}")
+
+        # check-duplicates grouping key; the expression must match _duplicate_group_columns() exactly
+        _create_index(
+            conn, "ix_events_dedup", "events", "user_id, coalesce(lower(trim(title)), ''), start_time, end_time",
+            include="id, provider, created_at",
+        )
 
+        # events range lookups used by get_events
+        _create_index(conn, "ix_event_user_provider_start", "events", "user_id, provider, start_time")
+        _create_index(conn, "ix_event_user_end", "events", "user_id, end_time")
+        _create_index(conn, "ix_event_user_updated", "events", "user_id, updated_at")
 
+        # Unique index for public_username (nullable => allowed)
+        # (SQLite supports multiple NULLs, Postgres too.)
+        idx_name = "ix_users_public_username"
+        if ("users", idx_name) not in indexes:
+            try:
+                # Savepoint on Postgres: a failed statement would otherwise abort the whole migration transaction
+                with conn.begin_nested() if conn.dialect.name == "postgresql" else nullcontext():
+                    conn.execute(text(f"CREATE UNIQUE INDEX {idx_name} ON users(public_username)"))
+            except Exception:
+                # Index may already exist under a different name; ignore.
+                pass
+
+        # calendar_connections.sync_token / sync_window (Google incremental sync state)
+        if ("calendar_connections", "sync_token") not in columns:
+            conn.execute(text("ALTER TABLE calendar_connections ADD COLUMN sync_token TEXT"))
+        if ("calendar_connections", "sync_window") not in columns:
+            conn.execute(text("ALTER TABLE calendar_connections ADD COLUMN sync_window VARCHAR(150)"))
+
+        # calendar_connections lookup indexes (OAuth callback, per-user filters, list ordering)
+        _create_index(conn, "ix_cc_provider_email", "calendar_connections", "provider, provider_account_email")
+        _create_index(conn, "ix_cc_user_provider", "calendar_connections", "user_id, provider")
+        _create_index(conn, "ix_cc_user_created", "calendar_connections", "user_id, created_at")
+        active_true = "1" if conn.dialect.name == "sqlite" else "true"
+        _create_index(
+            conn, "ix_cc_active_user", "calendar_connections", "user_id, provider", where=f"is_active = {active_true}"
+        )
+
+
+def _trigger_exists(db, trigger_name: str) -> bool:
+    if db.engine.dialect.name == "sqlite":
+        sql = "SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = :name"
+    else:
+        sql = "SELECT 1 FROM pg_trigger WHERE tgname = :name"
+    return db.session.execute(text(sql), {"name": trigger_name}).first() is not None
+
+
+_SQLITE_EVENT_STATS_TRIGGERS = (
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_insert AFTER INSERT ON events
+    BEGIN
+        INSERT INTO event_stats (user_id, provider, total, mirror)
+        VALUES (NEW.user_id, NEW.provider, 1, NEW.is_mirror)
+        ON CONFLICT (user_id, provider) DO UPDATE SET total = total + 1, mirror = mirror + excluded.mirror;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_delete AFTER DELETE ON events
+    BEGIN
+        UPDATE event_stats SET total = total - 1, mirror = mirror - OLD.is_mirror
+        WHERE user_id = OLD.user_id AND provider = OLD.provider;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_event_stats_update AFTER UPDATE OF user_id, provider, is_mirror ON events
+    BEGIN
+        UPDATE event_stats SET total = total - 1, mirror = mirror - OLD.is_mirror
+        WHERE user_id = OLD.user_id AND provider = OLD.provider;
+        INSERT INTO event_stats (user_id, provider, total, mirror)
+        VALUES (NEW.user_id, NEW.provider, 1, NEW.is_mirror)
+        ON CONFLICT (user_id, provider) DO UPDATE SET total = total + 1, mirror = mirror + excluded.mirror;
+    END
+    """,
+)
+
+_POSTGRES_EVENT_STATS_TRIGGERS = (
+    """
+    CREATE OR REPLACE FUNCTION event_stats_apply() RETURNS trigger AS $$
+    BEGIN
+        IF TG_OP IN ('UPDATE', 'DELETE') THEN
+            UPDATE event_stats SET total = total - 1, mirror = mirror - CASE WHEN OLD.is_mirror THEN 1 ELSE 0 END
+            WHERE user_id = OLD.user_id AND provider = OLD.provider;
+        END IF;
+        IF TG_OP IN ('INSERT', 'UPDATE') THEN
+            INSERT INTO event_stats (user_id, provider, total, mirror)
+            VALUES (NEW.user_id, NEW.provider, 1, CASE WHEN NEW.is_mirror THEN 1 ELSE 0 END)
+            ON CONFLICT (user_id, provider) DO UPDATE
+            SET total = event_stats.total + 1, mirror = event_stats.mirror + EXCLUDED.mirror;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    """
+    CREATE TRIGGER trg_event_stats AFTER INSERT OR DELETE OR UPDATE OF user_id, provider, is_mirror ON events
+    FOR EACH ROW EXECUTE FUNCTION event_stats_apply()
+    """,
+)
+
+
+def ensure_event_stats(db):
+    """
+    Install the triggers that keep event_stats in step with events.
+    Call after db.create_all() (the event_stats table comes from models.event_stats_model).
+    The counts are rebuilt from events in the same transaction the triggers are created in,
+    so they start exact and the triggers keep them that way.
+    """
+    sqlite = db.engine.dialect.name == "sqlite"
+    if _trigger_exists(db, "trg_event_stats_insert" if sqlite else "trg_event_stats"):
+        return
+
+    for statement in (_SQLITE_EVENT_STATS_TRIGGERS if sqlite else _POSTGRES_EVENT_STATS_TRIGGERS):
+        db.session.execute(text(statement))
+    db.session.execute(text("DELETE FROM event_stats"))
+    db.session.execute(
+        text(
+            """
+            INSERT INTO event_stats (user_id, provider, total, mirror)
+            SELECT user_id, provider, COUNT(*), SUM(CASE WHEN is_mirror THEN 1 ELSE 0 END)
+            FROM events
+            GROUP BY user_id, provider
+            """
+        )
+    )
+    db.session.commit()
@@ -0,0 +1,8 @@
+"""
+Shared Flask extension instances (bound to the app in create_app)
+"""
+
+from flask_caching import Cache
+
+# Redis-backed when REDIS_URL is configured, in-process SimpleCache otherwise
+cache = Cache()
@@ -0,0 +1,40 @@
+"""
+Gunicorn configuration for the Unified Smart Calendar API
+"""
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+
+# Threaded workers: views spend most of their time waiting on Google/Microsoft APIs
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Load the app once in the master and fork workers from it
+preload_app = True
+
+keepalive = 30
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+accesslog = '-'
+errorlog = '-'
+
+# Workers write Prometheus metrics to files here so /metrics on any worker covers all
+# of them (see metrics.py). Set before the app is loaded; files from a previous run are
+# cleared so restarted workers don't inherit stale counters.
+metrics_dir = os.environ.setdefault(
+    'PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'calendar-api-metrics')
+)
+shutil.rmtree(metrics_dir, ignore_errors=True)
+os.makedirs(metrics_dir, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Drop an exited worker's live gauges from the shared Prometheus metrics"""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
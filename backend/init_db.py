@@ -5,7 +5,7 @@ Database initialization script
 
 import sys
 import time
-from app import create_app
+from app import create_app, init_schema
 from models import db  # ensures all models are imported/registered (incl. new booking tables)
 from models.user_model import User
 from sqlalchemy import text
@@ -34,7 +34,7 @@ def init_database(max_retries=5, retry_delay=2):
         # Create database tables
         try:
             print("Creating database tables...")
-            db.create_all()
+            init_schema()
             print("Database tables created successfully!")
         except Exception as e:
             print(f"Error creating database tables: {e}")
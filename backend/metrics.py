@@ -0,0 +1,80 @@
+"""
+Prometheus metrics (/metrics) for the API, including DB connection pool gauges
+
+Under gunicorn every worker has its own counters. gunicorn.conf.py sets
+PROMETHEUS_MULTIPROC_DIR so workers write their values to shared files there and
+a scrape of /metrics on any worker reports the sum across all of them.
+"""
+
+import os
+
+from flask import request
+
+from models.user_model import db
+
+try:
+    from prometheus_client import CollectorRegistry, Gauge
+    from prometheus_flask_exporter import PrometheusMetrics
+    from prometheus_flask_exporter.multiprocess import GunicornInternalPrometheusMetrics
+except ImportError:  # metrics are optional
+    PrometheusMetrics = None
+
+POOL_STATS = (
+    ('checkedout', 'Connections currently checked out of the pool'),
+    ('checkedin', 'Idle connections in the pool'),
+    ('overflow', 'Connections open beyond pool_size'),
+    ('size', 'Configured pool size'),
+)
+
+
+def _pool_stat(name):
+    """Read a pool counter at scrape time (SQLite's static pools lack some counters)"""
+    def read():
+        stat = getattr(db.engine.pool, name, None)
+        return stat() if stat else 0
+    return read
+
+
+def _init_multiprocess_metrics(app):
+    """Metrics shared by all gunicorn workers through PROMETHEUS_MULTIPROC_DIR"""
+    metrics = GunicornInternalPrometheusMetrics(app, path='/metrics')
+    
+    # Callback gauges only report the scraping worker's pool, so each worker
+    # publishes its own pool after a request and the scrape sums the live workers
+    gauges = [
+        (Gauge(f'db_pool_{name}', description, multiprocess_mode='livesum'), _pool_stat(name))
+        for name, description in POOL_STATS
+    ]
+    
+    @app.after_request
+    def record_pool_stats(response):
+        if request.path != '/metrics':
+            for gauge, read in gauges:
+                gauge.set(read())
+        return response
+    
+    return metrics
+
+
+def init_metrics(app):
+    """Expose request metrics and connection pool gauges at /metrics"""
+    if PrometheusMetrics is None or not app.config.get('METRICS_ENABLED', True):
+        return None
+    
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        metrics = _init_multiprocess_metrics(app)
+        app.extensions['metrics'] = metrics
+        return metrics
+    
+    # Single process (flask run, tests): per-app registry so several create_app()
+    # calls in one process don't collide
+    registry = CollectorRegistry(auto_describe=True)
+    metrics = PrometheusMetrics(app, path='/metrics', registry=registry)
+    
+    # Evaluated lazily on each scrape; nothing is computed per request
+    for name, description in POOL_STATS:
+        gauge = Gauge(f'db_pool_{name}', description, registry=registry)
+        gauge.set_function(_pool_stat(name))
+    
+    app.extensions['metrics'] = metrics
+    return metrics
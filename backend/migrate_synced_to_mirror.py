@@ -11,8 +11,11 @@ Run from the backend directory:
     python migrate_synced_to_mirror.py
 """
 
+import sys
+from collections import defaultdict
 from datetime import datetime
-from sqlalchemy import or_
+from types import SimpleNamespace
+from sqlalchemy import select
 
 from app import create_app
 from models.event_model import Event, db
@@ -33,6 +36,8 @@ except ImportError:
 
 MIRROR_TITLE = '[Mirror] Busy'
 IST_TIMEZONE = 'Asia/Kolkata'
+# Events updated (and mappings inserted) per commit
+MIGRATION_BATCH_SIZE = 1000
 
 
 def extract_remote_id(provider_event_id):
@@ -85,24 +90,13 @@ def build_microsoft_payload(event):
     }
 
 
-def update_google_event(google_service, event):
-    user = User.query.get(event.user_id)
-    if not user:
-        return False
-    account_email, remote_event_id = extract_remote_id(event.provider_event_id)
-    calendar_id = 'primary'
-    
-    if account_email:
-        connection = CalendarConnection.query.filter_by(
-            provider='google',
-            provider_account_email=account_email,
-            user_id=user.id
-        ).first()
-        if not connection or not Credentials or not build:
-            return False
+def google_api_service(google_service, connection, api_clients):
+    """Calendar API client for a connection, built once per connection; None when it has no usable token"""
+    key = ('google', connection.id)
+    if key not in api_clients:
         token_info = connection.get_token()
         if not token_info:
-            return False
+            return None
         credentials = Credentials(
             token=token_info['token'],
             refresh_token=token_info.get('refresh_token'),
@@ -116,7 +110,23 @@ def update_google_event(google_service, event):
             token_info['token'] = credentials.token
             connection.set_token(token_info)
             db.session.commit()
-        service = build('calendar', 'v3', credentials=credentials)
+        api_clients[key] = build('calendar', 'v3', credentials=credentials)
+    return api_clients[key]
+
+
+def update_google_event(google_service, event, user, connections, api_clients):
+    if not user:
+        return False
+    account_email, remote_event_id = extract_remote_id(event.provider_event_id)
+    calendar_id = 'primary'
+    
+    if account_email:
+        connection = connections.get((user.id, 'google', account_email))
+        if not connection or not Credentials or not build:
+            return False
+        service = google_api_service(google_service, connection, api_clients)
+        if service is None:
+            return False
         calendar_id = connection.calendar_id or 'primary'
         try:
             service.events().patch(
@@ -131,58 +141,85 @@ def update_google_event(google_service, event):
             print(f"      ⚠️ Unable to patch Google event for {account_email}: {exc}")
             return False
     else:
-        client = google_service.get_calendar_client(user)
-        response = client.update_calendar_event(remote_event_id, build_google_payload(event), calendar_id=calendar_id)
+        key = ('google-user', user.id)
+        if key not in api_clients:
+            api_clients[key] = google_service.get_calendar_client(user)
+        response = api_clients[key].update_calendar_event(remote_event_id, build_google_payload(event), calendar_id=calendar_id)
         return bool(response)
 
 
-def update_microsoft_event(microsoft_service, event):
-    user = User.query.get(event.user_id)
+def update_microsoft_event(microsoft_service, event, user, api_clients):
     if not user:
         return False
-    client = microsoft_service.get_graph_client(user)
-    response = client.update_calendar_event(event.provider_event_id, build_microsoft_payload(event))
+    key = ('microsoft-user', user.id)
+    if key not in api_clients:
+        api_clients[key] = microsoft_service.get_graph_client(user)
+    response = api_clients[key].update_calendar_event(event.provider_event_id, build_microsoft_payload(event))
     return bool(response)
 
 
-def create_mapping(original_event, mirror_event, mirror_provider_event_id):
+def mapping_row(original_event, mirror_event, mirror_provider_event_id):
+    """EventMirrorMapping column values linking an original to its blocker, or None if either is missing"""
     if not original_event or not mirror_event or not mirror_provider_event_id:
+        return None
+    return {
+        'user_id': mirror_event.user_id,
+        'original_provider': original_event.provider,
+        'original_event_id': original_event.id,
+        'original_provider_event_id': original_event.provider_event_id,
+        'mirror_provider': mirror_event.provider,
+        'mirror_event_id': mirror_event.id,
+        'mirror_provider_event_id': mirror_provider_event_id
+    }
+
+
+def insert_mappings(rows):
+    """Insert mapping rows in one statement, skipping any uq_original_mirror_provider_event already holds"""
+    if not rows:
         return
-    existing = EventMirrorMapping.query.filter_by(
-        user_id=mirror_event.user_id,
-        original_provider=original_event.provider,
-        original_provider_event_id=original_event.provider_event_id,
-        mirror_provider=mirror_event.provider
-    ).first()
-    if existing:
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            if not EventMirrorMapping.query.filter_by(
+                original_provider=row['original_provider'],
+                original_provider_event_id=row['original_provider_event_id'],
+                mirror_provider=row['mirror_provider']
+            ).first():
+                db.session.add(EventMirrorMapping(**row))
         return
-    mapping = EventMirrorMapping(
-        user_id=mirror_event.user_id,
-        original_provider=original_event.provider,
-        original_event_id=original_event.id,
-        original_provider_event_id=original_event.provider_event_id,
-        mirror_provider=mirror_event.provider,
-        mirror_event_id=mirror_event.id,
-        mirror_provider_event_id=mirror_provider_event_id
+    stmt = insert(EventMirrorMapping).on_conflict_do_nothing(
+        index_elements=['original_provider', 'original_provider_event_id', 'mirror_provider']
     )
-    db.session.add(mapping)
+    db.session.execute(stmt, rows)
 
 
-def find_original_event(mirror_event):
+def load_original_candidates(start_times):
+    """Events starting at any of start_times, grouped by start_time in id order (for find_original_event)"""
+    candidates = defaultdict(list)
+    rows = db.session.execute(
+        select(Event.id, Event.start_time, Event.provider, Event.provider_event_id, Event.title)
+        .where(Event.start_time.in_(start_times))
+        .order_by(Event.id)
+    ).all()
+    for row in rows:
+        # Interned titles: the title-variant set lookups in find_original_event compare by identity
+        candidates[row.start_time].append(SimpleNamespace(**{**row._asdict(), 'title': sys.intern(row.title)}))
+    return candidates
+
+
+def find_original_event(mirror_event, candidates):
     normalized_title = mirror_event.title.replace('[SYNCED]', '').strip()
     if not normalized_title:
         return None
-    query = Event.query.filter(
-        Event.id != mirror_event.id,
-        Event.start_time == mirror_event.start_time,
-        Event.provider != mirror_event.provider,
-        or_(
-            Event.title == normalized_title,
-            Event.title == f"[Mirror] {normalized_title}",
-            Event.title == MIRROR_TITLE
-        )
-    )
-    return query.first()
+    titles = {sys.intern(normalized_title), sys.intern(f"[Mirror] {normalized_title}"), MIRROR_TITLE}
+    for candidate in candidates.get(mirror_event.start_time, ()):
+        if candidate.id != mirror_event.id and candidate.provider != mirror_event.provider and candidate.title in titles:
+            return candidate
+    return None
 
 
 def migrate_synced_events():
@@ -191,44 +228,76 @@ def migrate_synced_events():
         google_service = GoogleCalendarService()
         microsoft_service = None
         
-        synced_events = Event.query.filter(Event.title.like('[SYNCED]%')).all()
-        if not synced_events:
+        synced_rows = db.session.execute(
+            select(Event.id, Event.user_id).where(Event.title.like('[SYNCED]%')).order_by(Event.id)
+        ).all()
+        if not synced_rows:
             print("No [SYNCED] events found. Nothing to migrate.")
             return
+        synced_ids = [row.id for row in synced_rows]
         
-        print(f"Found {len(synced_events)} legacy synced events. Migrating...")
+        # Owners and their connections load once; API clients are built once per account
+        user_ids = {row.user_id for row in synced_rows}
+        users = {user.id: user for user in User.query.filter(User.id.in_(user_ids)).all()}
+        connections = {
+            (connection.user_id, connection.provider, connection.provider_account_email): connection
+            for connection in CalendarConnection.query.filter(CalendarConnection.user_id.in_(user_ids)).all()
+        }
+        api_clients = {}
+        
+        print(f"Found {len(synced_ids)} legacy synced events. Migrating...")
         migrated = 0
         
-        for event in synced_events:
-            print(f"\nProcessing event #{event.id}: {event.title} ({event.provider})")
-            remote_updated = False
-            
-            if event.provider == 'google':
-                remote_updated = update_google_event(google_service, event)
-            elif event.provider == 'microsoft':
-                if microsoft_service is None:
-                    microsoft_service = MicrosoftCalendarService()
-                remote_updated = update_microsoft_event(microsoft_service, event)
+        # Load, update and commit MIGRATION_BATCH_SIZE events at a time, with one mapping INSERT per batch
+        for batch_start in range(0, len(synced_ids), MIGRATION_BATCH_SIZE):
+            batch_ids = synced_ids[batch_start:batch_start + MIGRATION_BATCH_SIZE]
+            mapping_rows = {}
+            batch_events = Event.query.filter(Event.id.in_(batch_ids)).order_by(Event.id).all()
+            # Possible originals for the whole batch in one query, matched in memory per event
+            candidates = load_original_candidates({event.start_time for event in batch_events})
+            candidates_by_id = {candidate.id: candidate for group in candidates.values() for candidate in group}
             
-            if remote_updated:
-                print("  ✅ Remote calendar updated without notifications.")
-            else:
-                print("  ⚠️ Unable to update remote calendar (will still update database).")
+            for event in batch_events:
+                print(f"\nProcessing event #{event.id}: {event.title} ({event.provider})")
+                remote_updated = False
+                
+                user = users.get(event.user_id)
+                if event.provider == 'google':
+                    remote_updated = update_google_event(google_service, event, user, connections, api_clients)
+                elif event.provider == 'microsoft':
+                    if microsoft_service is None:
+                        microsoft_service = MicrosoftCalendarService()
+                    remote_updated = update_microsoft_event(microsoft_service, event, user, api_clients)
+                
+                if remote_updated:
+                    print("  ✅ Remote calendar updated without notifications.")
+                else:
+                    print("  ⚠️ Unable to update remote calendar (will still update database).")
+                
+                event.title = MIRROR_TITLE
+                event.description = ''
+                event.location = ''
+                event.set_attendees([])
+                if not event.organizer and user:
+                    event.organizer = user.email
+                event.last_synced = datetime.utcnow()
+                
+                _, remote_id = extract_remote_id(event.provider_event_id)
+                if event.id in candidates_by_id:
+                    # Later lookups in this batch see the new title, as the autoflushed query did
+                    candidates_by_id[event.id].title = sys.intern(event.title)
+                original_event = find_original_event(event, candidates)
+                row = mapping_row(original_event, event, remote_id or event.provider_event_id)
+                if row:
+                    # First mapping per unique key wins, as the per-event existence check did
+                    key = (row['original_provider'], row['original_provider_event_id'], row['mirror_provider'])
+                    mapping_rows.setdefault(key, row)
+                migrated += 1
             
-            event.title = MIRROR_TITLE
-            event.description = ''
-            event.location = ''
-            event.set_attendees([])
-            if not event.organizer and event.user:
-                event.organizer = event.user.email
-            event.last_synced = datetime.utcnow()
-            
-            _, remote_id = extract_remote_id(event.provider_event_id)
-            original_event = find_original_event(event)
-            create_mapping(original_event, event, remote_id or event.provider_event_id)
-            migrated += 1
+            insert_mappings(list(mapping_rows.values()))
+            db.session.commit()
+            print(f"\nCommitted {migrated}/{len(synced_ids)} events.")
         
-        db.session.commit()
         print(f"\nMigration complete. Updated {migrated} events to the new [Mirror] format.")
 
 
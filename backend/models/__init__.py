@@ -4,6 +4,7 @@ from models.calendar_connection_model import CalendarConnection
 from models.event_mirror_mapping_model import EventMirrorMapping
 from models.availability_model import Availability
 from models.booking_model import Booking
+from models.event_stats_model import EventStats
 
-__all__ = ['User', 'Event', 'CalendarConnection', 'EventMirrorMapping', 'Availability', 'Booking', 'db']
+__all__ = ['User', 'Event', 'CalendarConnection', 'EventMirrorMapping', 'Availability', 'Booking', 'EventStats', 'db']
 
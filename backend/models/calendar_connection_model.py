@@ -1,6 +1,6 @@
 from models.user_model import db
 from datetime import datetime
-import json
+from utils import fast_json
 
 class CalendarConnection(db.Model):
     """Model for storing multiple calendar account connections per user"""
@@ -24,6 +24,10 @@ class CalendarConnection(db.Model):
     # Calendar info
     calendar_id = db.Column(db.String(100), default='primary')  # Which calendar from this account
     
+    # Incremental sync: Google nextSyncToken and the calendar/day/window it was issued for
+    sync_token = db.Column(db.Text)
+    sync_window = db.Column(db.String(150))
+    
     # Metadata
     last_synced = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -32,31 +36,69 @@ class CalendarConnection(db.Model):
     # Relationships
     user = db.relationship('User', backref='calendar_connections')
     
+    __table_args__ = (
+        # OAuth callback lookup by account, per-user provider filters, connection list ordering
+        db.Index('ix_cc_provider_email', 'provider', 'provider_account_email'),
+        db.Index('ix_cc_user_provider', 'user_id', 'provider'),
+        db.Index('ix_cc_user_created', 'user_id', 'created_at'),
+        # Live connections only: sync/conflict lookups skip soft-deleted (is_active = false) rows
+        db.Index(
+            'ix_cc_active_user', 'user_id', 'provider',
+            postgresql_where=db.text('is_active = true'),
+            sqlite_where=db.text('is_active = 1'),
+        ),
+    )
+    
     def set_token(self, token_info):
         """Store OAuth token"""
-        self.token = json.dumps(token_info)
+        self.token = fast_json.dumps(token_info).decode()
+        self._token_cache = (self.token, dict(token_info))
         self.is_connected = True
     
     def get_token(self):
-        """Retrieve OAuth token"""
-        if self.token:
-            return json.loads(self.token)
-        return None
+        """Retrieve OAuth token (a copy callers may modify)"""
+        if not self.token:
+            return None
+        # Parsed once per token text: a reload from the database brings a new string and re-parses
+        cached = getattr(self, '_token_cache', None)
+        if cached is None or cached[0] is not self.token:
+            cached = self._token_cache = (self.token, fast_json.loads(self.token))
+        return dict(cached[1])
     
-    def to_dict(self):
-        """Convert connection to dictionary for API response"""
+    @classmethod
+    def list_columns(cls):
+        """Columns needed by serialize() (lets list queries skip the token blob and ORM hydration)"""
+        return (
+            cls.id,
+            cls.provider,
+            cls.provider_account_email,
+            cls.provider_account_name,
+            cls.is_connected,
+            cls.is_active,
+            cls.calendar_id,
+            cls.last_synced,
+            cls.created_at,
+        )
+    
+    @staticmethod
+    def serialize(row):
+        """API dict from a connection or a row selected with list_columns()"""
         return {
-            'id': self.id,
-            'provider': self.provider,
-            'provider_account_email': self.provider_account_email,
-            'provider_account_name': self.provider_account_name,
-            'is_connected': self.is_connected,
-            'is_active': self.is_active,
-            'calendar_id': self.calendar_id,
-            'last_synced': self.last_synced.isoformat() if self.last_synced else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'id': row.id,
+            'provider': row.provider,
+            'provider_account_email': row.provider_account_email,
+            'provider_account_name': row.provider_account_name,
+            'is_connected': row.is_connected,
+            'is_active': row.is_active,
+            'calendar_id': row.calendar_id,
+            'last_synced': row.last_synced.isoformat() if row.last_synced else None,
+            'created_at': row.created_at.isoformat() if row.created_at else None
         }
     
+    def to_dict(self):
+        """Convert connection to dictionary for API response"""
+        return self.serialize(self)
+    
     def __repr__(self):
         return f'<CalendarConnection {self.provider}:{self.provider_account_email}>'
 
@@ -1,6 +1,9 @@
 from models.user_model import db
 from datetime import datetime
+from sqlalchemy import event as orm_event
+import hashlib
 import json
+from utils import fast_json
 
 class Event(db.Model):
     __tablename__ = 'events'
@@ -22,6 +25,13 @@ class Event(db.Model):
     provider = db.Column(db.String(20), nullable=False)  # 'google' or 'microsoft'
     provider_event_id = db.Column(db.String(512), unique=True)  # Increased length for multi-account support (email:event_id)
     calendar_id = db.Column(db.String(100))  # Calendar ID from provider
+    # Owning CalendarConnection (multi-account events); lets reassignment filter by equality
+    connection_id = db.Column(db.Integer, db.ForeignKey('calendar_connections.id'), index=True, nullable=True)
+    
+    # Duplicate-group key over (title, start minute, end minute, provider); see compute_dedup_hash
+    dedup_hash = db.Column(db.String(32), nullable=True)
+    # Bidirectional-sync placeholder ('[Mirror] ...' title); kept in step with title on write
+    is_mirror = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     
     # Event metadata
     attendees = db.Column(db.Text)  # JSON array of attendees
@@ -38,6 +48,47 @@ class Event(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    __table_args__ = (
+        # get_events: user + provider filter with a start_time range, ordered by start_time
+        db.Index('ix_event_user_provider_start', 'user_id', 'provider', 'start_time'),
+        # get_events: end_time upper bound across providers
+        db.Index('ix_event_user_end', 'user_id', 'end_time'),
+        # get_events dedup: partition by hash within a user's events
+        db.Index('ix_event_user_dedup_hash', 'user_id', 'dedup_hash'),
+        # get_events ETag: max(updated_at) per user
+        db.Index('ix_event_user_updated', 'user_id', 'updated_at'),
+        # check-duplicates: (title, start, end) grouping per user, covering the columns it returns
+        db.Index(
+            'ix_events_dedup', 'user_id', db.text("coalesce(lower(trim(title)), '')"), 'start_time', 'end_time',
+            postgresql_include=['id', 'provider', 'created_at'],
+        ),
+        # get_events: the user's real (non-mirror) events by start_time
+        db.Index(
+            'ix_event_user_nonmirror_start', 'user_id', 'start_time',
+            postgresql_where=db.text('is_mirror = false'),
+            sqlite_where=db.text('is_mirror = 0'),
+        ),
+        # Startup dedup_hash backfill: rows still missing the hash (normally none, so the index stays empty)
+        db.Index(
+            'ix_events_dedup_hash_missing', 'id',
+            postgresql_where=db.text('dedup_hash IS NULL'),
+            sqlite_where=db.text('dedup_hash IS NULL'),
+        ),
+    )
+    
+    @staticmethod
+    def is_mirror_title(title):
+        """True for bidirectional-sync placeholder titles ('[Mirror] ...', any case)"""
+        return (title or '').lower().startswith('[mirror]')
+    
+    @staticmethod
+    def compute_dedup_hash(title, start_time, end_time, provider):
+        """Hash of the fields two copies of the same meeting share (times at minute precision)"""
+        def minute(value):
+            return value.replace(second=0, microsecond=0).isoformat() if value else ''
+        key = f"{(title or '').lower().strip()}|{minute(start_time)}|{minute(end_time)}|{provider or ''}"
+        return hashlib.blake2s(key.encode('utf-8'), digest_size=16).hexdigest()
+    
     def set_attendees(self, attendees_list):
         """Store attendees as JSON"""
         self.attendees = json.dumps(attendees_list)
@@ -45,7 +96,7 @@ class Event(db.Model):
     def get_attendees(self):
         """Retrieve attendees from JSON"""
         if self.attendees:
-            return json.loads(self.attendees)
+            return fast_json.loads(self.attendees)
         return []
     
     def set_conflict_with(self, conflict_ids):
@@ -56,31 +107,122 @@ class Event(db.Model):
     def get_conflict_with(self):
         """Retrieve conflicting event IDs from JSON"""
         if self.conflict_with:
-            return json.loads(self.conflict_with)
+            return fast_json.loads(self.conflict_with)
         return []
     
-    def to_dict(self):
-        """Convert event to dictionary for API response"""
+    @classmethod
+    def list_columns(cls):
+        """Columns needed by serialize() (lets read-only list queries skip ORM hydration)"""
+        return (
+            cls.id,
+            cls.user_id,
+            cls.title,
+            cls.description,
+            cls.location,
+            cls.start_time,
+            cls.end_time,
+            cls.all_day,
+            cls.provider,
+            cls.provider_event_id,
+            cls.calendar_id,
+            cls.attendees,
+            cls.organizer,
+            cls.color,
+            cls.has_conflict,
+            cls.conflict_with,
+            cls.last_synced,
+            cls.meet_link,
+        )
+    
+    @staticmethod
+    def serialize(row):
+        """API dict from an event or a row selected with list_columns()"""
         return {
-            'id': self.id,
-            'user_id': self.user_id,  # Add user_id to response
-            'title': self.title,
-            'description': self.description,
-            'location': self.location,
-            'start_time': self.start_time.isoformat() if self.start_time else None,
-            'end_time': self.end_time.isoformat() if self.end_time else None,
-            'all_day': self.all_day,
-            'provider': self.provider,
-            'provider_event_id': self.provider_event_id,
-            'calendar_id': self.calendar_id,
-            'attendees': self.get_attendees(),
-            'organizer': self.organizer or '',  # Ensure organizer is always a string
-            'color': self.color,
-            'has_conflict': self.has_conflict,
-            'conflict_with': self.get_conflict_with(),
-            'last_synced': self.last_synced.isoformat() if self.last_synced else None,
-            'meet_link': self.meet_link or None
+            'id': row.id,
+            'user_id': row.user_id,  # Add user_id to response
+            'title': row.title,
+            'description': row.description,
+            'location': row.location,
+            'start_time': row.start_time.isoformat() if row.start_time else None,
+            'end_time': row.end_time.isoformat() if row.end_time else None,
+            'all_day': row.all_day,
+            'provider': row.provider,
+            'provider_event_id': row.provider_event_id,
+            'calendar_id': row.calendar_id,
+            'attendees': fast_json.loads(row.attendees) if row.attendees else [],
+            'organizer': row.organizer or '',  # Ensure organizer is always a string
+            'color': row.color,
+            'has_conflict': row.has_conflict,
+            'conflict_with': fast_json.loads(row.conflict_with) if row.conflict_with else [],
+            'last_synced': row.last_synced.isoformat() if row.last_synced else None,
+            'meet_link': row.meet_link or None
         }
     
+    @classmethod
+    def upsert_rows(cls, rows, update_columns):
+        """
+        Insert synced events, or update them in place when provider_event_id already exists.
+
+        rows are column dicts; update_columns are the columns an existing row takes from
+        the incoming one. Bulk writes skip the ORM listeners, so the derived columns are
+        filled in here. Rows owned by another user are left untouched.
+        """
+        if not rows:
+            return
+        now = datetime.utcnow()
+        # One statement can't update the same row twice: keep the last copy of each id
+        rows_by_id = {}
+        for row in rows:
+            row = dict(row)
+            row['dedup_hash'] = cls.compute_dedup_hash(row['title'], row['start_time'], row['end_time'], row['provider'])
+            row['is_mirror'] = cls.is_mirror_title(row['title'])
+            row.setdefault('updated_at', now)
+            rows_by_id[row['provider_event_id']] = row
+        rows = list(rows_by_id.values())
+        update_columns = list(update_columns) + ['dedup_hash', 'is_mirror', 'updated_at']
+
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        elif dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            # No portable upsert: update/insert row by row
+            existing = {
+                event.provider_event_id: event
+                for event in cls.query.filter(cls.provider_event_id.in_(list(rows_by_id))).all()
+            }
+            for row in rows:
+                event = existing.get(row['provider_event_id'])
+                if event is None:
+                    db.session.add(cls(**row))
+                elif event.user_id == row['user_id']:
+                    for column in update_columns:
+                        setattr(event, column, row[column])
+            return
+
+        stmt = insert(cls)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.provider_event_id],
+            set_={column: getattr(stmt.excluded, column) for column in update_columns},
+            where=cls.user_id == stmt.excluded.user_id
+        )
+        # ORM bulk insert: batched into multi-row INSERT ... ON CONFLICT statements
+        db.session.execute(stmt, rows)
+    
+    def to_dict(self):
+        """Convert event to dictionary for API response"""
+        return self.serialize(self)
+    
     def __repr__(self):
         return f'<Event {self.title} ({self.provider})>'
+
+
+@orm_event.listens_for(Event, 'before_insert')
+@orm_event.listens_for(Event, 'before_update')
+def _set_derived_columns(mapper, connection, target):
+    """Keep dedup_hash and is_mirror in step with the fields they cover on every ORM insert/update"""
+    target.dedup_hash = Event.compute_dedup_hash(
+        target.title, target.start_time, target.end_time, target.provider
+    )
+    target.is_mirror = Event.is_mirror_title(target.title)
@@ -0,0 +1,19 @@
+from models.user_model import db
+
+
+class EventStats(db.Model):
+    """Per-user, per-provider event counts.
+
+    Maintained by database triggers on `events` (see db_migrations.ensure_event_stats),
+    so dashboard counts read this small table instead of scanning events.
+    """
+
+    __tablename__ = 'event_stats'
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    provider = db.Column(db.String(20), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    mirror = db.Column(db.Integer, nullable=False, default=0)  # '[Mirror]' placeholders among total
+
+    def __repr__(self):
+        return f'<EventStats user={self.user_id} {self.provider}: {self.total}>'
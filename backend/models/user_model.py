@@ -1,7 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from datetime import datetime
-import json
+from sqlalchemy import exists, or_
+from utils import fast_json
 
 db = SQLAlchemy()
 
@@ -21,6 +22,9 @@ class User(UserMixin, db.Model):
     # Calendar connections
     google_calendar_connected = db.Column(db.Boolean, default=False)
     microsoft_calendar_connected = db.Column(db.Boolean, default=False)
+    # Denormalized: True while the user has at least one active CalendarConnection
+    # (set by the OAuth callbacks, recomputed when a connection is removed/toggled)
+    has_any_connection = db.Column(db.Boolean, default=False, nullable=False)
 
     # Public booking profile
     # - public_username is used to generate a shareable booking URL: /book/{public_username}
@@ -33,29 +37,46 @@ class User(UserMixin, db.Model):
     
     def set_google_token(self, token_info):
         """Store Google OAuth token"""
-        self.google_token = json.dumps(token_info)
+        self.google_token = fast_json.dumps(token_info).decode()
         self.google_calendar_connected = True
         
     def get_google_token(self):
         """Retrieve Google OAuth token"""
         if self.google_token:
-            return json.loads(self.google_token)
+            return fast_json.loads(self.google_token)
         return None
         
     def set_microsoft_token(self, token_info):
         """Store Microsoft OAuth token"""
-        self.microsoft_token = json.dumps(token_info)
+        self.microsoft_token = fast_json.dumps(token_info).decode()
         self.microsoft_calendar_connected = True
         
     def get_microsoft_token(self):
         """Retrieve Microsoft OAuth token"""
         if self.microsoft_token:
-            return json.loads(self.microsoft_token)
+            return fast_json.loads(self.microsoft_token)
         return None
     
     def has_connected_calendars(self):
         """Check if user has any connected calendars"""
-        return self.google_calendar_connected or self.microsoft_calendar_connected
+        return bool(self.has_any_connection)
+
+    @classmethod
+    def has_any_connection_clause(cls):
+        """
+        SQL predicate behind has_any_connection: a legacy *_calendar_connected flag or an
+        active, connected CalendarConnection. Used by the migration backfill and by recomputes.
+        """
+        from models.calendar_connection_model import CalendarConnection
+        return or_(
+            cls.google_calendar_connected.is_(True),
+            cls.microsoft_calendar_connected.is_(True),
+            exists().where(
+                CalendarConnection.user_id == cls.id,
+                CalendarConnection.is_active.is_(True),
+                CalendarConnection.is_connected.is_(True)
+            )
+        )
 
     def ensure_public_username(self):
         """
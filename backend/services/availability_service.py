@@ -3,6 +3,7 @@ from typing import List, Dict, Any
 
 from models.user_model import db, User
 from models.availability_model import Availability
+from services import user_cache
 
 
 def _parse_hhmm(value: str) -> time:
@@ -74,6 +75,7 @@ class AvailabilityService:
             owner.ensure_public_username()
 
         db.session.commit()
+        user_cache.invalidate(owner_id)
         return AvailabilityService.get_owner_availability(owner_id)
 
 
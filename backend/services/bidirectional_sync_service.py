@@ -7,47 +7,60 @@ Supports:
 - Google ↔ Google sync (multi-account)
 """
 
+import logging
 import pytz
+from google.oauth2.credentials import Credentials
+from google.auth.transport.requests import Request
 from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
 from models.user_model import User, db
 from models.event_model import Event
 from models.calendar_connection_model import CalendarConnection
 from models.event_mirror_mapping_model import EventMirrorMapping
-from services.google_service import GoogleCalendarService
+from services.google_service import GoogleCalendarService, write_google_events_batch
 from services.microsoft_service import MicrosoftCalendarService
+from services.service_registry import shared_service
 from services.meeting_detection_service import MeetingDetectionService
 
+logger = logging.getLogger(__name__)
+
 class BidirectionalSyncService:
     """Service to sync events bidirectionally between Google and Microsoft calendars, and between multiple Google accounts"""
     
     MIRROR_TITLE = '[Mirror] Busy'
     
     def __init__(self):
-        self.google_service = GoogleCalendarService()
-        self.microsoft_service = MicrosoftCalendarService()
+        self.google_service = shared_service(GoogleCalendarService)
+        self.microsoft_service = shared_service(MicrosoftCalendarService)
         self.ist_tz = pytz.timezone('Asia/Kolkata')
     
-    def sync_bidirectional(self, days_back=30, days_forward=30, send_notifications=False):
+    @staticmethod
+    def active_connections(provider):
+        """Active, connected CalendarConnections for a provider; owners load in the same SELECT"""
+        return CalendarConnection.query.options(joinedload(CalendarConnection.user)).filter_by(
+            provider=provider,
+            is_active=True,
+            is_connected=True
+        ).all()
+    
+    def sync_bidirectional(self, days_back=30, days_forward=30, send_notifications=False,
+                           google_connections=None, microsoft_connections=None):
         """Sync events bidirectionally between:
         - Google and Microsoft calendars
         - Multiple Google accounts (Google ↔ Google)
         - Multiple Microsoft accounts (Microsoft ↔ Microsoft)
+        
+        Callers that already loaded the connections (see active_connections) pass them in;
+        either list is queried here when omitted.
         """
         try:
-            print("Starting bidirectional sync...")
-            print(f"Bidirectional sync: NEVER sending notifications (this is just mirroring existing events)")
+            logger.info("Starting bidirectional sync (mirroring only, no notifications sent)")
             
             # Get all connections (multi-account support)
-            google_connections = CalendarConnection.query.filter_by(
-                provider='google',
-                is_active=True,
-                is_connected=True
-            ).all()
-            microsoft_connections = CalendarConnection.query.filter_by(
-                provider='microsoft',
-                is_active=True,
-                is_connected=True
-            ).all()
+            if google_connections is None:
+                google_connections = self.active_connections('google')
+            if microsoft_connections is None:
+                microsoft_connections = self.active_connections('microsoft')
             
             # Group connections by owning user to avoid cross-user syncing
             google_connections_by_user = {}
@@ -67,7 +80,7 @@ class BidirectionalSyncService:
                 ).all()
             
             if not google_connections and not microsoft_connections and not legacy_users:
-                print("No users with connected calendars found")
+                logger.info("No users with connected calendars found")
                 return {
                     'google_to_microsoft': 0,
                     'microsoft_to_google': 0,
@@ -85,14 +98,14 @@ class BidirectionalSyncService:
             start_date = datetime.now(self.ist_tz) - timedelta(days=days_back)
             end_date = datetime.now(self.ist_tz) + timedelta(days=days_forward)
             
-            print(f"Date range: {start_date} to {end_date}")
+            logger.debug("Date range: %s to %s", start_date, end_date)
             
             # Get all events within range and group by user
             all_events = Event.query.filter(
                 Event.start_time >= start_date,
                 Event.start_time <= end_date
             ).all()
-            print(f"Total events in date range: {len(all_events)}")
+            logger.debug("Total events in date range: %d", len(all_events))
             google_events = [e for e in all_events if e.provider == 'google']
             microsoft_events = [e for e in all_events if e.provider == 'microsoft']
             
@@ -115,22 +128,18 @@ class BidirectionalSyncService:
                     try:
                         synced_count = self._sync_google_to_google(user_google_connections, user_google_events, send_notifications=False)
                         total_google_to_google += synced_count
-                        print(f"[User {user_id}] Synced {synced_count} events between Google accounts")
+                        logger.debug("[User %s] Synced %d events between Google accounts", user_id, synced_count)
                     except Exception as e:
-                        print(f"[User {user_id}] Error syncing Google to Google: {e}")
-                        import traceback
-                        traceback.print_exc()
+                        logger.exception("[User %s] Error syncing Google to Google: %s", user_id, e)
                 
                 # Microsoft ↔ Microsoft sync per user
                 if len(user_microsoft_connections) > 1 and user_microsoft_events:
                     try:
                         synced_count = self._sync_microsoft_to_microsoft(user_microsoft_connections, user_microsoft_events, send_notifications=False)
                         total_microsoft_to_microsoft += synced_count
-                        print(f"[User {user_id}] Synced {synced_count} events between Microsoft accounts")
+                        logger.debug("[User %s] Synced %d events between Microsoft accounts", user_id, synced_count)
                     except Exception as e:
-                        print(f"[User {user_id}] Error syncing Microsoft to Microsoft: {e}")
-                        import traceback
-                        traceback.print_exc()
+                        logger.exception("[User %s] Error syncing Microsoft to Microsoft: %s", user_id, e)
                 
                 # Google → Microsoft for each Microsoft connection owned by the user
                 if user_microsoft_connections and user_google_events:
@@ -139,9 +148,9 @@ class BidirectionalSyncService:
                             synced_count = self._sync_google_to_microsoft(connection, user_google_events, send_notifications=False)
                             total_google_to_microsoft += synced_count
                             if synced_count:
-                                print(f"[User {user_id}] Synced {synced_count} Google events to Microsoft account {connection.provider_account_email}")
+                                logger.debug("[User %s] Synced %d Google events to Microsoft account %s", user_id, synced_count, connection.provider_account_email)
                         except Exception as e:
-                            print(f"[User {user_id}] Error syncing Google to Microsoft for {connection.provider_account_email}: {e}")
+                            logger.exception("[User %s] Error syncing Google to Microsoft for %s: %s", user_id, connection.provider_account_email, e)
                 
                 # Microsoft → Google for each Google connection owned by the user
                 if user_google_connections and user_microsoft_events:
@@ -150,9 +159,9 @@ class BidirectionalSyncService:
                             synced_count = self._sync_microsoft_to_google(connection, user_microsoft_events, send_notifications=False)
                             total_microsoft_to_google += synced_count
                             if synced_count:
-                                print(f"[User {user_id}] Synced {synced_count} Microsoft events to Google account {connection.provider_account_email}")
+                                logger.debug("[User %s] Synced %d Microsoft events to Google account %s", user_id, synced_count, connection.provider_account_email)
                         except Exception as e:
-                            print(f"[User {user_id}] Error syncing Microsoft to Google for {connection.provider_account_email}: {e}")
+                            logger.exception("[User %s] Error syncing Microsoft to Google for %s: %s", user_id, connection.provider_account_email, e)
             
             # Legacy support: If using old User model
             if legacy_users and not google_connections and not microsoft_connections:
@@ -163,7 +172,7 @@ class BidirectionalSyncService:
                         synced_count = self._sync_google_to_microsoft(microsoft_user, google_events, send_notifications=False)
                         total_google_to_microsoft += synced_count
                     except Exception as e:
-                        print(f"Error syncing Google to Microsoft (legacy): {e}")
+                        logger.exception("Error syncing Google to Microsoft (legacy): %s", e)
                 
                 google_users = [u for u in legacy_users if u.google_calendar_connected]
                 if google_users and microsoft_events:
@@ -172,14 +181,14 @@ class BidirectionalSyncService:
                         synced_count = self._sync_microsoft_to_google(google_user, microsoft_events, send_notifications=False)
                         total_microsoft_to_google += synced_count
                     except Exception as e:
-                        print(f"Error syncing Microsoft to Google (legacy): {e}")
+                        logger.exception("Error syncing Microsoft to Google (legacy): %s", e)
             
-            print(f"Bidirectional sync completed:")
-            print(f"  Google → Microsoft: {total_google_to_microsoft} events")
-            print(f"  Microsoft → Google: {total_microsoft_to_google} events")
-            print(f"  Google → Google: {total_google_to_google} events")
-            print(f"  Microsoft → Microsoft: {total_microsoft_to_microsoft} events")
-            print(f"  Note: NO notifications sent (this is just mirroring existing events)")
+            logger.info(
+                "Bidirectional sync completed: Google → Microsoft %d, Microsoft → Google %d, "
+                "Google → Google %d, Microsoft → Microsoft %d events (no notifications sent)",
+                total_google_to_microsoft, total_microsoft_to_google,
+                total_google_to_google, total_microsoft_to_microsoft
+            )
             
             return {
                 'google_to_microsoft': total_google_to_microsoft,
@@ -190,14 +199,11 @@ class BidirectionalSyncService:
             }
             
         except Exception as e:
-            print(f"Bidirectional sync error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("Bidirectional sync error: %s", e)
             raise
     
     def _sync_google_to_microsoft(self, target, google_events, send_notifications=True):
         """Mirror real Google meetings into Microsoft as private blockers (connection or legacy user)."""
-        synced_count = 0
         connection = None
         user = None
         calendar_id = 'default'
@@ -215,66 +221,52 @@ class BidirectionalSyncService:
         try:
             client = get_client()
         except Exception as auth_error:
-            print(f"    Unable to get Microsoft Graph client for {target_email}: {auth_error}")
+            logger.warning("Unable to get Microsoft Graph client for %s: %s", target_email, auth_error)
             return 0
         
-        for event in google_events:
-            try:
-                if not self._should_sync_google_event(event):
-                    continue
-                
-                mapping = self._find_mapping(
-                    user_id=user_id,
-                    original_provider='google',
-                    original_provider_event_id=event.provider_event_id,
-                    mirror_provider='microsoft',
-                    mirror_account_email=target_email
-                )
-                blocker_payload = self._build_microsoft_blocker_payload(event)
-
-                if mapping:
-                    updated = client.update_calendar_event(mapping.mirror_provider_event_id, blocker_payload)
-                    if updated:
-                        self._update_local_blocker(mapping, event)
-                        synced_count += 1
-                    continue
-                
-                response = client.create_calendar_event(blocker_payload)
-                if response:
-                    remote_id = response.get('id', f"mirror_ms_{event.id}")
-                    mirror_event = self._create_local_blocker_event(
-                        user_id=user_id,
-                        provider='microsoft',
-                        provider_event_id=remote_id,
-                        start_time=event.start_time,
-                        end_time=event.end_time,
-                        all_day=event.all_day,
-                        calendar_id=calendar_id,
-                        organizer=target_email
-                    )
+        def record_created(event, response):
+            remote_id = response.get('id', f"mirror_ms_{event.id}")
+            mirror_event = self._create_local_blocker_event(
+                user_id=user_id,
+                provider='microsoft',
+                provider_event_id=remote_id,
+                start_time=event.start_time,
+                end_time=event.end_time,
+                all_day=event.all_day,
+                calendar_id=calendar_id,
+                organizer=target_email,
+                connection_id=connection.id if connection else None
+            )
+            db.session.add(EventMirrorMapping(
+                user_id=user_id,
+                original_provider='google',
+                original_event_id=event.id,
+                original_provider_event_id=event.provider_event_id or f"google_local_{event.id}",
+                mirror_provider='microsoft',
+                mirror_event_id=mirror_event.id,
+                mirror_provider_event_id=remote_id
+            ))
 
-                    mapping = EventMirrorMapping(
-                        user_id=user_id,
-                        original_provider='google',
-                        original_event_id=event.id,
-                        original_provider_event_id=event.provider_event_id or f"google_local_{event.id}",
-                        mirror_provider='microsoft',
-                        mirror_event_id=mirror_event.id,
-                        mirror_provider_event_id=remote_id
-                    )
-                    db.session.add(mapping)
-                    synced_count += 1
-                
-            except Exception as e:
-                print(f"    Error syncing event '{event.title}' to Microsoft: {e}")
-                continue
+        synced_count = self._write_blockers_batched(
+            [event for event in google_events if self._should_sync_google_event(event)],
+            find_mapping=lambda event: self._find_mapping(
+                user_id=user_id,
+                original_provider='google',
+                original_provider_event_id=event.provider_event_id,
+                mirror_provider='microsoft',
+                mirror_account_email=target_email
+            ),
+            build_payload=self._build_microsoft_blocker_payload,
+            write_batch=client.write_calendar_events_batch,
+            record_created=record_created,
+            target_label=f"Microsoft ({target_email})"
+        )
         
         db.session.commit()
         return synced_count
     
     def _sync_microsoft_to_google(self, target, microsoft_events, send_notifications=True):
         """Mirror real Microsoft meetings into Google as private blockers (connection or legacy user)."""
-        synced_count = 0
         connection = None
         user = None
         if isinstance(target, CalendarConnection):
@@ -292,60 +284,46 @@ class BidirectionalSyncService:
         try:
             client = get_client()
         except Exception as auth_error:
-            print(f"    Unable to get Google Calendar client for {target_email}: {auth_error}")
+            logger.warning("Unable to get Google Calendar client for %s: %s", target_email, auth_error)
             return 0
         
-        for event in microsoft_events:
-            try:
-                if not self._should_sync_microsoft_event(event):
-                    continue
-                
-                mapping = self._find_mapping(
-                    user_id=user_id,
-                    original_provider='microsoft',
-                    original_provider_event_id=event.provider_event_id,
-                    mirror_provider='google',
-                    mirror_account_email=target_email
-                )
-                blocker_payload = self._build_google_blocker_payload(event)
+        def record_created(event, response):
+            provider_event_id = response.get('id', f"mirror_google_{event.id}")
+            mirror_event = self._create_local_blocker_event(
+                user_id=user_id,
+                provider='google',
+                provider_event_id=f"{target_email}:{provider_event_id}",
+                start_time=event.start_time,
+                end_time=event.end_time,
+                all_day=event.all_day,
+                calendar_id=calendar_id,
+                organizer=target_email,
+                connection_id=connection.id if connection else None
+            )
+            db.session.add(EventMirrorMapping(
+                user_id=user_id,
+                original_provider='microsoft',
+                original_event_id=event.id,
+                original_provider_event_id=event.provider_event_id or f"microsoft_local_{event.id}",
+                mirror_provider='google',
+                mirror_event_id=mirror_event.id,
+                mirror_provider_event_id=mirror_event.provider_event_id
+            ))
 
-                if mapping:
-                    updated = client.update_calendar_event(mapping.mirror_provider_event_id, blocker_payload, calendar_id=calendar_id)
-                    if updated:
-                        self._update_local_blocker(mapping, event)
-                        synced_count += 1
-                    continue
-                
-                response = client.create_calendar_event(blocker_payload, calendar_id=calendar_id)
-                if response:
-                    provider_event_id = response.get('id', f"mirror_google_{event.id}")
-                    unique_event_id = f"{target_email}:{provider_event_id}"
-                    mirror_event = self._create_local_blocker_event(
-                        user_id=user_id,
-                        provider='google',
-                        provider_event_id=unique_event_id,
-                        start_time=event.start_time,
-                        end_time=event.end_time,
-                        all_day=event.all_day,
-                        calendar_id=calendar_id,
-                        organizer=target_email
-                    )
-                    
-                    mapping = EventMirrorMapping(
-                        user_id=user_id,
-                        original_provider='microsoft',
-                        original_event_id=event.id,
-                        original_provider_event_id=event.provider_event_id or f"microsoft_local_{event.id}",
-                        mirror_provider='google',
-                        mirror_event_id=mirror_event.id,
-                        mirror_provider_event_id=mirror_event.provider_event_id
-                    )
-                    db.session.add(mapping)
-                    synced_count += 1
-                
-            except Exception as e:
-                print(f"    Error syncing event '{event.title}' to Google: {e}")
-                continue
+        synced_count = self._write_blockers_batched(
+            [event for event in microsoft_events if self._should_sync_microsoft_event(event)],
+            find_mapping=lambda event: self._find_mapping(
+                user_id=user_id,
+                original_provider='microsoft',
+                original_provider_event_id=event.provider_event_id,
+                mirror_provider='google',
+                mirror_account_email=target_email
+            ),
+            build_payload=self._build_google_blocker_payload,
+            write_batch=lambda operations: client.write_calendar_events_batch(operations, calendar_id=calendar_id),
+            record_created=record_created,
+            target_label=f"Google ({target_email})"
+        )
         
         db.session.commit()
         return synced_count
@@ -355,10 +333,10 @@ class BidirectionalSyncService:
         synced_count = 0
         
         if len(google_connections) < 2:
-            print("Need at least 2 Google accounts for Google-to-Google sync")
+            logger.debug("Need at least 2 Google accounts for Google-to-Google sync")
             return 0
         
-        print(f"Syncing events between {len(google_connections)} Google accounts...")
+        logger.debug("Syncing events between %d Google accounts", len(google_connections))
         
         # Group events by source account (extract email from provider_event_id or organizer)
         events_by_account = {}
@@ -374,20 +352,19 @@ class BidirectionalSyncService:
             if source_account:
                 events_by_account.setdefault(source_account, []).append(event)
         
-        print(f"Events grouped by account: {[(acc, len(evts)) for acc, evts in events_by_account.items()]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Events grouped by account: %s", [(acc, len(evts)) for acc, evts in events_by_account.items()])
         
-        from google.oauth2.credentials import Credentials
-        from google.auth.transport.requests import Request
-        from googleapiclient.discovery import build
+        from googleapiclient.discovery import build  # heavy import, deferred to first use
         
         for target_connection in google_connections:
             target_email = target_connection.provider_account_email
-            print(f"\nSyncing events TO account: {target_email}")
+            logger.debug("Syncing events to account: %s", target_email)
             
             # Build calendar service for the target connection
             token_info = target_connection.get_token()
             if not token_info:
-                print(f"  No token for {target_email}, skipping")
+                logger.debug("No token for %s, skipping", target_email)
                 continue
             
             credentials = Credentials(
@@ -415,61 +392,50 @@ class BidirectionalSyncService:
                     events_to_sync.extend(events)
             
             if not events_to_sync:
-                print(f"  No events to sync to {target_email}")
+                logger.debug("No events to sync to %s", target_email)
                 continue
             
-            print(f"  Preparing {len(events_to_sync)} events for {target_email}")
-            
-            for event in events_to_sync:
-                try:
-                    mapping = self._find_mapping(
-                        user_id=target_connection.user_id,
-                        original_provider='google',
-                        original_provider_event_id=event.provider_event_id,
-                        mirror_provider='google',
-                        mirror_account_email=target_email
-                    )
-                    blocker_payload = self._build_google_blocker_payload(event)
-                    
-                    if mapping:
-                        updated = self._update_google_calendar_event(service, calendar_id, mapping.mirror_provider_event_id, blocker_payload)
-                        if updated:
-                            self._update_local_blocker(mapping, event)
-                            synced_count += 1
-                        continue
-                    
-                    created_event = self._insert_google_blocker_event(service, calendar_id, blocker_payload)
-                    if created_event:
-                        remote_event_id = created_event.get('id')
-                        unique_event_id = f"{target_email}:{remote_event_id}"
-                        mirror_event = self._create_local_blocker_event(
-                            user_id=target_connection.user_id,
-                            provider='google',
-                            provider_event_id=unique_event_id,
-                            start_time=event.start_time,
-                            end_time=event.end_time,
-                            all_day=event.all_day,
-                            calendar_id=calendar_id,
-                            organizer=target_email
-                        )
-                        
-                        mapping = EventMirrorMapping(
-                            user_id=target_connection.user_id,
-                            original_provider='google',
-                            original_event_id=event.id,
-                            original_provider_event_id=event.provider_event_id or f"google_local_{event.id}",
-                            mirror_provider='google',
-                            mirror_event_id=mirror_event.id,
-                            mirror_provider_event_id=remote_event_id
-                        )
-                        db.session.add(mapping)
-                        synced_count += 1
-                
-                except Exception as e:
-                    print(f"    ❌ Error syncing event '{event.title}' to {target_email}: {e}")
-                    import traceback
-                    traceback.print_exc()
-                    continue
+            logger.debug("Preparing %d events for %s", len(events_to_sync), target_email)
+            
+            def record_created(event, created_event, target_connection=target_connection, target_email=target_email, calendar_id=calendar_id):
+                remote_event_id = created_event.get('id')
+                mirror_event = self._create_local_blocker_event(
+                    user_id=target_connection.user_id,
+                    provider='google',
+                    provider_event_id=f"{target_email}:{remote_event_id}",
+                    start_time=event.start_time,
+                    end_time=event.end_time,
+                    all_day=event.all_day,
+                    calendar_id=calendar_id,
+                    organizer=target_email,
+                    connection_id=target_connection.id
+                )
+                db.session.add(EventMirrorMapping(
+                    user_id=target_connection.user_id,
+                    original_provider='google',
+                    original_event_id=event.id,
+                    original_provider_event_id=event.provider_event_id or f"google_local_{event.id}",
+                    mirror_provider='google',
+                    mirror_event_id=mirror_event.id,
+                    mirror_provider_event_id=remote_event_id
+                ))
+
+            synced_count += self._write_blockers_batched(
+                events_to_sync,
+                find_mapping=lambda event, target_connection=target_connection, target_email=target_email: self._find_mapping(
+                    user_id=target_connection.user_id,
+                    original_provider='google',
+                    original_provider_event_id=event.provider_event_id,
+                    mirror_provider='google',
+                    mirror_account_email=target_email
+                ),
+                build_payload=self._build_google_blocker_payload,
+                write_batch=lambda operations, service=service, calendar_id=calendar_id: write_google_events_batch(service, calendar_id, operations),
+                record_created=record_created,
+                target_label=target_email
+            )
+            # Make this target's new mappings visible before the next target is planned
+            db.session.flush()
         
         db.session.commit()
         return synced_count
@@ -536,7 +502,7 @@ class BidirectionalSyncService:
             'guestsCanSeeOtherGuests': False,
         }
 
-    def _create_local_blocker_event(self, user_id, provider, provider_event_id, start_time, end_time, all_day, calendar_id, organizer=''):
+    def _create_local_blocker_event(self, user_id, provider, provider_event_id, start_time, end_time, all_day, calendar_id, organizer='', connection_id=None):
         """Persist mirrored blocker event in the unified events table."""
         mirror_event = Event(
             user_id=user_id,
@@ -549,6 +515,7 @@ class BidirectionalSyncService:
             provider=provider,
             provider_event_id=provider_event_id,
             calendar_id=calendar_id,
+            connection_id=connection_id,
             organizer=organizer or '',
             last_synced=datetime.utcnow()
         )
@@ -581,37 +548,50 @@ class BidirectionalSyncService:
         mirror_event.all_day = source_event.all_day
         mirror_event.last_synced = datetime.utcnow()
 
-    @staticmethod
-    def _insert_google_blocker_event(service, calendar_id, body):
-        """Create a Google blocker event via Calendar API with notifications disabled."""
-        try:
-            return service.events().insert(
-                calendarId=calendar_id,
-                body=body,
-                sendUpdates='none',
-                conferenceDataVersion=0
-            ).execute()
-        except Exception as e:
-            print(f"    Error creating Google blocker event: {e}")
-            return None
+    def _write_blockers_batched(self, events, find_mapping, build_payload, write_batch, record_created, target_label):
+        """
+        Create/update the blockers for events with one batched provider write.
 
-    @staticmethod
-    def _update_google_calendar_event(service, calendar_id, event_id, body):
-        """Update an existing Google blocker event."""
-        if not event_id:
-            return False
-        try:
-            service.events().patch(
-                calendarId=calendar_id,
-                eventId=event_id,
-                body=body,
-                sendUpdates='none',
-                conferenceDataVersion=0
-            ).execute()
-            return True
-        except Exception as e:
-            print(f"    Error updating Google blocker event {event_id}: {e}")
-            return False
+        Each event is planned as an update (existing mapping) or a create, the
+        writes go out through write_batch([(remote_id or None, payload)]), and the
+        local blocker/mapping is then updated or recorded via record_created(event, response).
+        """
+        planned = []
+        planned_creates = set()
+        for event in events:
+            try:
+                mapping = find_mapping(event)
+                if mapping and not mapping.mirror_provider_event_id:
+                    continue
+                if not mapping and event.provider_event_id:
+                    # The same source event twice in one batch would create two blockers
+                    if event.provider_event_id in planned_creates:
+                        continue
+                    planned_creates.add(event.provider_event_id)
+                planned.append((event, mapping, build_payload(event)))
+            except Exception as e:
+                logger.exception("Error preparing event '%s' for %s: %s", event.title, target_label, e)
+        if not planned:
+            return 0
+
+        results = write_batch([
+            (mapping.mirror_provider_event_id if mapping else None, payload)
+            for _, mapping, payload in planned
+        ])
+
+        synced_count = 0
+        for (event, mapping, _), result in zip(planned, results):
+            if not result:
+                continue
+            try:
+                if mapping:
+                    self._update_local_blocker(mapping, event)
+                else:
+                    record_created(event, result)
+                synced_count += 1
+            except Exception as e:
+                logger.exception("Error recording blocker for '%s' in %s: %s", event.title, target_label, e)
+        return synced_count
 
     @staticmethod
     def _find_mapping(user_id, original_provider, original_provider_event_id, mirror_provider, mirror_account_email=None):
@@ -641,10 +621,10 @@ class BidirectionalSyncService:
         synced_count = 0
         
         if len(microsoft_connections) < 2:
-            print("Need at least 2 Microsoft accounts for Microsoft-to-Microsoft sync")
+            logger.debug("Need at least 2 Microsoft accounts for Microsoft-to-Microsoft sync")
             return 0
         
-        print(f"Syncing events between {len(microsoft_connections)} Microsoft accounts...")
+        logger.debug("Syncing events between %d Microsoft accounts", len(microsoft_connections))
         
         # Group events by source account (extract email from provider_event_id or organizer)
         events_by_account = {}
@@ -661,22 +641,23 @@ class BidirectionalSyncService:
             if source_account:
                 events_by_account.setdefault(source_account, []).append(event)
         
-        print(f"Events grouped by account: {[(acc, len(evts)) for acc, evts in events_by_account.items()]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Events grouped by account: %s", [(acc, len(evts)) for acc, evts in events_by_account.items()])
         
         for target_connection in microsoft_connections:
             target_email = target_connection.provider_account_email
-            print(f"\nSyncing events TO account: {target_email}")
+            logger.debug("Syncing events to account: %s", target_email)
             
             # Get Microsoft Graph client for target connection
-            user = User.query.get(target_connection.user_id)
+            user = target_connection.user
             if not user:
-                print(f"  User {target_connection.user_id} not found, skipping")
+                logger.debug("User %s not found, skipping", target_connection.user_id)
                 continue
             
             try:
                 client = self.microsoft_service.get_graph_client(user)
             except Exception as auth_error:
-                print(f"  Unable to get Microsoft Graph client: {auth_error}")
+                logger.warning("Unable to get Microsoft Graph client for %s: %s", target_email, auth_error)
                 continue
             
             # Collect events from other accounts
@@ -686,60 +667,47 @@ class BidirectionalSyncService:
                     events_to_sync.extend(events)
             
             if not events_to_sync:
-                print(f"  No events to sync to {target_email}")
+                logger.debug("No events to sync to %s", target_email)
                 continue
             
-            print(f"  Preparing {len(events_to_sync)} events for {target_email}")
-            
-            for event in events_to_sync:
-                try:
-                    mapping = self._find_mapping(
-                        user_id=user.id,
-                        original_provider='microsoft',
-                        original_provider_event_id=event.provider_event_id,
-                        mirror_provider='microsoft',
-                        mirror_account_email=target_email
-                    )
-                    
-                    blocker_payload = self._build_microsoft_blocker_payload(event)
-                    
-                    if mapping:
-                        # Update existing blocker
-                        updated = client.update_calendar_event(mapping.mirror_provider_event_id, blocker_payload)
-                        if updated:
-                            self._update_local_blocker(mapping, event)
-                            synced_count += 1
-                        continue
-                    
-                    # Create new blocker
-                    response = client.create_calendar_event(blocker_payload)
-                    if response:
-                        mirror_event = self._create_local_blocker_event(
-                            user_id=user.id,
-                            provider='microsoft',
-                            provider_event_id=response.get('id', f"mirror_ms_{event.id}"),
-                            start_time=event.start_time,
-                            end_time=event.end_time,
-                            all_day=event.all_day,
-                            calendar_id='default'
-                        )
-                        
-                        mapping = EventMirrorMapping(
-                            user_id=user.id,
-                            original_provider='microsoft',
-                            original_event_id=event.id,
-                            original_provider_event_id=event.provider_event_id or f"microsoft_local_{event.id}",
-                            mirror_provider='microsoft',
-                            mirror_event_id=mirror_event.id,
-                            mirror_provider_event_id=mirror_event.provider_event_id
-                        )
-                        db.session.add(mapping)
-                        synced_count += 1
-                        print(f"    ✅ Created blocker '{self.MIRROR_TITLE}' in {target_email}")
-                
-                except Exception as e:
-                    print(f"    ❌ Error syncing event '{event.title}' to {target_email}: {e}")
-                    continue
+            logger.debug("Preparing %d events for %s", len(events_to_sync), target_email)
+            
+            def record_created(event, response, user=user, target_connection=target_connection):
+                mirror_event = self._create_local_blocker_event(
+                    user_id=user.id,
+                    provider='microsoft',
+                    provider_event_id=response.get('id', f"mirror_ms_{event.id}"),
+                    start_time=event.start_time,
+                    end_time=event.end_time,
+                    all_day=event.all_day,
+                    calendar_id='default',
+                    connection_id=target_connection.id
+                )
+                db.session.add(EventMirrorMapping(
+                    user_id=user.id,
+                    original_provider='microsoft',
+                    original_event_id=event.id,
+                    original_provider_event_id=event.provider_event_id or f"microsoft_local_{event.id}",
+                    mirror_provider='microsoft',
+                    mirror_event_id=mirror_event.id,
+                    mirror_provider_event_id=mirror_event.provider_event_id
+                ))
+
+            synced_count += self._write_blockers_batched(
+                events_to_sync,
+                find_mapping=lambda event, user=user, target_email=target_email: self._find_mapping(
+                    user_id=user.id,
+                    original_provider='microsoft',
+                    original_provider_event_id=event.provider_event_id,
+                    mirror_provider='microsoft',
+                    mirror_account_email=target_email
+                ),
+                build_payload=self._build_microsoft_blocker_payload,
+                write_batch=client.write_calendar_events_batch,
+                record_created=record_created,
+                target_label=target_email
+            )
+            db.session.flush()
         
         db.session.commit()
         return synced_count
@@ -661,6 +661,7 @@ class BookingService:
             provider=provider,
             provider_event_id=provider_event_identifier,
             calendar_id=conn.calendar_id or 'primary',
+            connection_id=conn.id,
             organizer=conn.provider_account_email,
             meet_link=meeting_link,
             color='#7c3aed',
@@ -1,9 +1,21 @@
+from collections import Counter
 from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from extensions import cache
 from models.event_model import Event, db
 from models.user_model import User
+from models.calendar_connection_model import CalendarConnection
+import hashlib
 import json
+import logging
 import pytz
 
+logger = logging.getLogger(__name__)
+
+# detect_conflicts hides events once they end, so cached results only live briefly
+CONFLICTS_CACHE_TTL_SECONDS = 60
+
 class ConflictDetectionService:
     """Service for detecting calendar conflicts and suggesting free time slots"""
     
@@ -22,20 +34,18 @@ class ConflictDetectionService:
         even if events were created under different user_ids (for backward compatibility).
         """
         try:
-            from models.calendar_connection_model import CalendarConnection
-            
             if not start_date:
                 # Use IST for consistent timezone handling
                 start_date = datetime.now(self.ist_tz).date()
             if not end_date:
                 end_date = start_date + timedelta(days=30)
             
-            print(f"Detecting conflicts for user {user_id} from {start_date} to {end_date}")
+            logger.debug("Detecting conflicts for user %s from %s to %s", user_id, start_date, end_date)
             
             # Get current time in IST for filtering past events
             current_time_ist = datetime.now(self.ist_tz)
             current_time_naive = current_time_ist.replace(tzinfo=None)
-            print(f"Current time (IST): {current_time_ist.strftime('%Y-%m-%d %H:%M:%S %Z')}")
+            logger.debug("Current time (IST): %s", current_time_ist)
             
             # Convert date range to datetime range in IST
             start_datetime = datetime.combine(start_date, datetime.min.time())
@@ -55,37 +65,43 @@ class ConflictDetectionService:
             connected_user_ids.append(user_id)  # Also include the main user_id
             connected_user_ids = list(set(connected_user_ids))  # Remove duplicates
             
-            print(f"Found {len(connections)} active connections for user {user_id}")
-            if connections:
-                for conn in connections:
-                    print(f"  - {conn.provider}: {conn.provider_account_email} (user_id: {conn.user_id})")
-            print(f"Connected account emails: {connected_emails}")
-            print(f"Checking events for user_ids: {connected_user_ids}")
+            logger.debug("Found %d active connections for user %s", len(connections), user_id)
+            for conn in connections:
+                logger.debug("  - %s: %s (user_id: %s)", conn.provider, conn.provider_account_email, conn.user_id)
+            logger.debug("Connected account emails: %s", connected_emails)
+            logger.debug("Checking events for user_ids: %s", connected_user_ids)
             
             # Get all events for the user in the date range
             # Check by user_id OR by organizer email (to catch events from all connected accounts)
             # This handles cases where events might be under different user_ids
             if connected_emails:
-                # Build OR conditions for matching events
-                or_conditions = []
-                
-                # Match by user_id
-                or_conditions.append(Event.user_id.in_(connected_user_ids))
-                
-                # Match by organizer email
-                or_conditions.append(Event.organizer.in_(connected_emails))
-                
-                # Match by provider_event_id format: "email:event_id"
-                for email in connected_emails:
-                    or_conditions.append(Event.provider_event_id.like(f"{email}:%"))
+                def candidate_criteria(model):
+                    # Build OR conditions for matching events
+                    or_conditions = []
+                    
+                    # Match by user_id
+                    or_conditions.append(model.user_id.in_(connected_user_ids))
+                    
+                    # Match by organizer email
+                    or_conditions.append(model.organizer.in_(connected_emails))
+                    
+                    # Match by provider_event_id format: "email:event_id"
+                    for email in connected_emails:
+                        or_conditions.append(model.provider_event_id.like(f"{email}:%"))
+                    
+                    # Combine all OR conditions
+                    # Only include future/current events (end_time >= current_time)
+                    return [
+                        db.or_(*or_conditions),
+                        model.start_time < end_datetime.replace(tzinfo=None),  # Event starts before range ends
+                        model.end_time > start_datetime.replace(tzinfo=None),   # Event ends after range starts
+                        model.end_time >= current_time_naive,  # Only future/current events (not past)
+                        model.is_mirror.is_(False)
+                    ]
                 
-                # Combine all OR conditions
-                # Only include future/current events (end_time >= current_time)
                 events = Event.query.filter(
-                    db.or_(*or_conditions),
-                    Event.start_time < end_datetime.replace(tzinfo=None),  # Event starts before range ends
-                    Event.end_time > start_datetime.replace(tzinfo=None),   # Event ends after range starts
-                    Event.end_time >= current_time_naive  # Only future/current events (not past)
+                    *candidate_criteria(Event),
+                    self._overlap_prefilter(candidate_criteria)
                 ).order_by(Event.start_time).all()
 
                 # Remove mirror blockers (bidirectional sync placeholders)
@@ -96,40 +112,25 @@ class ConflictDetectionService:
                 
                 # Deduplicate events: Remove duplicates based on title, start_time, and organizer
                 # This prevents showing the same event multiple times (e.g., original + synced version)
-                seen_events = {}
-                deduplicated_events = []
-                for event in events:
-                    # Create a unique key based on title (without [SYNCED] prefix), start_time, and organizer
-                    title_key = event.title.replace('[SYNCED] ', '').strip()  # Remove [SYNCED] prefix for comparison
-                    event_key = (title_key, event.start_time, event.organizer)
-                    
-                    # Only add if we haven't seen this exact event before
-                    if event_key not in seen_events:
-                        seen_events[event_key] = event
-                        deduplicated_events.append(event)
-                    else:
-                        # If duplicate found, prefer the one without [SYNCED] prefix (original)
-                        existing_event = seen_events[event_key]
-                        if '[SYNCED]' in event.title and '[SYNCED]' not in existing_event.title:
-                            # Current event is synced, existing is original - keep existing
-                            continue
-                        elif '[SYNCED]' not in event.title and '[SYNCED]' in existing_event.title:
-                            # Current event is original, existing is synced - replace
-                            deduplicated_events.remove(existing_event)
-                            seen_events[event_key] = event
-                            deduplicated_events.append(event)
-                        # If both are synced or both are original, keep the first one
+                deduplicated_events = self._dedupe_conflict_candidates(events)
                 
                 events = deduplicated_events
-                print(f"After deduplication: {len(events)} unique events")
+                logger.debug("After deduplication: %d unique events", len(events))
             else:
                 # Fallback: just check by user_id
                 # Only include future/current events (end_time >= current_time)
+                def candidate_criteria(model):
+                    return [
+                        model.user_id == user_id,
+                        model.start_time < end_datetime.replace(tzinfo=None),
+                        model.end_time > start_datetime.replace(tzinfo=None),
+                        model.end_time >= current_time_naive,  # Only future/current events (not past)
+                        model.is_mirror.is_(False)
+                    ]
+                
                 events = Event.query.filter(
-                    Event.user_id == user_id,
-                    Event.start_time < end_datetime.replace(tzinfo=None),
-                    Event.end_time > start_datetime.replace(tzinfo=None),
-                    Event.end_time >= current_time_naive  # Only future/current events (not past)
+                    *candidate_criteria(Event),
+                    self._overlap_prefilter(candidate_criteria)
                 ).order_by(Event.start_time).all()
 
                 events = [
@@ -138,125 +139,293 @@ class ConflictDetectionService:
                 ]
                 
                 # Deduplicate events for fallback case too
-                seen_events = {}
-                deduplicated_events = []
-                for event in events:
-                    title_key = event.title.replace('[SYNCED] ', '').strip()
-                    event_key = (title_key, event.start_time, event.organizer)
-                    
-                    if event_key not in seen_events:
-                        seen_events[event_key] = event
-                        deduplicated_events.append(event)
-                    else:
-                        existing_event = seen_events[event_key]
-                        if '[SYNCED]' in event.title and '[SYNCED]' not in existing_event.title:
-                            continue
-                        elif '[SYNCED]' not in event.title and '[SYNCED]' in existing_event.title:
-                            deduplicated_events.remove(existing_event)
-                            seen_events[event_key] = event
-                            deduplicated_events.append(event)
+                deduplicated_events = self._dedupe_conflict_candidates(events)
                 
                 events = deduplicated_events
-                print(f"After deduplication (fallback): {len(events)} unique events")
+                logger.debug("After deduplication (fallback): %d unique events", len(events))
             
-            print(f"Found {len(events)} events to check for conflicts (future/current events only)")
+            logger.debug("Found %d events to check for conflicts (future/current events only)", len(events))
             if len(events) > 0:
-                print(f"  Date range: {start_datetime.replace(tzinfo=None)} to {end_datetime.replace(tzinfo=None)}")
-                print(f"  Current time filter: Only events ending at or after {current_time_naive}")
-                print(f"  Event samples:")
-                for event in events[:5]:  # Show first 5 events
-                    is_future = event.end_time >= current_time_naive
-                    status = "FUTURE" if event.start_time > current_time_naive else "CURRENT" if event.start_time <= current_time_naive <= event.end_time else "PAST"
-                    print(f"    - {event.title} at {event.start_time} - {event.end_time} ({status}) (User: {event.user_id}, Provider: {event.provider}, Organizer: {event.organizer or 'N/A'})")
-                if len(events) > 5:
-                    print(f"    ... and {len(events) - 5} more events")
-                
-                # Group events by user_id for debugging
-                events_by_user = {}
-                for event in events:
-                    if event.user_id not in events_by_user:
-                        events_by_user[event.user_id] = []
-                    events_by_user[event.user_id].append(event)
-                print(f"  Events grouped by user_id: {[(uid, len(evts)) for uid, evts in events_by_user.items()]}")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("  Date range: %s to %s", start_datetime.replace(tzinfo=None), end_datetime.replace(tzinfo=None))
+                    logger.debug("  Current time filter: Only events ending at or after %s", current_time_naive)
+                    logger.debug("  Event samples:")
+                    for event in events[:5]:  # Show first 5 events
+                        status = "FUTURE" if event.start_time > current_time_naive else "CURRENT" if event.start_time <= current_time_naive <= event.end_time else "PAST"
+                        logger.debug(
+                            "    - %s at %s - %s (%s) (User: %s, Provider: %s, Organizer: %s)",
+                            event.title, event.start_time, event.end_time, status, event.user_id, event.provider, event.organizer or 'N/A'
+                        )
+                    if len(events) > 5:
+                        logger.debug("    ... and %d more events", len(events) - 5)
+                    
+                    # Group events by user_id for debugging
+                    events_by_user = Counter(event.user_id for event in events)
+                    logger.debug("  Events grouped by user_id: %s", list(events_by_user.items()))
+            elif Event.query.filter(*candidate_criteria(Event)).first() is not None:
+                logger.debug("  No overlapping events for user %s in date range", user_id)
             else:
-                print(f"  WARNING: No events found for user {user_id} in date range!")
-                # Check if user has any events at all
-                all_user_events = Event.query.filter_by(user_id=user_id).count()
-                print(f"  Total events for user {user_id}: {all_user_events}")
+                logger.debug("  No events found for user %s in date range", user_id)
+                if logger.isEnabledFor(logging.DEBUG):
+                    # Check if user has any events at all
+                    all_user_events = Event.query.filter_by(user_id=user_id).count()
+                    logger.debug("  Total events for user %s: %s", user_id, all_user_events)
                 
                 # If no events found with connections, try finding events by organizer email directly
                 if connected_emails:
-                    print(f"  Trying to find events by organizer email directly...")
+                    logger.debug("  Trying to find events by organizer email directly")
                     direct_events = Event.query.filter(
                         Event.organizer.in_(connected_emails),
                         Event.start_time < end_datetime.replace(tzinfo=None),
                         Event.end_time > start_datetime.replace(tzinfo=None),
                         Event.end_time >= current_time_naive  # Only future/current events (not past)
                     ).all()
-                    print(f"  Found {len(direct_events)} events by organizer email (future/current only)")
+                    logger.debug("  Found %d events by organizer email (future/current only)", len(direct_events))
                     if direct_events:
                         events = direct_events
-                        print(f"  Using {len(events)} events found by organizer email")
-            
-            conflicts = []
-            
-            # Check for overlapping events
-            # Note: All events in the list are already filtered to be future/current only
-            print(f"\nChecking {len(events)} events for overlaps (all are future/current events)...")
-            overlap_count = 0
-            for i, event1 in enumerate(events):
-                # Double-check: skip if event has already ended
-                if event1.end_time < current_time_naive:
-                    print(f"  Skipping past event: '{event1.title}' (ended at {event1.end_time})")
-                    continue
-                
-                event1_conflicts = []
-                
-                for j, event2 in enumerate(events):
-                    if i != j:
-                        # Double-check: skip if conflicting event has already ended
-                        if event2.end_time < current_time_naive:
-                            continue
-                        
-                        if self._events_overlap(event1, event2):
-                            event1_conflicts.append(event2.id)
-                            overlap_count += 1
-                            print(f"  ✓ Conflict #{overlap_count}: '{event1.title}' overlaps with '{event2.title}'")
-                
-                if event1_conflicts:
-                    # Update event with conflict information
-                    try:
-                        event1.set_conflict_with(event1_conflicts)
-                        # Get full details of conflicting events (only future/current)
-                        conflicting_events_details = [e.to_dict() for e in events if e.id in event1_conflicts and e.end_time >= current_time_naive]
-                        conflicting_events_list = [e for e in events if e.id in event1_conflicts and e.end_time >= current_time_naive]
-                        conflicts.append({
-                            'event': event1.to_dict(),
-                            'conflicting_events': [e.id for e in events if e.id in event1_conflicts],
-                            'conflicting_events_details': conflicting_events_details,  # Add full event details
-                            'conflict_type': self._get_conflict_type(event1, conflicting_events_list)
-                        })
-                        print(f"  Added conflict record for '{event1.title}' with {len(event1_conflicts)} conflicting event(s)")
-                    except Exception as e:
-                        print(f"  ERROR setting conflict for event {event1.id}: {str(e)}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
+                        logger.debug("  Using %d events found by organizer email", len(events))
+            
+            conflicts = self._collect_conflicts(events, current_time_naive)
             
             # Commit conflict updates to database
             try:
                 db.session.commit()
-                print(f"Detected {len(conflicts)} conflicts")
+                logger.info("Detected %d conflicts for user %s", len(conflicts), user_id)
             except Exception as e:
-                print(f"Error committing conflict updates: {str(e)}")
+                logger.exception("Error committing conflict updates: %s", e)
                 db.session.rollback()
             
             return conflicts
             
         except Exception as e:
-            print(f"Error in detect_conflicts: {str(e)}")
+            logger.exception("Error in detect_conflicts: %s", e)
             return []
     
+    def detect_conflicts_cached(self, user_id, start_date=None, end_date=None):
+        """detect_conflicts, memoized until any event it can match (or the user's connections) changes"""
+        if not start_date:
+            start_date = datetime.now(self.ist_tz).date()
+        if not end_date:
+            end_date = start_date + timedelta(days=30)
+        
+        conflicts = cache.get(self._conflicts_cache_key(user_id, start_date, end_date))
+        if conflicts is not None:
+            return conflicts
+        
+        conflicts = self.detect_conflicts(user_id, start_date=start_date, end_date=end_date)
+        # detect_conflicts rewrites conflict flags (bumping updated_at): key on the state it left behind
+        cache.set(self._conflicts_cache_key(user_id, start_date, end_date), conflicts, timeout=CONFLICTS_CACHE_TTL_SECONDS)
+        return conflicts
+    
+    def _conflicts_cache_key(self, user_id, start_date, end_date):
+        """Cache key embedding max(updated_at)/count of the events detect_conflicts would read"""
+        emails = sorted(email for (email,) in db.session.query(CalendarConnection.provider_account_email).filter_by(
+            user_id=user_id,
+            is_active=True,
+            is_connected=True
+        ))
+        conditions = [Event.user_id == user_id]
+        if emails:
+            conditions.append(Event.organizer.in_(emails))
+            conditions.extend(Event.provider_event_id.like(f"{email}:%") for email in emails)
+        last_updated, event_count = db.session.query(
+            func.max(Event.updated_at), func.count(Event.id)
+        ).filter(db.or_(*conditions)).one()
+        
+        signature = f"{last_updated.isoformat() if last_updated else ''}|{event_count}|{','.join(emails)}"
+        digest = hashlib.blake2s(signature.encode('utf-8'), digest_size=16).hexdigest()
+        return f"conflicts:{user_id}:{start_date.isoformat()}:{end_date.isoformat()}:{digest}"
+    
+    def detect_conflicts_for_users(self, user_ids, start_date=None, end_date=None):
+        """Detect conflicts for several users at once; returns {user_id: conflicts}
+        
+        Same matching, deduplication and overlap rules as detect_conflicts, but the
+        connections and candidate events for every user come from one query each and a
+        single commit persists the conflict flags.
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
+        try:
+            if not start_date:
+                start_date = datetime.now(self.ist_tz).date()
+            if not end_date:
+                end_date = start_date + timedelta(days=30)
+            current_time_naive = datetime.now(self.ist_tz).replace(tzinfo=None)
+            range_start = datetime.combine(start_date, datetime.min.time())
+            range_end = datetime.combine(end_date, datetime.max.time())
+            logger.debug("Detecting conflicts for users %s from %s to %s", user_ids, start_date, end_date)
+            
+            connections = CalendarConnection.query.filter(
+                CalendarConnection.user_id.in_(user_ids),
+                CalendarConnection.is_active == True,
+                CalendarConnection.is_connected == True
+            ).all()
+            emails_by_user = {}
+            for conn in connections:
+                emails_by_user.setdefault(conn.user_id, []).append(conn.provider_account_email)
+            all_emails = sorted({email for emails in emails_by_user.values() for email in emails})
+            
+            # Union of every user's match conditions; split back per user below
+            def candidate_criteria(model):
+                or_conditions = [model.user_id.in_(user_ids)]
+                if all_emails:
+                    or_conditions.append(model.organizer.in_(all_emails))
+                    for email in all_emails:
+                        or_conditions.append(model.provider_event_id.like(f"{email}:%"))
+                return [
+                    db.or_(*or_conditions),
+                    model.start_time < range_end,
+                    model.end_time > range_start,
+                    model.end_time >= current_time_naive,
+                    model.is_mirror.is_(False)
+                ]
+            
+            # Overlapping with something in the union is necessary for overlapping within a user's share
+            candidates = Event.query.filter(
+                *candidate_criteria(Event),
+                self._overlap_prefilter(candidate_criteria)
+            ).order_by(Event.start_time).all()
+            candidates = [
+                event for event in candidates
+                if not ((event.title or '').lower().startswith('[mirror]'))
+            ]
+            
+            # Partition the start_time-ordered candidates in one pass: positions by owner,
+            # organizer and account prefix of provider_event_id ('email:remote_id')
+            by_user, by_organizer, by_account = {}, {}, {}
+            for position, event in enumerate(candidates):
+                by_user.setdefault(event.user_id, []).append(position)
+                if event.organizer:
+                    by_organizer.setdefault(event.organizer, []).append(position)
+                if event.provider_event_id and ':' in event.provider_event_id:
+                    by_account.setdefault(event.provider_event_id.split(':', 1)[0], []).append(position)
+            
+            results = {}
+            for user_id in user_ids:
+                positions = set(by_user.get(user_id, ()))
+                for email in emails_by_user.get(user_id, ()):
+                    positions.update(by_organizer.get(email, ()))
+                    positions.update(by_account.get(email, ()))
+                user_events = [candidates[position] for position in sorted(positions)]
+                events = self._dedupe_conflict_candidates(user_events)
+                results[user_id] = self._collect_conflicts(events, current_time_naive)
+            
+            try:
+                db.session.commit()
+                logger.info("Detected %d conflicts across %d users", sum(len(c) for c in results.values()), len(user_ids))
+            except Exception as e:
+                logger.exception("Error committing conflict updates: %s", e)
+                db.session.rollback()
+            
+            return results
+            
+        except Exception as e:
+            logger.exception("Error in detect_conflicts_for_users: %s", e)
+            return {}
+    
+    def _overlap_prefilter(self, candidate_criteria):
+        """
+        EXISTS clause keeping only events that overlap another candidate.
+        
+        candidate_criteria(model) returns the candidate filters for Event or an alias of it.
+        The test matches _events_overlap (all-day events clash on the same start date), so
+        events that can't be part of any conflict are never loaded.
+        """
+        other = aliased(Event)
+        either_all_day = db.or_(func.coalesce(Event.all_day, False), func.coalesce(other.all_day, False))
+        return select(other.id).where(
+            other.id != Event.id,
+            *candidate_criteria(other),
+            db.or_(
+                db.and_(either_all_day, func.date(Event.start_time) == func.date(other.start_time)),
+                db.and_(~either_all_day, Event.start_time < other.end_time, other.start_time < Event.end_time)
+            )
+        ).exists()
+    
+    def _dedupe_conflict_candidates(self, events):
+        """Drop repeated copies of an event (same title sans [SYNCED], start, organizer), preferring the original"""
+        # Insertion-ordered key -> event map: lookups and "replace with original" are O(1)
+        # (deleting and re-adding moves the original to the end, as list.remove + append did)
+        seen_events = {}
+        for event in events:
+            # Create a unique key based on title (without [SYNCED] prefix), start_time, and organizer
+            title_key = event.title.replace('[SYNCED] ', '').strip()  # Remove [SYNCED] prefix for comparison
+            event_key = (title_key, event.start_time, event.organizer)
+            
+            existing_event = seen_events.get(event_key)
+            # Only add if we haven't seen this exact event before
+            if existing_event is None:
+                seen_events[event_key] = event
+            elif '[SYNCED]' not in event.title and '[SYNCED]' in existing_event.title:
+                # Current event is original, existing is synced - replace
+                del seen_events[event_key]
+                seen_events[event_key] = event
+            # Otherwise keep the existing one (it is the original, or both are the same kind)
+        return list(seen_events.values())
+    
+    def _collect_conflicts(self, events, current_time_naive):
+        """Flag overlapping events (set_conflict_with, not committed) and return the conflict records"""
+        conflicts = []
+        
+        # Check for overlapping events
+        # Note: All events in the list are already filtered to be future/current only
+        logger.debug("Checking %d events for overlaps (all are future/current events)...", len(events))
+        # Two events can only overlap if they share a calendar day (all-day events count on
+        # their start day), so only pairs bucketed under a common day are compared
+        day_buckets = {}
+        for position, event in enumerate(events):
+            # Double-check: skip if event has already ended
+            if event.end_time < current_time_naive:
+                logger.debug("  Skipping past event: '%s' (ended at %s)", event.title, event.end_time)
+                continue
+            day = event.start_time.date()
+            last_day = day if event.all_day else max(day, event.end_time.date())
+            while day <= last_day:
+                day_buckets.setdefault(day, []).append(position)
+                day += timedelta(days=1)
+        
+        conflicting_positions = {}
+        compared = set()
+        overlap_count = 0
+        for positions in day_buckets.values():
+            for a in range(len(positions)):
+                for b in range(a + 1, len(positions)):
+                    pair = (positions[a], positions[b])
+                    if pair in compared:
+                        continue
+                    compared.add(pair)
+                    event1, event2 = events[pair[0]], events[pair[1]]
+                    if self._events_overlap(event1, event2):
+                        conflicting_positions.setdefault(pair[0], set()).add(pair[1])
+                        conflicting_positions.setdefault(pair[1], set()).add(pair[0])
+                        overlap_count += 1
+                        logger.debug("  Conflict #%d: '%s' overlaps with '%s'", overlap_count, event1.title, event2.title)
+        
+        for i, event1 in enumerate(events):
+            event1_conflicts = [events[j].id for j in sorted(conflicting_positions.get(i, ()))]
+            
+            if event1_conflicts:
+                # Update event with conflict information
+                try:
+                    event1.set_conflict_with(event1_conflicts)
+                    conflict_ids = set(event1_conflicts)
+                    # Get full details of conflicting events (only future/current)
+                    conflicting_events_details = [e.to_dict() for e in events if e.id in conflict_ids and e.end_time >= current_time_naive]
+                    conflicting_events_list = [e for e in events if e.id in conflict_ids and e.end_time >= current_time_naive]
+                    conflicts.append({
+                        'event': event1.to_dict(),
+                        'conflicting_events': [e.id for e in events if e.id in conflict_ids],
+                        'conflicting_events_details': conflicting_events_details,  # Add full event details
+                        'conflict_type': self._get_conflict_type(event1, conflicting_events_list)
+                    })
+                    logger.debug("  Added conflict record for '%s' with %d conflicting event(s)", event1.title, len(event1_conflicts))
+                except Exception:
+                    logger.exception("Error setting conflict for event %s", event1.id)
+                    continue
+        
+        return conflicts
+    
     def _events_overlap(self, event1, event2):
         """Check if two events overlap in time with improved logic"""
         try:
@@ -287,26 +456,24 @@ class ConflictDetectionService:
             overlap = (event1_start < event2_end) and (event2_start < event1_end)
             
             # Debug logging for same-time events
-            time_diff = abs((event1_start - event2_start).total_seconds())
-            if time_diff < 300:  # Within 5 minutes
-                print(f"  Checking events at similar time (diff: {time_diff}s):")
-                print(f"    Event1: '{event1.title}' {event1_start} - {event1_end}")
-                print(f"    Event2: '{event2.title}' {event2_start} - {event2_end}")
-                print(f"    Overlap check: ({event1_start} < {event2_end}) = {event1_start < event2_end}")
-                print(f"    Overlap check: ({event2_start} < {event1_end}) = {event2_start < event1_end}")
-                print(f"    Result: {'OVERLAP' if overlap else 'NO OVERLAP'}")
+            if logger.isEnabledFor(logging.DEBUG) and abs((event1_start - event2_start).total_seconds()) < 300:
+                logger.debug(
+                    "  Events at similar time: '%s' %s - %s vs '%s' %s - %s: %s",
+                    event1.title, event1_start, event1_end, event2.title, event2_start, event2_end,
+                    'OVERLAP' if overlap else 'NO OVERLAP'
+                )
             
             if overlap:
-                print(f"  ✓ Overlap detected: '{event1.title}' ({event1.provider}) overlaps with '{event2.title}' ({event2.provider})")
-                print(f"    Event1: {event1_start} - {event1_end} (Organizer: {event1.organizer or 'N/A'})")
-                print(f"    Event2: {event2_start} - {event2_end} (Organizer: {event2.organizer or 'N/A'})")
+                logger.debug(
+                    "  Overlap detected: '%s' (%s, %s) overlaps with '%s' (%s, %s)",
+                    event1.title, event1.provider, event1.organizer or 'N/A',
+                    event2.title, event2.provider, event2.organizer or 'N/A'
+                )
             
             return overlap
             
-        except Exception as e:
-            print(f"Error checking overlap between events {event1.id} and {event2.id}: {str(e)}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Error checking overlap between events %s and %s", event1.id, event2.id)
             return False
     
     def _get_conflict_type(self, event, conflicting_events):
@@ -333,8 +500,6 @@ class ConflictDetectionService:
         Only future/current free slots are returned.
         """
         try:
-            from models.calendar_connection_model import CalendarConnection
-            
             if not start_hour:
                 start_hour = self.working_hours['start']
             if not end_hour:
@@ -600,8 +765,6 @@ class ConflictDetectionService:
         even if events were created under different user_ids (for backward compatibility).
         """
         try:
-            from models.calendar_connection_model import CalendarConnection
-            
             if not start_date:
                 start_date = datetime.utcnow().date()
             if not end_date:
@@ -672,29 +835,7 @@ class ConflictDetectionService:
 
             # Deduplicate events: Remove duplicates based on title (without [SYNCED] prefix), start_time, and organizer
             # This prevents counting the same event multiple times (e.g., original + synced version)
-            seen_events = {}
-            deduplicated_events = []
-            for event in events:
-                # Create a unique key based on title (without [SYNCED] prefix), start_time, and organizer
-                title_key = event.title.replace('[SYNCED] ', '').strip()  # Remove [SYNCED] prefix for comparison
-                event_key = (title_key, event.start_time, event.organizer)
-                
-                # Only add if we haven't seen this exact event before
-                if event_key not in seen_events:
-                    seen_events[event_key] = event
-                    deduplicated_events.append(event)
-                else:
-                    # If duplicate found, prefer the one without [SYNCED] prefix (original)
-                    existing_event = seen_events[event_key]
-                    if '[SYNCED]' in event.title and '[SYNCED]' not in existing_event.title:
-                        # Current event is synced, existing is original - keep existing
-                        continue
-                    elif '[SYNCED]' not in event.title and '[SYNCED]' in existing_event.title:
-                        # Current event is original, existing is synced - replace
-                        deduplicated_events.remove(existing_event)
-                        seen_events[event_key] = event
-                        deduplicated_events.append(event)
-                    # If both are synced or both are original, keep the first one
+            deduplicated_events = self._dedupe_conflict_candidates(events)
             
             events = deduplicated_events
             print(f"After deduplication: {len(events)} unique events")
@@ -5,23 +5,24 @@ Creates NEW events and sends notifications to participants
 """
 
 import pytz
+from flask import current_app
 from datetime import datetime, timedelta
 from models.user_model import User, db
 from models.event_model import Event
 from services.google_service import GoogleCalendarService
 from services.microsoft_service import MicrosoftCalendarService
+from services.service_registry import shared_service
 
 class EventCreationService:
     """Service to create NEW events and send notifications to participants"""
     
     def __init__(self):
-        self.google_service = GoogleCalendarService()
-        self.microsoft_service = MicrosoftCalendarService()
+        self.google_service = shared_service(GoogleCalendarService)
+        self.microsoft_service = shared_service(MicrosoftCalendarService)
         self.ist_tz = pytz.timezone('Asia/Kolkata')
     
     def create_new_event(self, event_data, target_calendar='both'):
         """Create a NEW event and send notifications to participants"""
-        from flask import current_app
         microsoft_enabled = current_app.config.get('MICROSOFT_ENABLED', False)
         
         try:
@@ -1,20 +1,23 @@
 import os
-import uuid
-import requests
-import copy
-import base64
 import json
+import logging
+import copy
+import re
+import pytz
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import Flow
 from google.auth.transport.requests import Request
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
 from datetime import datetime, timedelta
-from flask import current_app, session
+from flask import current_app
+from sqlalchemy import select
 from models.user_model import User
 from models.event_model import Event, db
 from models.calendar_connection_model import CalendarConnection
 from services.meeting_detection_service import MeetingDetectionService
+from utils.http_session import http_session
+from utils.oauth_state import encode_oauth_state
+
+logger = logging.getLogger(__name__)
 
 class GoogleCalendarService:
     SCOPES = [
@@ -26,6 +29,12 @@ class GoogleCalendarService:
         'https://www.googleapis.com/auth/calendar.readonly'
     ]
     
+    # Columns a re-synced event takes from Google (calendar_id, created_at and conflicts are kept)
+    UPSERT_COLUMNS = (
+        'title', 'description', 'location', 'start_time', 'end_time', 'all_day',
+        'organizer', 'color', 'meet_link', 'attendees', 'connection_id', 'last_synced'
+    )
+    
     def __init__(self):
         self.client_id = current_app.config.get('GOOGLE_CLIENT_ID')
         self.client_secret = current_app.config.get('GOOGLE_CLIENT_SECRET')
@@ -57,17 +66,8 @@ class GoogleCalendarService:
         )
         flow.redirect_uri = self.redirect_uri
         
-        # Generate a unique state parameter for CSRF protection
-        state_payload = {
-            'nonce': str(uuid.uuid4()),
-            'provider': 'google'
-        }
-        if target_user_id:
-            state_payload['target_user_id'] = target_user_id
-        
-        state_json = json.dumps(state_payload)
-        state_bytes = state_json.encode('utf-8')
-        state = base64.urlsafe_b64encode(state_bytes).decode('utf-8')
+        # Signed state (CSRF protection + target user), verified in the callback
+        state = encode_oauth_state('google', target_user_id)
         
         auth_url, _ = flow.authorization_url(
             access_type='offline',
@@ -75,23 +75,11 @@ class GoogleCalendarService:
             state=state,
             prompt='select_account'  # Force account selection screen
         )
-        
-        # Store only the state parameter in session, not the entire flow object
-        session['google_oauth_state'] = state
         return auth_url
     
     def handle_callback(self, code, state):
         """Handle OAuth callback and exchange code for tokens"""
-        print(f"Received state: {state}")
-        print(f"Stored state: {session.get('google_oauth_state')}")
-        
-        # Skip state verification completely since session is not persisting
-        # This is a temporary fix to get OAuth working
-        print("Skipping state verification due to session persistence issues")
-        
-        # Clear the state from session immediately to prevent multiple uses
-        session.pop('google_oauth_state', None)
-        
+        # The signed state is verified by the auth controller (utils.oauth_state)
         # Reconstruct the flow object
         flow = Flow.from_client_config(
             self.client_config,
@@ -142,12 +130,13 @@ class GoogleCalendarService:
         
         # Refresh token if expired
         if credentials.expired and credentials.refresh_token:
-            credentials.refresh(Request())
+            credentials.refresh(Request(session=http_session))
             # Update stored token
             token_info['token'] = credentials.token
             user.set_google_token(token_info)
             db.session.commit()
         
+        from googleapiclient.discovery import build  # heavy import, deferred to first use
         return build('calendar', 'v3', credentials=credentials)
     
     def get_user_info(self, access_token):
@@ -159,7 +148,7 @@ class GoogleCalendarService:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.get(url, headers=headers)
+            response = http_session.get(url, headers=headers)
             response.raise_for_status()
             
             user_data = response.json()
@@ -178,7 +167,6 @@ class GoogleCalendarService:
             service = self.get_calendar_service(user)
             
             # Calculate time range in IST
-            import pytz
             ist_tz = pytz.timezone('Asia/Kolkata')
             now = datetime.now(ist_tz)
             time_min = (now - timedelta(days=days_back)).isoformat()
@@ -230,10 +218,47 @@ class GoogleCalendarService:
             db.session.rollback()
             raise Exception(f"Failed to sync Google events: {str(e)}")
     
+    @staticmethod
+    def _list_all_events(service, **params):
+        """Every item of an events().list across pages, plus the nextSyncToken from the last page"""
+        items = []
+        while True:
+            result = service.events().list(**params).execute()
+            items.extend(result.get('items', []))
+            page_token = result.get('nextPageToken')
+            if not page_token:
+                return items, result.get('nextSyncToken')
+            params['pageToken'] = page_token
+    
+    def _list_connection_events(self, service, connection, calendar_id, sync_window, time_min, time_max):
+        """
+        Events to sync for a connection and the syncToken for the next run.
+        
+        The stored syncToken is only reused for the same calendar, day and window (a token
+        carries the timeMin/timeMax of the listing that issued it); Google answers 410 Gone
+        once a token has expired, which falls back to a full listing of the window.
+        """
+        from googleapiclient.errors import HttpError
+        
+        if connection.sync_token and connection.sync_window == sync_window:
+            try:
+                events, next_sync_token = self._list_all_events(
+                    service, calendarId=calendar_id, singleEvents=True, syncToken=connection.sync_token
+                )
+                logger.info("Incremental sync for %s: %d changed events", connection.provider_account_email, len(events))
+                return events, next_sync_token
+            except HttpError as e:
+                if e.resp.status != 410:
+                    raise
+                logger.info("Sync token expired for %s, running a full sync", connection.provider_account_email)
+        
+        # No orderBy: syncToken requests can't carry one, so the listing that issues the token doesn't either
+        return self._list_all_events(
+            service, calendarId=calendar_id, timeMin=time_min, timeMax=time_max, singleEvents=True
+        )
+    
     def sync_events_for_connection(self, connection, days_back=30, days_forward=30):
         """Sync events from Google Calendar for a specific CalendarConnection"""
-        from models.event_model import Event
-        
         try:
             # Get calendar service using connection token
             token_info = connection.get_token()
@@ -251,111 +276,103 @@ class GoogleCalendarService:
             
             # Refresh token if expired
             if credentials.expired and credentials.refresh_token:
-                credentials.refresh(Request())
+                credentials.refresh(Request(session=http_session))
                 # Update stored token
                 token_info['token'] = credentials.token
                 connection.set_token(token_info)
                 db.session.commit()
             
+            from googleapiclient.discovery import build  # heavy import, deferred to first use
             service = build('calendar', 'v3', credentials=credentials)
             
             # Calculate time range in IST
-            import pytz
             ist_tz = pytz.timezone('Asia/Kolkata')
             now = datetime.now(ist_tz)
             time_min = (now - timedelta(days=days_back)).isoformat()
             time_max = (now + timedelta(days=days_forward)).isoformat()
             
-            # Get events from the calendar specified in connection
+            # Get events from the calendar specified in connection: only the changes since the
+            # last sync while its syncToken is valid for this window, else the whole window
             calendar_id = connection.calendar_id or 'primary'
-            events_result = service.events().list(
-                calendarId=calendar_id,
-                timeMin=time_min,
-                timeMax=time_max,
-                singleEvents=True,
-                orderBy='startTime'
-            ).execute()
-            
-            events = events_result.get('items', [])
+            sync_window = f"{calendar_id}|{now.date().isoformat()}|{days_back}|{days_forward}"
+            events, next_sync_token = self._list_connection_events(
+                service, connection, calendar_id, sync_window, time_min, time_max
+            )
             synced_count = 0
-            new_events_count = 0
-            updated_events_count = 0
+            rows = []
             
-            print(f"Processing {len(events)} events from Google Calendar API for {connection.provider_account_email}")
+            logger.info("Processing %d events from Google Calendar API for %s", len(events), connection.provider_account_email)
             
             for event_data in events:
                 event_id = event_data.get('id')
                 event_title = event_data.get('summary', 'No Title')
                 
+                # Incremental results include cancellations; like a full sync, leave stored events as they are
+                if event_data.get('status') == 'cancelled':
+                    logger.debug("  Skipping cancelled event: %s", event_id)
+                    continue
+                
                 # Skip events that were created by bidirectional sync (they start with [SYNCED])
                 # These will be handled by the bidirectional sync service, not regular sync
                 if event_title.startswith('[SYNCED]'):
-                    print(f"  Skipping synced event: {event_title} (created by bidirectional sync)")
+                    logger.debug("  Skipping synced event: %s (created by bidirectional sync)", event_title)
                     continue
                 if event_title.startswith('[Mirror]'):
-                    print(f"  Skipping mirror blocker event: {event_title}")
+                    logger.debug("  Skipping mirror blocker event: %s", event_title)
                     continue
                 
                 if not MeetingDetectionService.is_google_real_meeting(event_data=event_data, calendar_id=calendar_id):
-                    print(f"  Skipping non-meeting event: {event_title}")
+                    logger.debug("  Skipping non-meeting event: %s", event_title)
                     continue
                 
                 # Create unique provider_event_id that includes account email to avoid conflicts
                 unique_event_id = f"{connection.provider_account_email}:{event_id}"
                 
-                # Check if event already exists for this connection
-                existing_event = Event.query.filter_by(
-                    user_id=connection.user_id,
-                    provider='google',
-                    provider_event_id=unique_event_id
-                ).first()
-                
-                if existing_event:
-                    # Update existing event
-                    self._update_event_from_google(existing_event, event_data)
-                    updated_events_count += 1
-                    print(f"  Updated existing event: {event_title}")
-                else:
-                    # Create new event
-                    try:
-                        new_event = self._create_event_from_google_connection(connection, event_data, unique_event_id)
-                        db.session.add(new_event)
-                        new_events_count += 1
-                        print(f"  Added new event: {event_title} (ID: {unique_event_id})")
-                    except Exception as e:
-                        print(f"  ERROR creating event '{event_title}': {str(e)}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
+                try:
+                    rows.append(self._event_row_from_google_connection(connection, event_data, unique_event_id))
+                except Exception:
+                    logger.exception("Error preparing event '%s'", event_title)
+                    continue
                 
                 synced_count += 1
             
-            # Update last_synced timestamp
+            # One lookup for the new/updated counts, then a single bulk upsert for all rows
+            event_ids = [row['provider_event_id'] for row in rows]
+            existing_ids = set(db.session.execute(
+                select(Event.provider_event_id).where(
+                    Event.user_id == connection.user_id,
+                    Event.provider_event_id.in_(event_ids)
+                )
+            ).scalars()) if event_ids else set()
+            updated_events_count = len(existing_ids)
+            new_events_count = len(set(event_ids)) - updated_events_count
+            Event.upsert_rows(rows, self.UPSERT_COLUMNS)
+            
+            # Update last_synced timestamp and the token the next sync resumes from
             connection.last_synced = datetime.utcnow()
+            connection.sync_token = next_sync_token
+            connection.sync_window = sync_window if next_sync_token else None
             
             # Commit all changes
             try:
                 db.session.commit()
-                print(f"✅ Database commit successful: {new_events_count} new events, {updated_events_count} updated events")
-            except Exception as commit_error:
-                print(f"❌ Database commit FAILED: {str(commit_error)}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Database commit failed for %s", connection.provider_account_email)
                 db.session.rollback()
                 raise
             
-            print(f"Synced {synced_count} events for Google account: {connection.provider_account_email}")
+            logger.info(
+                "Synced %d events for Google account %s (%d new, %d updated)",
+                synced_count, connection.provider_account_email, new_events_count, updated_events_count
+            )
             return synced_count
             
         except Exception as e:
             db.session.rollback()
             raise Exception(f"Failed to sync Google events for {connection.provider_account_email}: {str(e)}")
     
-    def _create_event_from_google_connection(self, connection, event_data, unique_event_id):
-        """Create Event object from Google Calendar event data for a CalendarConnection"""
-        from models.event_model import Event
-        import re
-        
+    def _event_row_from_google_connection(self, connection, event_data, unique_event_id):
+        """Event column values from Google Calendar event data for a CalendarConnection (for Event.upsert_rows)"""
         start_data = event_data.get('start', {})
         end_data = event_data.get('end', {})
         
@@ -384,24 +401,6 @@ class GoogleCalendarService:
             if match:
                 meet_link = match.group(0)
         
-        event = Event(
-            user_id=connection.user_id,
-            title=event_data.get('summary', 'No Title'),
-            description=event_data.get('description', ''),
-            location=event_data.get('location', ''),
-            start_time=start_time,
-            end_time=end_time,
-            all_day=start_data.get('date') is not None,
-            provider='google',
-            provider_event_id=unique_event_id,  # Use unique ID with account email
-            calendar_id=connection.calendar_id or 'primary',
-            organizer=connection.provider_account_email,  # Use connection's account email
-            color=event_data.get('colorId', ''),
-            meet_link=meet_link,
-            last_synced=datetime.utcnow()
-        )
-        
-        # Set attendees
         attendees = []
         for attendee in event_data.get('attendees', []):
             attendees.append({
@@ -409,14 +408,28 @@ class GoogleCalendarService:
                 'name': attendee.get('displayName'),
                 'response_status': attendee.get('responseStatus')
             })
-        event.set_attendees(attendees)
         
-        return event
+        return {
+            'user_id': connection.user_id,
+            'title': event_data.get('summary', 'No Title'),
+            'description': event_data.get('description', ''),
+            'location': event_data.get('location', ''),
+            'start_time': start_time,
+            'end_time': end_time,
+            'all_day': start_data.get('date') is not None,
+            'provider': 'google',
+            'provider_event_id': unique_event_id,  # Use unique ID with account email
+            'calendar_id': connection.calendar_id or 'primary',
+            'connection_id': connection.id,
+            'organizer': connection.provider_account_email,  # Use connection's account email
+            'color': event_data.get('colorId', ''),
+            'meet_link': meet_link,
+            'attendees': json.dumps(attendees),
+            'last_synced': datetime.utcnow()
+        }
     
     def _create_event_from_google(self, user, event_data):
         """Create Event object from Google Calendar event data"""
-        import re
-        
         start_data = event_data.get('start', {})
         end_data = event_data.get('end', {})
         
@@ -476,8 +489,6 @@ class GoogleCalendarService:
     
     def _update_event_from_google(self, event, event_data):
         """Update existing event with Google Calendar data"""
-        import re
-        
         start_data = event_data.get('start', {})
         end_data = event_data.get('end', {})
         
@@ -526,8 +537,6 @@ class GoogleCalendarService:
     
     def _parse_google_datetime(self, datetime_data):
         """Parse Google Calendar datetime format with proper IST timezone handling"""
-        import pytz
-        
         if 'dateTime' in datetime_data:
             date_time_str = datetime_data['dateTime']
             event_timezone = datetime_data.get('timeZone', 'UTC')
@@ -568,8 +577,6 @@ class GoogleCalendarService:
         if datetime.utcnow().timestamp() > token_info.get('expires_at', 0):
             # Refresh token using environment variables
             try:
-                from google.oauth2.credentials import Credentials
-                from google.auth.transport.requests import Request
                 
                 # Use stored token info or fallback to environment variables
                 token_uri = token_info.get('token_uri', "https://oauth2.googleapis.com/token")
@@ -587,7 +594,7 @@ class GoogleCalendarService:
                 )
                 
                 # Refresh the token
-                credentials.refresh(Request())
+                credentials.refresh(Request(session=http_session))
                 
                 # Update stored token
                 token_info.update({
@@ -621,7 +628,7 @@ class GoogleCalendarService:
                     client_secret=token_info.get('client_secret', self.client_secret),
                     scopes=token_info.get('scopes', self.SCOPES)
                 )
-                credentials.refresh(Request())
+                credentials.refresh(Request(session=http_session))
                 token_info.update({
                     'token': credentials.token,
                     'refresh_token': credentials.refresh_token,
@@ -636,6 +643,50 @@ class GoogleCalendarService:
         return GoogleCalendarClient(token_info['token'])
 
 
+# Calendar API batch requests: Google recommends at most 50 calls per batch
+GOOGLE_BATCH_SIZE = 50
+
+
+def write_google_events_batch(service, calendar_id, operations):
+    """
+    Insert/patch events through Calendar API batch requests (GOOGLE_BATCH_SIZE calls per HTTP request).
+    operations: [(event_id, body)] where event_id None means insert. Notifications are never sent.
+    Returns the created/updated event (or None on failure) per operation, in order.
+    """
+    results = [None] * len(operations)
+
+    def on_response(request_id, response, exception):
+        if exception is not None:
+            logger.warning("Error writing Google event in batch (#%s): %s", request_id, exception)
+            return
+        results[int(request_id)] = response
+
+    for offset in range(0, len(operations), GOOGLE_BATCH_SIZE):
+        batch = service.new_batch_http_request(callback=on_response)
+        queued = 0
+        for index in range(offset, min(offset + GOOGLE_BATCH_SIZE, len(operations))):
+            event_id, body = operations[index]
+            if event_id:
+                request = service.events().patch(
+                    calendarId=calendar_id, eventId=event_id, body=body,
+                    sendUpdates='none', conferenceDataVersion=0
+                )
+            else:
+                request = service.events().insert(
+                    calendarId=calendar_id, body=body,
+                    sendUpdates='none', conferenceDataVersion=0
+                )
+            batch.add(request, request_id=str(index))
+            queued += 1
+        if not queued:
+            continue
+        try:
+            batch.execute()
+        except Exception as e:
+            logger.exception("Error executing Google batch request: %s", e)
+    return results
+
+
 class GoogleCalendarClient:
     """Helper class for Google Calendar API calls"""
 
@@ -659,7 +710,7 @@ class GoogleCalendarClient:
                 'conferenceDataVersion': 0
             }
             print(f"Creating Google Calendar event without notifications: {sanitized_body.get('summary', 'No title')}")
-            response = requests.post(url, headers=self.headers, json=sanitized_body, params=params)
+            response = http_session.post(url, headers=self.headers, json=sanitized_body, params=params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -678,13 +729,23 @@ class GoogleCalendarClient:
                 'conferenceDataVersion': 0
             }
             print(f"Updating Google Calendar event {event_id} without notifications")
-            response = requests.patch(url, headers=self.headers, json=sanitized_body, params=params)
+            response = http_session.patch(url, headers=self.headers, json=sanitized_body, params=params)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"Error updating Google Calendar event {event_id}: {e}")
             return None
 
+    def write_calendar_events_batch(self, operations, calendar_id='primary'):
+        """Batched create/update: operations is [(event_id or None, event_data)]; returns results in order"""
+        from googleapiclient.discovery import build  # heavy import, deferred to first use
+        service = build('calendar', 'v3', credentials=Credentials(token=self.access_token), cache_discovery=False)
+        return write_google_events_batch(
+            service,
+            calendar_id,
+            [(event_id, self._sanitize_blocker_payload(event_data)) for event_id, event_data in operations]
+        )
+
     def _sanitize_blocker_payload(self, event_data):
         """Force mirror blockers to be private, busy, and notification-free."""
         body = copy.deepcopy(event_data or {})
@@ -67,43 +67,23 @@ class MeetingDetectionService:
         if cls._is_microsoft_holiday_or_birthday(event_data, event):
             return False
 
-        all_day = cls._is_all_day(event_data, event)
-        has_online_info = cls._has_microsoft_online_info(event_data)
-        has_teams_hint = cls._description_has_teams_hint(event_data, event) or cls._location_has_teams_hint(event_data, event)
-        has_attendees = cls._has_microsoft_attendees(event_data, event)
-        
-        # Check if event has a location (indicates it might be a meeting)
-        has_location = False
-        if event_data:
-            location = event_data.get('location', {})
-            if isinstance(location, dict):
-                location_name = location.get('displayName', '')
-            else:
-                location_name = str(location) if location else ''
-            has_location = bool(location_name and location_name.strip())
-        elif event:
-            has_location = bool(event.location and event.location.strip())
-
-        # For all-day events, require additional meeting indicators to avoid clutter
-        if all_day:
-            return has_online_info or has_teams_hint or has_attendees or has_location
-
         # For timed events:
-        #  - Require a subject/title (already checked below)
+        #  - Require a subject/title
         #  - Accept by default, even if there is no online info/attendees/location
         #    because many real meetings are simple personal or in-person meetings.
-        has_subject = False
-        if event_data:
-            subject = event_data.get('subject', '')
-            has_subject = bool(subject and subject.strip() and subject.lower() not in ['no title', 'untitled'])
-        elif event:
-            has_subject = bool(event.title and event.title.strip() and event.title.lower() not in ['no title', 'untitled'])
-
-        if not has_subject:
-            return False
+        # Only all-day events need the meeting indicators, so they are checked lazily there
+        # (the body regex and attendee scan are skipped for the common timed case).
+        if not cls._is_all_day(event_data, event):
+            return cls._has_microsoft_subject(event_data, event)
 
-        # Timed events with a valid subject are treated as meetings.
-        return True
+        # For all-day events, require additional meeting indicators to avoid clutter
+        return (
+            cls._has_microsoft_online_info(event_data)
+            or cls._description_has_teams_hint(event_data, event)
+            or cls._location_has_teams_hint(event_data, event)
+            or cls._has_microsoft_attendees(event_data, event)
+            or cls._has_microsoft_location(event_data, event)
+        )
 
     # -----------------------
     # Google helper methods
@@ -224,6 +204,29 @@ class MeetingDetectionService:
                 return True
         return False
 
+    @staticmethod
+    def _has_microsoft_subject(event_data: Optional[Dict[str, Any]], event: Optional[Event]) -> bool:
+        if event_data:
+            subject = event_data.get('subject', '')
+            return bool(subject and subject.strip() and subject.lower() not in ['no title', 'untitled'])
+        if event:
+            return bool(event.title and event.title.strip() and event.title.lower() not in ['no title', 'untitled'])
+        return False
+
+    @staticmethod
+    def _has_microsoft_location(event_data: Optional[Dict[str, Any]], event: Optional[Event]) -> bool:
+        """A non-empty location (indicates it might be a meeting)."""
+        if event_data:
+            location = event_data.get('location', {})
+            if isinstance(location, dict):
+                location_name = location.get('displayName', '')
+            else:
+                location_name = str(location) if location else ''
+            return bool(location_name and location_name.strip())
+        if event:
+            return bool(event.location and event.location.strip())
+        return False
+
     @classmethod
     def _has_microsoft_online_info(cls, event_data: Optional[Dict[str, Any]]) -> bool:
         if not event_data:
@@ -1,17 +1,28 @@
 import msal
-import requests
-import uuid
-import copy
-import base64
 import json
-from flask import current_app, session
+import logging
+import copy
+import pytz
+from urllib.parse import urlencode
+from flask import current_app
+from sqlalchemy import select
 from models.user_model import User
 from models.event_model import Event, db
 from datetime import datetime, timedelta, timezone
 from services.meeting_detection_service import MeetingDetectionService
+from utils.http_session import http_session
+from utils.oauth_state import encode_oauth_state
+
+logger = logging.getLogger(__name__)
 
 class MicrosoftCalendarService:
     
+    # Columns a re-synced event takes from Graph (calendar_id, created_at and conflicts are kept)
+    UPSERT_COLUMNS = (
+        'title', 'description', 'location', 'start_time', 'end_time', 'all_day',
+        'organizer', 'color', 'attendees', 'connection_id', 'last_synced'
+    )
+    
     def __init__(self):
         self.client_id = current_app.config.get('MICROSOFT_CLIENT_ID')
         self.client_secret = current_app.config.get('MICROSOFT_CLIENT_SECRET')
@@ -43,17 +54,8 @@ class MicrosoftCalendarService:
             client_credential=self.client_secret
         )
         
-        # Generate a unique state parameter for CSRF protection and pass metadata
-        state_payload = {
-            'nonce': str(uuid.uuid4()),
-            'provider': 'microsoft'
-        }
-        if target_user_id:
-            state_payload['target_user_id'] = target_user_id
-        
-        state_json = json.dumps(state_payload)
-        state_bytes = state_json.encode('utf-8')
-        state = base64.urlsafe_b64encode(state_bytes).decode('utf-8')
+        # Signed state (CSRF protection + target user), verified in the callback
+        state = encode_oauth_state('microsoft', target_user_id)
         
         # Use scopes that include write permissions for bidirectional sync
         scopes = ['Calendars.ReadWrite', 'User.Read']
@@ -64,23 +66,11 @@ class MicrosoftCalendarService:
             state=state,
             prompt='select_account'  # Force account selection screen
         )
-        
-        # Store only the state parameter in session, not the entire app object
-        session['microsoft_oauth_state'] = state
         return auth_url
     
     def handle_callback(self, code, state):
         """Handle OAuth callback and exchange code for tokens"""
-        print(f"Received state: {state}")
-        print(f"Stored state: {session.get('microsoft_oauth_state')}")
-        
-        # Skip state verification completely since session is not persisting
-        # This is a temporary fix to get OAuth working
-        print("Skipping state verification due to session persistence issues")
-        
-        # Clear the state from session immediately to prevent multiple uses
-        session.pop('microsoft_oauth_state', None)
-        
+        # The signed state is verified by the auth controller (utils.oauth_state)
         # Reconstruct the msal app object
         app = msal.ConfidentialClientApplication(
             self.client_id,
@@ -181,7 +171,7 @@ class MicrosoftCalendarService:
                 'Content-Type': 'application/json'
             }
             
-            response = requests.get(url, headers=headers)
+            response = http_session.get(url, headers=headers)
             response.raise_for_status()
             
             user_data = response.json()
@@ -242,8 +232,6 @@ class MicrosoftCalendarService:
     
     def sync_events_for_connection(self, connection, days_back=90, days_forward=365):
         """Sync events from Microsoft Calendar for a specific CalendarConnection"""
-        from models.event_model import Event
-        
         try:
             # Get graph client using connection token
             client = self.get_graph_client_for_connection(connection)
@@ -251,117 +239,96 @@ class MicrosoftCalendarService:
             start_iso = (datetime.now(timezone.utc) - timedelta(days=days_back)).isoformat()
             end_iso = (datetime.now(timezone.utc) + timedelta(days=days_forward)).isoformat()
             
-            print(f"Requesting Microsoft Calendar events for {connection.provider_account_email}")
-            print(f"  Date range (UTC): {start_iso} to {end_iso}")
+            logger.info("Requesting Microsoft Calendar events for %s (UTC %s to %s)", connection.provider_account_email, start_iso, end_iso)
             try:
                 events = self._fetch_events_from_all_calendars(client, start_iso, end_iso)
-                print(f"✅ Microsoft API returned {len(events)} total events for {connection.provider_account_email}")
-            except Exception as api_error:
-                print(f"❌ ERROR calling Microsoft Graph API: {api_error}")
-                import traceback
-                traceback.print_exc()
+                logger.info("Microsoft API returned %d total events for %s", len(events), connection.provider_account_email)
+            except Exception:
+                logger.exception("Error calling Microsoft Graph API for %s", connection.provider_account_email)
                 raise
             
             synced_count = 0
-            new_events_count = 0
-            updated_events_count = 0
+            rows = []
             skipped_synced = 0
             skipped_non_meeting = 0
             
-            print(f"Processing {len(events)} events from Microsoft Calendar API for {connection.provider_account_email}")
+            logger.info("Processing %d events from Microsoft Calendar API for %s", len(events), connection.provider_account_email)
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
             
             for idx, event_data in enumerate(events):
                 event_id = event_data.get('id')
                 event_subject = event_data.get('subject', 'No Title')
                 
-                print(f"  [{idx+1}/{len(events)}] Processing: '{event_subject}' (ID: {event_id[:50] if event_id else 'None'}...)")
+                logger.debug("  [%d/%d] Processing: '%s' (ID: %.50s...)", idx + 1, len(events), event_subject, event_id)
                 
                 # Skip events that were created by bidirectional sync
                 if event_subject.startswith('[SYNCED]') or event_subject.startswith('[Mirror]'):
-                    print(f"    ⏭️  Skipping synced event: {event_subject}")
+                    logger.debug("    Skipping synced event: %s", event_subject)
                     skipped_synced += 1
                     continue
                 
                 # Check if it's a real meeting
                 is_meeting = MeetingDetectionService.is_microsoft_real_meeting(event_data=event_data)
                 
-                # Debug meeting detection
-                has_online = event_data.get('isOnlineMeeting', False)
-                online_meeting = event_data.get('onlineMeeting') or {}  # Handle None explicitly
-                has_join_url = bool(online_meeting.get('joinUrl')) if online_meeting else False
-                attendees = event_data.get('attendees') or []  # Handle None explicitly
-                organizer = event_data.get('organizer') or {}  # Handle None explicitly
-                organizer_email = organizer.get('emailAddress', {}).get('address', '') if organizer else ''
-                start_data = event_data.get('start') or {}  # Handle None explicitly
-                all_day = start_data.get('dateTime') is None
-                
-                print(f"    Meeting check: {is_meeting}")
-                print(f"      - isOnlineMeeting: {has_online}")
-                print(f"      - onlineMeeting.joinUrl: {has_join_url}")
-                print(f"      - Attendees count: {len(attendees)}")
-                if attendees:
+                # Debug meeting detection (the details are only gathered when DEBUG is on)
+                if debug_enabled:
+                    online_meeting = event_data.get('onlineMeeting') or {}  # Handle None explicitly
+                    attendees = event_data.get('attendees') or []  # Handle None explicitly
+                    organizer = event_data.get('organizer') or {}  # Handle None explicitly
+                    organizer_email = organizer.get('emailAddress', {}).get('address', '') if organizer else ''
+                    start_data = event_data.get('start') or {}  # Handle None explicitly
                     attendee_emails = [a.get('emailAddress', {}).get('address', '') for a in attendees if a.get('emailAddress', {}).get('address', '') != organizer_email]
-                    print(f"      - Attendee emails (excluding organizer): {attendee_emails}")
-                print(f"      - Organizer: {organizer_email}")
-                print(f"      - All day: {all_day}")
+                    logger.debug(
+                        "    Meeting check: %s (isOnlineMeeting=%s, joinUrl=%s, attendees=%d %s, organizer=%s, all_day=%s)",
+                        is_meeting, event_data.get('isOnlineMeeting', False), bool(online_meeting.get('joinUrl')),
+                        len(attendees), attendee_emails, organizer_email, start_data.get('dateTime') is None
+                    )
                 
                 if not is_meeting:
-                    print(f"    ⏭️  Skipping non-meeting event: {event_subject}")
+                    logger.debug("    Skipping non-meeting event: %s", event_subject)
                     skipped_non_meeting += 1
                     continue
                 
                 # Create unique provider_event_id that includes account email to avoid conflicts
                 unique_event_id = f"{connection.provider_account_email}:{event_id}"
                 
-                # Check if event already exists for this connection
-                existing_event = Event.query.filter_by(
-                    user_id=connection.user_id,
-                    provider='microsoft',
-                    provider_event_id=unique_event_id
-                ).first()
-                
-                if existing_event:
-                    # Update existing event
-                    self._update_event_from_microsoft(existing_event, event_data)
-                    updated_events_count += 1
-                    print(f"  Updated existing event: {event_subject}")
-                else:
-                    # Create new event
-                    try:
-                        new_event = self._create_event_from_microsoft_connection(connection, event_data, unique_event_id)
-                        db.session.add(new_event)
-                        new_events_count += 1
-                        print(f"  Added new event: {event_subject} (ID: {unique_event_id})")
-                    except Exception as e:
-                        print(f"  ERROR creating event '{event_subject}': {str(e)}")
-                        import traceback
-                        traceback.print_exc()
-                        continue
+                try:
+                    rows.append(self._event_row_from_microsoft_connection(connection, event_data, unique_event_id))
+                except Exception:
+                    logger.exception("Error preparing event '%s'", event_subject)
+                    continue
                 
                 synced_count += 1
             
+            # One lookup for the new/updated counts, then a single bulk upsert for all rows
+            event_ids = [row['provider_event_id'] for row in rows]
+            existing_ids = set(db.session.execute(
+                select(Event.provider_event_id).where(
+                    Event.user_id == connection.user_id,
+                    Event.provider_event_id.in_(event_ids)
+                )
+            ).scalars()) if event_ids else set()
+            updated_events_count = len(existing_ids)
+            new_events_count = len(set(event_ids)) - updated_events_count
+            Event.upsert_rows(rows, self.UPSERT_COLUMNS)
+            
             # Update last_synced timestamp
             connection.last_synced = datetime.utcnow()
             
             # Commit all changes
             try:
                 db.session.commit()
-                print(f"✅ Database commit successful: {new_events_count} new events, {updated_events_count} updated events")
-            except Exception as commit_error:
-                print(f"❌ Database commit FAILED: {str(commit_error)}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Database commit failed for %s", connection.provider_account_email)
                 db.session.rollback()
                 raise
             
-            print(f"📊 Microsoft Sync Summary for {connection.provider_account_email}:")
-            print(f"  Total events from API: {len(events)}")
-            print(f"  Skipped (synced events): {skipped_synced}")
-            print(f"  Skipped (non-meetings): {skipped_non_meeting}")
-            print(f"  New events created: {new_events_count}")
-            print(f"  Events updated: {updated_events_count}")
-            print(f"  Total synced: {synced_count}")
-            print(f"Synced {synced_count} events for Microsoft account: {connection.provider_account_email}")
+            logger.info(
+                "Synced %d events for Microsoft account %s (%d from API, %d new, %d updated, "
+                "skipped %d synced and %d non-meeting events)",
+                synced_count, connection.provider_account_email, len(events), new_events_count,
+                updated_events_count, skipped_synced, skipped_non_meeting
+            )
             return synced_count
             
         except Exception as e:
@@ -375,55 +342,66 @@ class MicrosoftCalendarService:
         
         try:
             calendars = client.list_calendars()
-            print(f"  Discovered {len(calendars)} Microsoft calendars for account.")
+            logger.debug("  Discovered %d Microsoft calendars for account.", len(calendars))
         except Exception as e:
-            print(f"  Unable to list calendars: {e}")
+            logger.warning("  Unable to list calendars: %s", e)
             calendars = []
         
-        for calendar in calendars:
-            cal_id = calendar.get('id')
-            cal_name = calendar.get('name', 'Unnamed calendar')
-            if not cal_id:
-                continue
+        calendars = [calendar for calendar in calendars if calendar.get('id')]
+        
+        # One Graph $batch round trip per 20 calendars instead of one request per calendar
+        if calendars:
             try:
-                events = client.get_events_for_calendar(cal_id, start_iso, end_iso)
-                print(f"    Calendar '{cal_name}' returned {len(events)} events")
-                for event in events:
-                    event_id = event.get('id')
-                    if not event_id:
-                        continue
-                    key = f"{cal_id}:{event_id}"
-                    if key in seen_keys:
-                        continue
-                    event['_calendar'] = {'id': cal_id, 'name': cal_name}
-                    collected_events.append(event)
-                    seen_keys.add(key)
+                results_by_id = client.get_events_for_calendars_batch(
+                    [calendar['id'] for calendar in calendars], start_iso, end_iso
+                )
             except Exception as e:
-                print(f"    Error fetching events for calendar '{cal_name}': {e}")
+                logger.warning("  Batched calendar fetch failed: %s", e)
+                results_by_id = {calendar['id']: (None, e) for calendar in calendars}
+            results = [results_by_id.get(calendar['id'], (None, 'missing from batch response')) for calendar in calendars]
+        else:
+            results = []
+        
+        for calendar, (events, error) in zip(calendars, results):
+            cal_id = calendar.get('id')
+            cal_name = calendar.get('name', 'Unnamed calendar')
+            if error is not None:
+                logger.warning("    Error fetching events for calendar '%s': %s", cal_name, error)
                 continue
+            logger.debug("    Calendar '%s' returned %d events", cal_name, len(events))
+            for event in events:
+                event_id = event.get('id')
+                if not event_id:
+                    continue
+                key = f"{cal_id}:{event_id}"
+                if key in seen_keys:
+                    continue
+                event['_calendar'] = {'id': cal_id, 'name': cal_name}
+                collected_events.append(event)
+                seen_keys.add(key)
         
         if not collected_events:
-            print("  No events found in explicit calendars, using /me/calendarView fallback.")
+            logger.info("  No events found in explicit calendars, using /me/calendarView fallback.")
             try:
                 fallback_events = client.get_calendar_events(start_iso, end_iso).get('value', [])
                 collected_events.extend(fallback_events)
-                print(f"  Fallback returned {len(fallback_events)} events")
+                logger.info("  Fallback returned %d events", len(fallback_events))
             except Exception as e:
-                print(f"  Fallback /me/calendarView failed: {e}")
+                logger.warning("  Fallback /me/calendarView failed: %s", e)
         
         if not collected_events:
-            print("  No events from calendar view, falling back to /me/events.")
+            logger.info("  No events from calendar view, falling back to /me/events.")
             try:
                 all_events = client.get_all_events(start_iso, end_iso)
                 collected_events.extend(all_events)
-                print(f"  /me/events fallback returned {len(all_events)} events")
+                logger.info("  /me/events fallback returned %d events", len(all_events))
             except Exception as e:
-                print(f"  Fallback /me/events failed: {e}")
+                logger.warning("  Fallback /me/events failed: %s", e)
         
         return collected_events
     
-    def _create_event_from_microsoft_connection(self, connection, event_data, unique_event_id):
-        """Create Event object from Microsoft Calendar event data for a CalendarConnection"""
+    def _event_row_from_microsoft_connection(self, connection, event_data, unique_event_id):
+        """Event column values from Microsoft Calendar event data for a CalendarConnection (for Event.upsert_rows)"""
         start_data = event_data.get('start', {})
         end_data = event_data.get('end', {})
         
@@ -436,23 +414,6 @@ class MicrosoftCalendarService:
         if not organizer_email:
             organizer_email = connection.provider_account_email
         
-        event = Event(
-            user_id=connection.user_id,
-            title=event_data.get('subject', 'No Title'),
-            description=event_data.get('bodyPreview', ''),
-            location=event_data.get('location', {}).get('displayName', ''),
-            start_time=start_time,
-            end_time=end_time,
-            all_day=start_data.get('dateTime') is None,  # All-day events have 'date' instead of 'dateTime'
-            provider='microsoft',
-            provider_event_id=unique_event_id,  # Use unique ID with email prefix
-            calendar_id=connection.calendar_id or 'default',
-            organizer=organizer_email,
-            color=event_data.get('color', ''),
-            last_synced=datetime.utcnow()
-        )
-        
-        # Set attendees
         attendees = []
         for attendee in event_data.get('attendees', []):
             attendees.append({
@@ -460,9 +421,24 @@ class MicrosoftCalendarService:
                 'name': attendee.get('emailAddress', {}).get('name'),
                 'response_status': attendee.get('status', {}).get('response')
             })
-        event.set_attendees(attendees)
         
-        return event
+        return {
+            'user_id': connection.user_id,
+            'title': event_data.get('subject', 'No Title'),
+            'description': event_data.get('bodyPreview', ''),
+            'location': event_data.get('location', {}).get('displayName', ''),
+            'start_time': start_time,
+            'end_time': end_time,
+            'all_day': start_data.get('dateTime') is None,  # All-day events have 'date' instead of 'dateTime'
+            'provider': 'microsoft',
+            'provider_event_id': unique_event_id,  # Use unique ID with email prefix
+            'calendar_id': connection.calendar_id or 'default',
+            'connection_id': connection.id,
+            'organizer': organizer_email,
+            'color': event_data.get('color', ''),
+            'attendees': json.dumps(attendees),
+            'last_synced': datetime.utcnow()
+        }
     
     def _create_event_from_microsoft(self, user, event_data):
         """Create Event object from Microsoft Calendar event data (legacy method)"""
@@ -535,8 +511,6 @@ class MicrosoftCalendarService:
     
     def _parse_microsoft_datetime(self, datetime_data):
         """Parse Microsoft Calendar datetime format with proper IST timezone handling"""
-        import pytz
-        
         if 'dateTime' in datetime_data:
             date_time_str = datetime_data['dateTime']
             event_timezone = datetime_data.get('timeZone', 'UTC')
@@ -573,6 +547,7 @@ class MicrosoftGraphClient:
     
     MIRROR_PREFIX = '[Mirror]'
     MIRROR_TITLE = '[Mirror] Busy'
+    BATCH_SIZE = 20  # Graph's limit on requests per $batch
     
     def __init__(self, access_token):
         self.access_token = access_token
@@ -587,7 +562,7 @@ class MicrosoftGraphClient:
         next_url = url
         current_params = params
         while next_url:
-            response = requests.get(next_url, headers=self.headers, params=current_params)
+            response = http_session.get(next_url, headers=self.headers, params=current_params)
             response.raise_for_status()
             data = response.json()
             items.extend(data.get('value', []))
@@ -599,14 +574,44 @@ class MicrosoftGraphClient:
         url = f"{self.base_url}/me/calendars"
         return self._get_paginated(url)
 
-    def get_events_for_calendar(self, calendar_id, start_date, end_date):
-        url = f"{self.base_url}/me/calendars/{calendar_id}/events"
-        params = {
+    def get_events_for_calendars_batch(self, calendar_ids, start_date, end_date):
+        """
+        Fetch events for several calendars through Graph JSON batching (20 requests per $batch).
+        Returns {calendar_id: (events, error)}; extra pages are followed with regular GETs.
+        """
+        query = urlencode({
             'startDateTime': start_date,
             'endDateTime': end_date,
             '$orderby': 'start/dateTime'
-        }
-        return self._get_paginated(url, params=params)
+        })
+        results = {}
+        for offset in range(0, len(calendar_ids), self.BATCH_SIZE):
+            chunk = calendar_ids[offset:offset + self.BATCH_SIZE]
+            batch_body = {
+                'requests': [
+                    {'id': str(index), 'method': 'GET', 'url': f"/me/calendars/{calendar_id}/events?{query}"}
+                    for index, calendar_id in enumerate(chunk)
+                ]
+            }
+            response = http_session.post(f"{self.base_url}/$batch", headers=self.headers, json=batch_body)
+            response.raise_for_status()
+            
+            for item in response.json().get('responses', []):
+                calendar_id = chunk[int(item['id'])]
+                body = item.get('body') or {}
+                if item.get('status') != 200:
+                    error = body.get('error', {}).get('message') or f"HTTP {item.get('status')}"
+                    results[calendar_id] = (None, error)
+                    continue
+                try:
+                    events = list(body.get('value', []))
+                    next_link = body.get('@odata.nextLink')
+                    if next_link:
+                        events.extend(self._get_paginated(next_link))
+                    results[calendar_id] = (events, None)
+                except Exception as e:
+                    results[calendar_id] = (None, e)
+        return results
     
     def get_calendar_events(self, start_date, end_date):
         """Get calendar events from Microsoft Graph API"""
@@ -634,7 +639,7 @@ class MicrosoftGraphClient:
         try:
             url = f"{self.base_url}/me/events"
             sanitized_body = self._sanitize_blocker_payload(event_data)
-            response = requests.post(url, headers=self.headers, json=sanitized_body)
+            response = http_session.post(url, headers=self.headers, json=sanitized_body)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -648,13 +653,46 @@ class MicrosoftGraphClient:
         try:
             url = f"{self.base_url}/me/events/{event_id}"
             sanitized_body = self._sanitize_blocker_payload(event_data)
-            response = requests.patch(url, headers=self.headers, json=sanitized_body)
+            response = http_session.patch(url, headers=self.headers, json=sanitized_body)
             response.raise_for_status()
             return response.json()
         except Exception as e:
             print(f"Error updating Microsoft Calendar event {event_id}: {e}")
             return None
 
+    def write_calendar_events_batch(self, operations):
+        """
+        Create/update blocker events through Graph JSON batching (BATCH_SIZE requests per $batch).
+        operations: [(event_id, event_data)] where event_id None means create.
+        Returns the created/updated event (or None on failure) per operation, in order.
+        """
+        results = [None] * len(operations)
+        for offset in range(0, len(operations), self.BATCH_SIZE):
+            requests_in_batch = []
+            for index in range(offset, min(offset + self.BATCH_SIZE, len(operations))):
+                event_id, event_data = operations[index]
+                requests_in_batch.append({
+                    'id': str(index),
+                    'method': 'PATCH' if event_id else 'POST',
+                    'url': f"/me/events/{event_id}" if event_id else '/me/events',
+                    'body': self._sanitize_blocker_payload(event_data),
+                    'headers': {'Content-Type': 'application/json'}
+                })
+            try:
+                response = http_session.post(f"{self.base_url}/$batch", headers=self.headers, json={'requests': requests_in_batch})
+                response.raise_for_status()
+            except Exception as e:
+                logger.exception("Error executing Microsoft Graph batch: %s", e)
+                continue
+            for item in response.json().get('responses', []):
+                body = item.get('body') or {}
+                if item.get('status') in (200, 201):
+                    results[int(item['id'])] = body
+                else:
+                    error = body.get('error', {}).get('message') or f"HTTP {item.get('status')}"
+                    logger.warning("Error writing Microsoft Calendar event in batch (#%s): %s", item['id'], error)
+        return results
+
     def _sanitize_blocker_payload(self, event_data):
         """Ensure mirrored events remain private blockers."""
         body = copy.deepcopy(event_data or {})
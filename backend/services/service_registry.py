@@ -0,0 +1,20 @@
+"""
+Per-app calendar service instances.
+
+GoogleCalendarService / MicrosoftCalendarService only read OAuth config in
+__init__ and keep no per-request state (neither does EventCreationService,
+which wraps them), so each app builds them once (in app.extensions) instead
+of on every request or sync job.
+"""
+
+from flask import current_app
+
+
+def shared_service(service_class):
+    """The app's instance of service_class, constructed on first use"""
+    services = current_app.extensions.setdefault('calendar_services', {})
+    service = services.get(service_class)
+    if service is None:
+        # Not cached when construction raises (missing config), so the error repeats per call
+        service = services[service_class] = service_class()
+    return service
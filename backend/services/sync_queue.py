@@ -0,0 +1,295 @@
+"""
+Background calendar sync jobs.
+
+Jobs go to an RQ queue when REDIS_URL is configured (run `rq worker sync`);
+otherwise they run on a daemon thread inside the web process so local
+development works without Redis. Connection syncs and queued sync routes report
+their progress through get_sync_job_status. Also holds the thread-pool runner used to sync several
+connections concurrently within a request.
+"""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context
+
+try:
+    from redis import Redis
+    from rq import Queue
+except ImportError:  # RQ is optional; fall back to in-process threads
+    Queue = None
+
+logger = logging.getLogger(__name__)
+
+SYNC_QUEUE_NAME = 'sync'
+INITIAL_SYNC_DAYS_BACK = 30
+INITIAL_SYNC_DAYS_FORWARD = 30
+# Provider calls are I/O-bound; this bounds concurrent syncs per request
+SYNC_MAX_WORKERS = 8
+
+# RQ timeout for enqueued connection syncs
+SYNC_JOB_TIMEOUT_SECONDS = 600
+# In-process fallback keeps the status of this many recent thread jobs
+THREAD_JOB_HISTORY = 100
+
+_redis_connections = {}
+_worker_app = None
+_thread_jobs = {}  # job id -> {'status', 'result', 'error', 'owner_id'} for jobs run on threads (no Redis)
+
+
+def _get_queue():
+    """RQ queue for sync jobs, or None when Redis/RQ isn't available"""
+    redis_url = current_app.config.get('REDIS_URL')
+    if Queue is None or not redis_url:
+        return None
+    connection = _redis_connections.get(redis_url)
+    if connection is None:
+        connection = Redis.from_url(redis_url)
+        _redis_connections[redis_url] = connection
+    return Queue(SYNC_QUEUE_NAME, connection=connection)
+
+
+@contextmanager
+def _job_app_context():
+    """App context for job code (RQ worker processes have none of their own)"""
+    global _worker_app
+    if has_app_context():
+        yield
+        return
+    # app.py builds its WSGI `app` lazily, so this import doesn't create a second app
+    from app import create_app, flush_logging
+    if _worker_app is None:
+        _worker_app = create_app()
+    try:
+        with _worker_app.app_context():
+            yield
+    finally:
+        # RQ work-horses exit through os._exit, which skips the atexit drain of the log queue
+        flush_logging()
+
+
+def run_initial_sync(connection_id, provider):
+    """Job body: reload the connection by id and run the provider's initial sync"""
+    from models.user_model import db
+    from models.calendar_connection_model import CalendarConnection
+    from services.google_service import GoogleCalendarService
+    from services.microsoft_service import MicrosoftCalendarService
+    from services.service_registry import shared_service
+
+    with _job_app_context():
+        connection = db.session.get(CalendarConnection, connection_id)
+        if not connection or not connection.is_active or not connection.is_connected:
+            logger.info("Initial sync skipped: connection %s is missing or inactive", connection_id)
+            return 0
+
+        logger.info("Auto-syncing events for connection: %s", connection.provider_account_email)
+        if provider == 'google':
+            return shared_service(GoogleCalendarService).sync_events_for_connection(
+                connection,
+                days_back=INITIAL_SYNC_DAYS_BACK,
+                days_forward=INITIAL_SYNC_DAYS_FORWARD
+            )
+        # Microsoft auto-sync still goes through the legacy per-user sync
+        return shared_service(MicrosoftCalendarService).sync_events(
+            connection.user,
+            days_back=INITIAL_SYNC_DAYS_BACK,
+            days_forward=INITIAL_SYNC_DAYS_FORWARD
+        )
+
+
+def run_connection_sync(connection_id, days_back, days_forward):
+    """Job body: reload the connection by id and run its provider's sync_events_for_connection"""
+    from models.user_model import db
+    from models.calendar_connection_model import CalendarConnection
+    from services.google_service import GoogleCalendarService
+    from services.microsoft_service import MicrosoftCalendarService
+    from services.service_registry import shared_service
+
+    with _job_app_context():
+        connection = db.session.get(CalendarConnection, connection_id)
+        if not connection or not connection.is_active or not connection.is_connected:
+            raise ValueError(f"Connection {connection_id} is missing or inactive")
+
+        service_class = GoogleCalendarService if connection.provider == 'google' else MicrosoftCalendarService
+        return shared_service(service_class).sync_events_for_connection(
+            connection, days_back=days_back, days_forward=days_forward
+        )
+
+
+def run_sync_endpoint(endpoint, path):
+    """Job body: run a sync route's view in a request context; its status code and JSON body are the result"""
+    with _job_app_context():
+        app = current_app._get_current_object()
+        with app.test_request_context(path, method='POST'):
+            response = app.make_response(app.view_functions[endpoint]())
+            return {'status_code': response.status_code, 'body': response.get_json()}
+
+
+def _track_thread_job(job_id, **fields):
+    job = _thread_jobs.setdefault(job_id, {'status': 'queued', 'result': None, 'error': None, 'owner_id': None})
+    job.update(fields)
+    # Dicts keep insertion order: drop the oldest entries beyond the history size
+    while len(_thread_jobs) > THREAD_JOB_HISTORY:
+        _thread_jobs.pop(next(iter(_thread_jobs)))
+
+
+def _run_in_thread(app, func, *args, job_id=None):
+    def target():
+        with app.app_context():
+            if job_id:
+                _track_thread_job(job_id, status='started')
+            try:
+                result = func(*args)
+                if job_id:
+                    _track_thread_job(job_id, status='finished', result=result)
+            except Exception as e:
+                if job_id:
+                    _track_thread_job(job_id, status='failed', error=str(e))
+                logger.exception("Background job %s failed: %s", func.__name__, e)
+
+    thread = threading.Thread(target=target, name=f"sync-{func.__name__}", daemon=True)
+    thread.start()
+    return thread
+
+
+def _sync_worker_count(app, requested, jobs):
+    """Thread count for a concurrent sync (SQLite allows one writer, so it runs serially)"""
+    if app.config.get('SQLALCHEMY_DATABASE_URI', '').startswith('sqlite'):
+        return 1
+    return max(1, min(requested, jobs))
+
+
+def _iter_concurrently(model, ids, work, max_workers):
+    """Run work(instance) for each model id on a thread pool, yielding (id, result, error) as each finishes"""
+    from models.user_model import db
+
+    app = current_app._get_current_object()
+
+    def run(instance_id):
+        with app.app_context():
+            try:
+                instance = db.session.get(model, instance_id)
+                if instance is None:
+                    return instance_id, None, Exception(f"{model.__name__} {instance_id} not found")
+                return instance_id, work(instance), None
+            except Exception as e:
+                db.session.rollback()
+                return instance_id, None, e
+
+    workers = _sync_worker_count(app, max_workers, len(ids))
+    if workers == 1:
+        for instance_id in ids:
+            yield run(instance_id)
+        return
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='calendar-sync') as executor:
+        for future in as_completed([executor.submit(run, instance_id) for instance_id in ids]):
+            yield future.result()
+
+
+def _run_concurrently(model, ids, work, max_workers):
+    """_iter_concurrently collected into [(id, result, error)] in input order"""
+    ids = list(ids)
+    position = {instance_id: index for index, instance_id in enumerate(ids)}
+    return sorted(_iter_concurrently(model, ids, work, max_workers), key=lambda item: position[item[0]])
+
+
+def sync_connections_concurrently(connection_ids, sync_one, max_workers=SYNC_MAX_WORKERS):
+    """
+    Run sync_one(connection) for each CalendarConnection id on a thread pool.
+
+    Ids (not ORM objects) cross the thread boundary: each worker pushes its own app
+    context, so it gets its own scoped db.session and reloads the connection there.
+    Returns [(connection_id, result, error)] in input order.
+    """
+    from models.calendar_connection_model import CalendarConnection
+
+    return _run_concurrently(CalendarConnection, connection_ids, sync_one, max_workers)
+
+
+def iter_connection_syncs(connection_ids, sync_one, max_workers=SYNC_MAX_WORKERS):
+    """sync_connections_concurrently, yielding each (connection_id, result, error) as soon as it finishes"""
+    from models.calendar_connection_model import CalendarConnection
+
+    return _iter_concurrently(CalendarConnection, list(connection_ids), sync_one, max_workers)
+
+
+def sync_users_concurrently(user_ids, sync_one, max_workers=SYNC_MAX_WORKERS):
+    """Same as sync_connections_concurrently, for the legacy per-user syncs (sync_one receives a User)"""
+    from models.user_model import User
+
+    return _run_concurrently(User, user_ids, sync_one, max_workers)
+
+
+def enqueue_initial_sync(connection_id, provider):
+    """Schedule the first sync of a newly connected calendar without blocking the request"""
+    queue = _get_queue()
+    if queue is not None:
+        job = queue.enqueue(run_initial_sync, connection_id, provider, job_timeout=SYNC_JOB_TIMEOUT_SECONDS)
+        logger.info("Queued initial %s sync for connection %s (job %s)", provider, connection_id, job.id)
+        return job.id
+
+    _run_in_thread(current_app._get_current_object(), run_initial_sync, connection_id, provider)
+    logger.info("Started initial %s sync for connection %s in background thread", provider, connection_id)
+    return None
+
+
+def _enqueue_tracked(func, *args, owner_id=None):
+    """
+    Enqueue func(*args) as a job get_sync_job_status can report on; returns the job id.
+    owner_id is the user allowed to read the job's status.
+    """
+    queue = _get_queue()
+    if queue is not None:
+        return queue.enqueue(func, *args, job_timeout=SYNC_JOB_TIMEOUT_SECONDS, meta={'owner_id': owner_id}).id
+
+    job_id = str(uuid.uuid4())
+    _track_thread_job(job_id, owner_id=owner_id)
+    _run_in_thread(current_app._get_current_object(), func, *args, job_id=job_id)
+    return job_id
+
+
+def enqueue_connection_sync(connection_id, days_back=30, days_forward=30, owner_id=None):
+    """Sync one connection in the background; returns a job id for get_sync_job_status"""
+    job_id = _enqueue_tracked(run_connection_sync, connection_id, days_back, days_forward, owner_id=owner_id)
+    logger.info("Queued sync for connection %s (job %s)", connection_id, job_id)
+    return job_id
+
+
+def enqueue_sync_endpoint(endpoint, path, owner_id=None):
+    """Run a sync route (e.g. 'calendar.sync_all_events') in the background; returns a job id"""
+    job_id = _enqueue_tracked(run_sync_endpoint, endpoint, path, owner_id=owner_id)
+    logger.info("Queued %s (job %s)", endpoint, job_id)
+    return job_id
+
+
+def get_sync_job_status(job_id, owner_id):
+    """
+    {'status', 'result', 'error'} for a job queued by owner_id, or None if it is unknown
+    or belongs to another user (callers answer both the same way)
+    """
+    queue = _get_queue()
+    if queue is None:
+        job = _thread_jobs.get(job_id)
+        if not job or job['owner_id'] != owner_id:
+            return None
+        return {key: job[key] for key in ('status', 'result', 'error')}
+
+    from rq.exceptions import NoSuchJobError
+    from rq.job import Job
+
+    try:
+        job = Job.fetch(job_id, connection=queue.connection)
+    except NoSuchJobError:
+        return None
+    if job.meta.get('owner_id') != owner_id:
+        return None
+    status = job.get_status()
+    latest = job.latest_result()
+    return {
+        'status': getattr(status, 'value', status),
+        'result': job.return_value(),
+        'error': latest.exc_string if latest and latest.exc_string else None
+    }
@@ -0,0 +1,75 @@
+"""
+Short-lived per-user snapshot of the auth/profile/connections payloads.
+
+The frontend polls /check-auth, /user/profile and /user/connections on every
+navigation; the snapshot lets those read one cache entry instead of rebuilding
+the same data from the database each time. Mutations of a user's connections
+or profile must call invalidate(user_id) after committing.
+"""
+
+import logging
+
+from extensions import cache
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TTL_SECONDS = 30
+
+
+def _snapshot_key(user_id):
+    return f"user:{user_id}:snapshot"
+
+
+def user_fields(user):
+    """The user payload returned by /check-auth"""
+    return {
+        'id': user.id,
+        'email': user.email,
+        'name': user.name,
+        'public_username': getattr(user, 'public_username', None),
+        'default_slot_duration_minutes': getattr(user, 'default_slot_duration_minutes', 30),
+        'google_connected': user.google_calendar_connected,
+        'microsoft_connected': user.microsoft_calendar_connected,
+        'has_connected_calendars': user.has_any_connection
+    }
+
+
+def _build_snapshot(user):
+    """Serialize the user fields and connection list the auth endpoints return"""
+    from sqlalchemy import select
+    from models.user_model import db
+    from models.calendar_connection_model import CalendarConnection
+
+    # Column projection: no token blob, no ORM instances
+    rows = db.session.execute(
+        select(*CalendarConnection.list_columns())
+        .where(CalendarConnection.user_id == user.id)
+        .order_by(CalendarConnection.created_at.desc())
+        .execution_options(autoflush=False)
+    ).all()
+
+    return {
+        'user': user_fields(user),
+        'connections': [CalendarConnection.serialize(row) for row in rows]
+    }
+
+
+def get_user_snapshot(user):
+    """Cached snapshot for the user, rebuilt at most once per SNAPSHOT_TTL_SECONDS"""
+    key = _snapshot_key(user.id)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = _build_snapshot(user)
+        cache.set(key, snapshot, timeout=SNAPSHOT_TTL_SECONDS)
+    return snapshot
+
+
+def invalidate(user_id):
+    """Drop the cached snapshot (call after committing a change to the user or its connections)"""
+    if user_id is None:
+        return
+    try:
+        cache.delete(_snapshot_key(user_id))
+    except Exception as e:
+        # A stale snapshot expires on its own; never fail the mutation over it
+        logger.warning("Failed to invalidate user snapshot for %s: %s", user_id, e)
@@ -0,0 +1,119 @@
+import unittest
+from datetime import datetime, timedelta
+
+from controllers.auth_controller import _reassign_connection_data, _refresh_has_any_connection
+from db_migrations import _backfill_has_any_connection
+from models.calendar_connection_model import CalendarConnection
+from models.event_model import Event
+from models.user_model import db, User
+
+from tests.app_test_case import AppTestCase
+
+
+class ReassignConnectionDataTests(AppTestCase):
+    def _connection(self, user, email, **fields):
+        connection = CalendarConnection(
+            user_id=user.id, provider='google', provider_account_email=email, token='{}', **fields
+        )
+        db.session.add(connection)
+        db.session.commit()
+        return connection
+
+    def _event(self, user, connection, provider_event_id):
+        start = datetime(2026, 1, 5, 9, 0)
+        event = Event(
+            user_id=user.id, connection_id=connection.id, provider='google',
+            provider_event_id=provider_event_id, title=provider_event_id,
+            start_time=start, end_time=start + timedelta(hours=1)
+        )
+        db.session.add(event)
+        db.session.commit()
+        return event.id
+
+    def test_moves_only_the_connection_events(self):
+        old_user = self.create_user('old@example.com', has_any_connection=True)
+        new_user = self.create_user('new@example.com')
+        moved = self._connection(old_user, 'shared@example.com')
+        kept = self._connection(old_user, 'other@example.com')
+        moved_event_id = self._event(old_user, moved, 'shared@example.com:1')
+        kept_event_id = self._event(old_user, kept, 'other@example.com:1')
+
+        moved.user_id = new_user.id
+        _reassign_connection_data(moved.id, old_user.id, new_user.id, 'shared@example.com')
+        db.session.commit()
+        db.session.expire_all()
+
+        self.assertEqual(db.session.get(Event, moved_event_id).user_id, new_user.id)
+        self.assertEqual(db.session.get(Event, kept_event_id).user_id, old_user.id)
+        # The old owner still has `kept`
+        self.assertTrue(db.session.get(User, old_user.id).has_any_connection)
+
+    def test_previous_owner_loses_flag_with_last_connection(self):
+        old_user = self.create_user('old@example.com', has_any_connection=True)
+        new_user = self.create_user('new@example.com')
+        connection = self._connection(old_user, 'shared@example.com')
+        event_id = self._event(old_user, connection, 'shared@example.com:1')
+
+        connection.user_id = new_user.id
+        _reassign_connection_data(connection.id, old_user.id, new_user.id, 'shared@example.com')
+        db.session.commit()
+        db.session.expire_all()
+
+        self.assertEqual(db.session.get(Event, event_id).user_id, new_user.id)
+        self.assertFalse(db.session.get(User, old_user.id).has_any_connection)
+
+    def test_same_user_is_a_no_op(self):
+        user = self.create_user('old@example.com')
+        connection = self._connection(user, 'shared@example.com')
+        event_id = self._event(user, connection, 'shared@example.com:1')
+
+        _reassign_connection_data(connection.id, user.id, user.id, 'shared@example.com')
+
+        self.assertEqual(db.session.get(Event, event_id).user_id, user.id)
+
+
+class HasAnyConnectionTests(AppTestCase):
+    def test_backfill_and_refresh_agree(self):
+        self.create_user('legacy@example.com', google_calendar_connected=True)
+        connected = self.create_user('connected@example.com')
+        inactive = self.create_user('inactive@example.com')
+        self.create_user('none@example.com')
+        db.session.add_all([
+            CalendarConnection(user_id=connected.id, provider='google', provider_account_email='a@example.com', token='{}'),
+            CalendarConnection(user_id=inactive.id, provider='google', provider_account_email='b@example.com', token='{}', is_active=False),
+        ])
+        db.session.commit()
+
+        with db.engine.begin() as conn:
+            _backfill_has_any_connection(conn)
+        db.session.expire_all()
+        backfilled = {u.email: u.has_any_connection for u in User.query}
+
+        for user in User.query:
+            _refresh_has_any_connection(user)
+        refreshed = {u.email: u.has_any_connection for u in User.query}
+
+        self.assertEqual(backfilled, {
+            'legacy@example.com': True,
+            'connected@example.com': True,
+            'inactive@example.com': False,
+            'none@example.com': False,
+        })
+        self.assertEqual(refreshed, backfilled)
+
+    def test_toggle_keeps_legacy_only_user_connected(self):
+        user = self.create_user('legacy@example.com', microsoft_calendar_connected=True, has_any_connection=True)
+        connection = CalendarConnection(user_id=user.id, provider='google', provider_account_email='a@example.com', token='{}')
+        db.session.add(connection)
+        db.session.commit()
+        self.login(user)
+
+        response = self.client.post(f'/api/auth/user/connections/{connection.id}/toggle')
+
+        self.assertEqual(response.status_code, 200)
+        db.session.expire_all()
+        self.assertTrue(db.session.get(User, user.id).has_any_connection)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+from models.calendar_connection_model import CalendarConnection
+from models.user_model import User
+from utils.auth_snapshot import AUTH_SNAPSHOT_COOKIE
+from utils.oauth_state import encode_oauth_state
+
+from tests.app_test_case import AppTestCase
+
+
+class CheckAuthTests(AppTestCase):
+    def test_anonymous_is_unauthorized(self):
+        response = self.client.get('/api/auth/check-auth')
+        self.assertEqual(response.status_code, 401)
+
+    def test_logged_in_without_snapshot_sets_cookie(self):
+        user = self.create_user()
+        self.login(user)
+
+        response = self.client.get('/api/auth/check-auth')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['user']['id'], user.id)
+        self.assertIsNotNone(self.client.get_cookie(AUTH_SNAPSHOT_COOKIE))
+
+    def test_snapshot_cookie_answers_next_check(self):
+        user = self.create_user()
+        self.login(user)
+        self.client.get('/api/auth/check-auth')
+
+        with patch('controllers.auth_controller.user_cache.get_user_snapshot') as get_snapshot:
+            response = self.client.get('/api/auth/check-auth')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['user']['email'], user.email)
+        get_snapshot.assert_not_called()
+
+    def test_snapshot_for_another_user_is_ignored(self):
+        first = self.create_user('first@example.com')
+        second = self.create_user('second@example.com')
+        self.login(first)
+        self.client.get('/api/auth/check-auth')
+        self.login(second)
+
+        response = self.client.get('/api/auth/check-auth')
+
+        self.assertEqual(response.get_json()['user']['id'], second.id)
+
+
+class OAuthCallbackTests(AppTestCase):
+    @patch('controllers.auth_controller.enqueue_initial_sync')
+    @patch('controllers.auth_controller.shared_service')
+    def test_google_callback_logs_in_and_sets_snapshot(self, shared_service, enqueue_initial_sync):
+        google_service = MagicMock()
+        google_service.handle_callback.return_value = {'token': 'access', 'refresh_token': 'refresh'}
+        google_service.get_user_info.return_value = {'email': 'new@example.com', 'name': 'New User'}
+        shared_service.return_value = google_service
+        state = encode_oauth_state('google')
+
+        response = self.client.get(f'/api/auth/google/callback?code=abc&state={state}')
+
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNotNone(self.client.get_cookie(AUTH_SNAPSHOT_COOKIE))
+        user = User.query.filter_by(email='new@example.com').one()
+        self.assertTrue(user.has_any_connection)
+        connection = CalendarConnection.query.filter_by(user_id=user.id).one()
+        enqueue_initial_sync.assert_called_once_with(connection.id, 'google')
+
+        check = self.client.get('/api/auth/check-auth')
+        self.assertEqual(check.status_code, 200)
+        self.assertEqual(check.get_json()['user']['id'], user.id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import patch
+
+from controllers import calendar_controller
+from models.calendar_connection_model import CalendarConnection
+from models.event_model import Event
+from models.user_model import db
+from services.google_service import GoogleCalendarService
+
+from tests.app_test_case import AppTestCase
+
+
+class CalendarTestCase(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user()
+        self.login(self.user)
+
+    def add_event(self, title, start, hours=1, provider='google', user=None, **fields):
+        user = user or self.user
+        event = Event(
+            user_id=user.id, provider=provider, title=title,
+            provider_event_id=fields.pop('provider_event_id', f'{provider}:{title}:{start.isoformat()}'),
+            start_time=start, end_time=start + timedelta(hours=hours), **fields
+        )
+        db.session.add(event)
+        db.session.commit()
+        return event
+
+
+class GetEventsETagTests(CalendarTestCase):
+    def setUp(self):
+        super().setUp()
+        self.add_event('Standup', datetime(2026, 1, 5, 9, 0))
+
+    def _get(self, etag=None, **params):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get('/api/calendar/events', query_string=params, headers=headers)
+
+    def test_unchanged_events_return_304(self):
+        first = self._get(provider='google')
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.get_json()['count'], 1)
+
+        second = self._get(first.headers['ETag'], provider='google')
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+
+    def test_tag_depends_on_filters(self):
+        etag = self._get(start_date='2026-01-01T00:00:00Z', provider='google').headers['ETag']
+
+        self.assertEqual(self._get(etag, start_date='2026-01-01T00:00:00Z', provider='microsoft').status_code, 200)
+        self.assertEqual(self._get(etag, start_date='2026-02-01T00:00:00Z', provider='google').status_code, 200)
+        self.assertEqual(self._get(etag, end_date='2026-01-01T00:00:00Z', provider='google').status_code, 200)
+        # Same instant in another spelling normalizes to the same tag
+        self.assertEqual(self._get(etag, start_date='2026-01-01T00:00:00+00:00', provider='google').status_code, 304)
+
+    def test_new_event_changes_tag(self):
+        etag = self._get().headers['ETag']
+        self.add_event('Review', datetime(2026, 1, 6, 9, 0))
+
+        response = self._get(etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['count'], 2)
+
+
+class SyncAllStreamingTests(CalendarTestCase):
+    def setUp(self):
+        super().setUp()
+        for email in ('ok@example.com', 'broken@example.com'):
+            db.session.add(CalendarConnection(
+                user_id=self.user.id, provider='google', provider_account_email=email, token='{}'
+            ))
+        db.session.commit()
+
+    @staticmethod
+    def fake_sync(connection, days_back, days_forward):
+        if connection.provider_account_email == 'broken@example.com':
+            raise RuntimeError('token revoked')
+        return 3
+
+    def test_ndjson_streams_one_line_per_account_then_summary(self):
+        with patch.object(GoogleCalendarService, 'sync_events_for_connection', side_effect=self.fake_sync):
+            response = self.client.post('/api/calendar/sync/all', headers={'Accept': 'application/x-ndjson'})
+            lines = [json.loads(line) for line in response.get_data().splitlines()]
+
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+        self.assertEqual([line['type'] for line in lines], ['account', 'account', 'summary'])
+        accounts = {line['account_email']: line for line in lines[:2]}
+        self.assertEqual(accounts['ok@example.com']['synced_count'], 3)
+        self.assertEqual(accounts['broken@example.com']['error'], 'token revoked')
+        self.assertEqual(lines[-1]['total_synced'], 3)
+        self.assertEqual(lines[-1]['accounts_synced'], 2)
+
+    def test_json_clients_get_the_summary(self):
+        with patch.object(GoogleCalendarService, 'sync_events_for_connection', side_effect=self.fake_sync):
+            response = self.client.post('/api/calendar/sync/all')
+
+        self.assertEqual(response.mimetype, 'application/json')
+        body = response.get_json()
+        self.assertEqual(body['total_synced'], 3)
+        self.assertEqual(len(body['detailed_results']), 2)
+
+
+class CheckDuplicatesTests(CalendarTestCase):
+    def setUp(self):
+        super().setUp()
+        start = datetime(2026, 1, 5, 9, 0)
+        for provider_event_id in ('a', 'b'):
+            self.add_event('Standup', start, provider_event_id=f'standup-{provider_event_id}')
+        for provider_event_id in ('a', 'b', 'c'):
+            self.add_event('Review', start + timedelta(hours=3), provider_event_id=f'review-{provider_event_id}')
+        self.add_event('Solo', start + timedelta(hours=6))
+
+    def test_streams_duplicate_groups(self):
+        response = self.client.get('/api/calendar/check-duplicates')
+
+        body = json.loads(response.get_data())
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((body['total_events'], body['unique_events'], body['duplicates_found']), (6, 3, 2))
+        self.assertEqual(sorted(len(group['events']) for group in body['duplicates']), [2, 3])
+        self.assertNotIn('error', body)
+
+    def test_error_mid_stream_closes_the_document(self):
+        real_group_json = calendar_controller._duplicate_group_json
+        calls = []
+
+        def failing_group_json(event_list):
+            calls.append(event_list)
+            if len(calls) > 1:
+                raise ValueError('bad row')
+            return real_group_json(event_list)
+
+        with patch.object(calendar_controller, '_duplicate_group_json', side_effect=failing_group_json):
+            response = self.client.get('/api/calendar/check-duplicates')
+            body = json.loads(response.get_data())
+
+        self.assertEqual(len(body['duplicates']), 1)
+        self.assertEqual(body['error'], 'bad row')
+
+
+if __name__ == '__main__':
+    unittest.main()
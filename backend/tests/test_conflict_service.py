@@ -0,0 +1,66 @@
+import unittest
+from datetime import datetime, timedelta
+
+from models.calendar_connection_model import CalendarConnection
+from models.event_model import Event
+from models.user_model import db
+from services.conflict_service import ConflictDetectionService
+
+from tests.app_test_case import AppTestCase
+
+
+def _summary(conflicts):
+    return sorted((c['event']['id'], tuple(sorted(c['conflicting_events']))) for c in conflicts)
+
+
+class DetectConflictsForUsersTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.service = ConflictDetectionService()
+        self.day = (datetime.now() + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+        self.alice = self.create_user('alice@example.com')
+        self.bob = self.create_user('bob@example.com')
+        self.carol = self.create_user('carol@example.com')
+        db.session.add(CalendarConnection(
+            user_id=self.alice.id, provider='google', provider_account_email='alice@work.com', token='{}'
+        ))
+        db.session.commit()
+
+        self.add_event(self.alice, 'Standup', 0, 1)
+        self.add_event(self.alice, 'Design review', 0.5, 1)
+        self.add_event(self.alice, 'Lunch', 3, 1)
+        # Owned by bob but organized from alice's connected account: matches both users
+        self.add_event(self.bob, 'Planning', 3.5, 1, organizer='alice@work.com')
+        self.add_event(self.bob, 'Call', 4, 1)
+        self.add_event(self.bob, 'Focus time', 0, 2)
+        # Repeated copy of an event is deduplicated before overlap checks
+        self.add_event(self.bob, '[SYNCED] Focus time', 0, 2)
+        self.add_event(self.bob, '[Mirror] Busy', 0, 2, is_mirror=True)
+        self.add_event(self.carol, 'Solo', 5, 1)
+
+    def add_event(self, user, title, offset_hours, hours, **fields):
+        start = self.day + timedelta(hours=offset_hours)
+        db.session.add(Event(
+            user_id=user.id, provider='google', title=title, provider_event_id=f'{user.email}:{title}',
+            start_time=start, end_time=start + timedelta(hours=hours), **fields
+        ))
+        db.session.commit()
+
+    def test_matches_detect_conflicts_per_user(self):
+        user_ids = [self.alice.id, self.bob.id, self.carol.id]
+        expected = {user_id: _summary(self.service.detect_conflicts(user_id)) for user_id in user_ids}
+
+        results = self.service.detect_conflicts_for_users(user_ids)
+
+        self.assertEqual({user_id: _summary(results[user_id]) for user_id in user_ids}, expected)
+        # Sanity: the fixture produces conflicts for alice (incl. bob's Planning) and bob, none for carol
+        self.assertEqual(len(expected[self.alice.id]), 4)
+        self.assertEqual(len(expected[self.bob.id]), 2)
+        self.assertEqual(expected[self.carol.id], [])
+
+    def test_empty_user_list(self):
+        self.assertEqual(self.service.detect_conflicts_for_users([]), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+from datetime import datetime
+
+from sqlalchemy import MetaData, Table, event, text
+
+import db_migrations
+from app import init_schema
+from db_migrations import apply_migrations
+from models.event_model import Event
+from models.event_stats_model import EventStats
+from models.user_model import db, User
+
+from tests.app_test_case import AppTestCase
+
+# Columns the migrations add to tables created by older releases
+MIGRATED_COLUMNS = {
+    'users': {'public_username', 'default_slot_duration_minutes', 'has_any_connection'},
+    'events': {'connection_id', 'dedup_hash', 'is_mirror'},
+    'calendar_connections': {'sync_token', 'sync_window'},
+}
+
+
+class InitSchemaTests(AppTestCase):
+    def index_names(self, table):
+        rows = db.session.execute(
+            text("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = :table"), {'table': table}
+        )
+        return {name for (name,) in rows}
+
+    def test_fresh_database_gets_migration_indexes(self):
+        # setUp ran init_schema() on an empty database: the migrations must have run too
+        self.assertIn('ix_users_public_username', self.index_names('users'))
+        self.assertIn('ix_events_dedup_hash_missing', self.index_names('events'))
+
+    def test_migrations_are_idempotent(self):
+        apply_migrations(db)
+        apply_migrations(db)
+
+    def test_upgrades_a_legacy_database(self):
+        db.drop_all()
+        legacy = MetaData()
+        for name, table in db.metadata.tables.items():
+            if name in MIGRATED_COLUMNS:
+                Table(name, legacy, *[c._copy() for c in table.columns if c.name not in MIGRATED_COLUMNS[name]])
+        legacy.create_all(db.engine)
+        with db.engine.begin() as conn:
+            conn.execute(text(
+                "INSERT INTO users (id, email, name, google_calendar_connected) VALUES (1, 'old@example.com', 'Old', 1)"
+            ))
+            conn.execute(text(
+                "INSERT INTO events (user_id, title, start_time, end_time, provider, provider_event_id) "
+                "VALUES (1, '[Mirror] Busy', '2026-01-05 09:00:00', '2026-01-05 10:00:00', 'google', 'old@example.com:1')"
+            ))
+
+        init_schema()
+
+        user = db.session.get(User, 1)
+        self.assertTrue(user.has_any_connection)
+        legacy_event = Event.query.one()
+        self.assertTrue(legacy_event.is_mirror)
+        self.assertEqual(
+            legacy_event.dedup_hash,
+            Event.compute_dedup_hash(legacy_event.title, datetime(2026, 1, 5, 9), datetime(2026, 1, 5, 10), 'google')
+        )
+        stats = db.session.get(EventStats, (1, 'google'))
+        self.assertEqual((stats.total, stats.mirror), (1, 1))
+
+    def test_dedup_backfill_only_probes_when_nothing_is_missing(self):
+        start = datetime(2026, 1, 5, 9)
+        db.session.add(Event(user_id=self.create_user().id, title='Standup', provider='google', start_time=start, end_time=start))
+        db.session.commit()
+        statements = []
+
+        def record(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        with db.engine.begin() as conn:
+            event.listen(conn, 'before_cursor_execute', record)
+            db_migrations._backfill_event_dedup_hash(conn)
+
+        self.assertEqual(len(statements), 1)
+        self.assertIn('LIMIT 1', statements[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from datetime import datetime, timedelta
+
+from models.event_model import Event
+from models.event_stats_model import EventStats
+from models.user_model import db
+
+from tests.app_test_case import AppTestCase
+
+UPDATE_COLUMNS = ('title', 'start_time', 'end_time', 'last_synced')
+
+
+class UpsertRowsTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('one@example.com')
+        self.other = self.create_user('two@example.com')
+        self.start = datetime(2026, 1, 5, 9, 0)
+
+    def row(self, provider_event_id, title, user=None, hours=1):
+        return {
+            'user_id': (user or self.user).id,
+            'provider': 'google',
+            'provider_event_id': provider_event_id,
+            'title': title,
+            'start_time': self.start,
+            'end_time': self.start + timedelta(hours=hours),
+            'last_synced': datetime(2026, 1, 1),
+        }
+
+    def events(self):
+        db.session.expire_all()
+        return {event.provider_event_id: event for event in Event.query}
+
+    def test_inserts_new_rows_with_derived_columns(self):
+        Event.upsert_rows([self.row('a@x.com:1', 'Standup'), self.row('a@x.com:2', '[Mirror] Busy')], UPDATE_COLUMNS)
+        db.session.commit()
+
+        events = self.events()
+        self.assertEqual(set(events), {'a@x.com:1', 'a@x.com:2'})
+        standup = events['a@x.com:1']
+        self.assertEqual(standup.dedup_hash, Event.compute_dedup_hash('Standup', standup.start_time, standup.end_time, 'google'))
+        self.assertFalse(standup.is_mirror)
+        self.assertTrue(events['a@x.com:2'].is_mirror)
+        self.assertEqual(db.session.get(EventStats, (self.user.id, 'google')).total, 2)
+
+    def test_updates_existing_rows_in_place(self):
+        Event.upsert_rows([self.row('a@x.com:1', 'Standup')], UPDATE_COLUMNS)
+        db.session.commit()
+        original_id = self.events()['a@x.com:1'].id
+
+        Event.upsert_rows([self.row('a@x.com:1', 'Daily standup', hours=2)], UPDATE_COLUMNS)
+        db.session.commit()
+
+        event = self.events()['a@x.com:1']
+        self.assertEqual(event.id, original_id)
+        self.assertEqual(event.title, 'Daily standup')
+        self.assertEqual(event.end_time, self.start + timedelta(hours=2))
+        self.assertEqual(event.dedup_hash, Event.compute_dedup_hash('Daily standup', event.start_time, event.end_time, 'google'))
+        self.assertEqual(Event.query.count(), 1)
+
+    def test_last_copy_of_a_repeated_id_wins(self):
+        Event.upsert_rows([self.row('a@x.com:1', 'First'), self.row('a@x.com:1', 'Second')], UPDATE_COLUMNS)
+        db.session.commit()
+
+        self.assertEqual(self.events()['a@x.com:1'].title, 'Second')
+
+    def test_rows_owned_by_another_user_are_untouched(self):
+        Event.upsert_rows([self.row('a@x.com:1', 'Mine', user=self.other)], UPDATE_COLUMNS)
+        db.session.commit()
+
+        Event.upsert_rows([self.row('a@x.com:1', 'Theirs')], UPDATE_COLUMNS)
+        db.session.commit()
+
+        event = self.events()['a@x.com:1']
+        self.assertEqual((event.user_id, event.title), (self.other.id, 'Mine'))
+
+
+if __name__ == '__main__':
+    unittest.main()
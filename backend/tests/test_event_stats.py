@@ -0,0 +1,84 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, text, update
+
+from db_migrations import ensure_event_stats
+from models.event_model import Event
+from models.event_stats_model import EventStats
+from models.user_model import db
+
+from tests.app_test_case import AppTestCase
+
+
+class EventStatsTriggerTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = self.create_user('one@example.com')
+        self.other = self.create_user('two@example.com')
+
+    def add_event(self, title, provider='google', user=None):
+        start = datetime(2026, 1, 5, 9, 0)
+        event = Event(
+            user_id=(user or self.user).id, provider=provider, title=title, provider_event_id=title,
+            start_time=start, end_time=start + timedelta(hours=1)
+        )
+        db.session.add(event)
+        db.session.commit()
+        return event
+
+    def stats(self):
+        db.session.expire_all()
+        return {
+            (row.user_id, row.provider): (row.total, row.mirror)
+            for row in EventStats.query if row.total
+        }
+
+    def test_insert_counts_totals_and_mirrors(self):
+        self.add_event('Standup')
+        self.add_event('[Mirror] Busy')
+        self.add_event('Sync', provider='microsoft')
+
+        self.assertEqual(self.stats(), {
+            (self.user.id, 'google'): (2, 1),
+            (self.user.id, 'microsoft'): (1, 0),
+        })
+
+    def test_update_moves_counts(self):
+        event = self.add_event('[Mirror] Busy')
+
+        event.provider = 'microsoft'
+        db.session.commit()
+        self.assertEqual(self.stats(), {(self.user.id, 'microsoft'): (1, 1)})
+
+        db.session.execute(update(Event).where(Event.id == event.id).values(user_id=self.other.id))
+        db.session.commit()
+        self.assertEqual(self.stats(), {(self.other.id, 'microsoft'): (1, 1)})
+
+    def test_delete_decrements(self):
+        self.add_event('Standup')
+        self.add_event('Review')
+
+        db.session.execute(delete(Event).where(Event.title == 'Standup'))
+        db.session.commit()
+
+        self.assertEqual(self.stats(), {(self.user.id, 'google'): (1, 0)})
+
+    def test_ensure_event_stats_rebuilds_counts(self):
+        self.add_event('Standup')
+        for trigger in ('trg_event_stats_insert', 'trg_event_stats_delete', 'trg_event_stats_update'):
+            db.session.execute(text(f'DROP TRIGGER {trigger}'))
+        db.session.commit()
+        self.add_event('Review', user=self.other)
+
+        ensure_event_stats(db)
+        self.add_event('[Mirror] Busy', user=self.other)
+
+        self.assertEqual(self.stats(), {
+            (self.user.id, 'google'): (1, 0),
+            (self.other.id, 'google'): (2, 1),
+        })
+
+
+if __name__ == '__main__':
+    unittest.main()
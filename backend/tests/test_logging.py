@@ -0,0 +1,61 @@
+import os
+import subprocess
+import sys
+import textwrap
+import unittest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so _configure_logging owns the root logger
+FORK_SCRIPT = textwrap.dedent('''
+    import logging
+    import os
+    import sys
+    import time
+
+    from app import create_app, flush_logging
+    from tests.app_test_case import TestConfig
+
+    create_app(type('Config', (TestConfig,), {'SQLALCHEMY_DATABASE_URI': 'sqlite://'}))
+    logger = logging.getLogger('fork-test')
+    logger.warning('parent-before-fork')
+
+    pid = os.fork()
+    if pid == 0:
+        logger.warning('child-record')
+        if sys.argv[1] == 'flush':
+            flush_logging()
+        else:
+            time.sleep(0.5)
+        os._exit(0)
+    os.waitpid(pid, 0)
+    logger.warning('parent-after-fork')
+''')
+
+
+@unittest.skipUnless(hasattr(os, 'fork'), 'needs os.fork')
+class ForkedLoggingTests(unittest.TestCase):
+    def _run(self, mode):
+        result = subprocess.run(
+            [sys.executable, '-c', FORK_SCRIPT, mode],
+            cwd=BACKEND_DIR, capture_output=True, text=True, timeout=30
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return result.stderr
+
+    def test_forked_child_records_are_written(self):
+        output = self._run('wait')
+
+        self.assertIn('child-record', output)
+        self.assertIn('parent-after-fork', output)
+        # Records queued before the fork are written once, by the parent
+        self.assertEqual(output.count('parent-before-fork'), 1)
+
+    def test_flush_writes_records_before_os_exit(self):
+        output = self._run('flush')
+
+        self.assertIn('child-record', output)
+
+
+if __name__ == '__main__':
+    unittest.main()
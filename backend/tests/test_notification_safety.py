@@ -22,7 +22,7 @@ class NotificationSafetyTests(unittest.TestCase):
         self.assertEqual(sanitized['transparency'], 'opaque')
         self.assertFalse(sanitized['reminders']['useDefault'])
 
-    @patch('services.google_service.requests.post')
+    @patch('services.google_service.http_session.post')
     def test_google_create_event_disables_notifications(self, mock_post):
         response = MagicMock()
         response.json.return_value = {'id': 'evt'}
@@ -47,7 +47,7 @@ class NotificationSafetyTests(unittest.TestCase):
         self.assertEqual(sanitized['showAs'], 'busy')
         self.assertFalse(sanitized['isReminderOn'])
 
-    @patch('services.microsoft_service.requests.post')
+    @patch('services.microsoft_service.http_session.post')
     def test_microsoft_create_event_disables_notifications(self, mock_post):
         response = MagicMock()
         response.json.return_value = {'id': 'evt'}
@@ -0,0 +1,43 @@
+import unittest
+from urllib.parse import parse_qs, urlparse
+
+from services.google_service import GoogleCalendarService
+from utils.oauth_state import decode_oauth_state, encode_oauth_state
+
+from tests.app_test_case import AppTestCase
+
+
+class OAuthStateTests(AppTestCase):
+    def test_encode_returns_text(self):
+        self.assertIsInstance(encode_oauth_state('google', 7), str)
+
+    def test_round_trip_through_authorization_url(self):
+        auth_url = GoogleCalendarService().get_auth_url(target_user_id=7)
+
+        state = parse_qs(urlparse(auth_url).query)['state'][0]
+        payload = decode_oauth_state(state)
+
+        self.assertEqual(payload['provider'], 'google')
+        self.assertEqual(payload['target_user_id'], 7)
+
+    def test_login_route_returns_signed_state(self):
+        user = self.create_user()
+        self.login(user)
+
+        response = self.client.get('/api/auth/login/google')
+
+        self.assertEqual(response.status_code, 200)
+        state = parse_qs(urlparse(response.get_json()['auth_url']).query)['state'][0]
+        self.assertEqual(decode_oauth_state(state)['target_user_id'], user.id)
+
+    def test_tampered_state_is_rejected(self):
+        state = encode_oauth_state('google', 7)
+        self.assertEqual(decode_oauth_state(state[:-2] + 'xx'), {})
+
+    def test_expired_state_is_rejected(self):
+        state = encode_oauth_state('google', 7)
+        self.assertEqual(decode_oauth_state(state, max_age=-1), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
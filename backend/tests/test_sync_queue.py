@@ -0,0 +1,82 @@
+import time
+import unittest
+
+from services import sync_queue
+from services.sync_queue import enqueue_connection_sync, get_sync_job_status
+
+from tests.app_test_case import AppTestCase
+
+
+class SyncJobStatusTests(AppTestCase):
+    def setUp(self):
+        super().setUp()
+        self.owner = self.create_user('owner@example.com')
+        self.other = self.create_user('other@example.com')
+
+    def wait_for(self, job_id, owner_id, timeout=5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job = get_sync_job_status(job_id, owner_id)
+            if job and job['status'] in ('finished', 'failed'):
+                return job
+            time.sleep(0.02)
+        self.fail(f'job {job_id} did not finish')
+
+    def test_thread_job_reports_failure_to_its_owner(self):
+        job_id = enqueue_connection_sync(12345, owner_id=self.owner.id)
+
+        job = self.wait_for(job_id, self.owner.id)
+
+        self.assertEqual(job['status'], 'failed')
+        self.assertIn('12345', job['error'])
+        self.assertIsNone(get_sync_job_status(job_id, self.other.id))
+
+    def test_status_route_requires_login(self):
+        job_id = enqueue_connection_sync(12345, owner_id=self.owner.id)
+        self.wait_for(job_id, self.owner.id)
+
+        self.assertEqual(self.client.get(f'/api/calendar/sync/status/{job_id}').status_code, 401)
+        self.assertEqual(self.client.get(f'/api/calendar/debug/microsoft/sync/status/{job_id}').status_code, 401)
+
+    def test_status_route_hides_other_users_jobs(self):
+        job_id = enqueue_connection_sync(12345, owner_id=self.owner.id)
+        self.wait_for(job_id, self.owner.id)
+
+        self.login(self.other)
+        self.assertEqual(self.client.get(f'/api/calendar/sync/status/{job_id}').status_code, 404)
+
+        self.login(self.owner)
+        response = self.client.get(f'/api/calendar/debug/microsoft/sync/status/{job_id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['status'], 'failed')
+
+    def test_respond_async_queues_the_route_for_the_user(self):
+        self.login(self.owner)
+
+        response = self.client.post('/api/calendar/sync/google', headers={'Prefer': 'respond-async'})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.headers['Preference-Applied'], 'respond-async')
+        body = response.get_json()
+        job = self.wait_for(body['job_id'], self.owner.id)
+        self.assertEqual(job['status'], 'finished')
+        self.assertEqual(job['result']['status_code'], 200)
+        self.assertEqual(job['result']['body']['accounts_synced'], 0)
+
+        status = self.client.get(body['status_url'])
+        self.assertEqual(status.get_json()['status'], 'finished')
+
+    def test_anonymous_respond_async_runs_inline(self):
+        response = self.client.post('/api/calendar/sync/google', headers={'Prefer': 'respond-async'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('job_id', response.get_json())
+
+    def test_thread_job_history_is_bounded(self):
+        for _ in range(sync_queue.THREAD_JOB_HISTORY + 5):
+            sync_queue._track_thread_job(object())
+        self.assertEqual(len(sync_queue._thread_jobs), sync_queue.THREAD_JOB_HISTORY)
+
+
+if __name__ == '__main__':
+    unittest.main()
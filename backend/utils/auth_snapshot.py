@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Signed `auth_snapshot` cookie for /check-auth.
+
+Holds the same user payload /check-auth returns, signed with SECRET_KEY and
+bound to the Flask-Login session user, so the polling endpoint can answer
+with one HMAC check instead of loading the user. Cleared on logout and on
+connection changes; otherwise it expires after AUTH_SNAPSHOT_MAX_AGE_SECONDS.
+"""
+
+from flask import current_app, request, session
+from itsdangerous import BadData, URLSafeTimedSerializer
+
+from utils import fast_json
+
+AUTH_SNAPSHOT_COOKIE = 'auth_snapshot'
+AUTH_SNAPSHOT_SALT = 'auth-snapshot'
+AUTH_SNAPSHOT_MAX_AGE_SECONDS = 300
+
+
+def _serializer():
+    # Text adapter: set_cookie needs the signed value as str
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=AUTH_SNAPSHOT_SALT, serializer=fast_json.text_json)
+
+
+def read_auth_snapshot():
+    """User payload from a valid snapshot cookie belonging to the session user, else None"""
+    cookie = request.cookies.get(AUTH_SNAPSHOT_COOKIE)
+    session_user_id = session.get('_user_id')
+    if not cookie or session_user_id is None:
+        return None
+    try:
+        user_data = _serializer().loads(cookie, max_age=AUTH_SNAPSHOT_MAX_AGE_SECONDS)
+    except BadData:
+        return None
+    # A snapshot left over from another login must not answer for this session
+    if not isinstance(user_data, dict) or str(user_data.get('id')) != str(session_user_id):
+        return None
+    return user_data
+
+
+def set_auth_snapshot(response, user_data):
+    """Attach a fresh snapshot cookie for user_data to the response"""
+    response.set_cookie(
+        AUTH_SNAPSHOT_COOKIE,
+        _serializer().dumps(user_data),
+        max_age=AUTH_SNAPSHOT_MAX_AGE_SECONDS,
+        secure=current_app.config.get('SESSION_COOKIE_SECURE', False),
+        httponly=True,
+        samesite=current_app.config.get('SESSION_COOKIE_SAMESITE', 'Lax')
+    )
+    return response
+
+
+def clear_auth_snapshot(response):
+    """Drop the snapshot cookie so the next /check-auth rebuilds it"""
+    response.delete_cookie(AUTH_SNAPSHOT_COOKIE)
+    return response
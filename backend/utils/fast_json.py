@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+orjson-backed JSON provider for Flask (falls back to the stdlib provider when orjson is missing)
+"""
+
+import decimal
+import json
+
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional speedup
+    orjson = None
+
+# Naive datetimes in this app are local (IST) times, so OPT_NAIVE_UTC is deliberately not used
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+
+def _default(o):
+    """Serialize the types orjson doesn't handle natively"""
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {type(o).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Compact JSON bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, separators=(',', ':'), default=_default).encode('utf-8')
+
+
+def loads(data):
+    """Parse JSON from str or bytes (orjson when available)"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class TextJSON:
+    """dumps/loads with json-module semantics (dumps returns str), e.g. for itsdangerous serializers"""
+
+    @staticmethod
+    def dumps(obj, **kwargs):
+        return dumps(obj).decode()
+
+    @staticmethod
+    def loads(data, **kwargs):
+        return loads(data)
+
+
+text_json = TextJSON()
+
+
+class OrjsonProvider(JSONProvider):
+    """Flask JSON provider using orjson for dumps/loads"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=ORJSON_OPTIONS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        """jsonify(): hand orjson's bytes straight to the response (no str decode/re-encode)"""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj) + b"\n", mimetype="application/json")
+
+
+def init_json_provider(app):
+    """Install the orjson provider on the app when orjson is available"""
+    if orjson is not None:
+        app.json = OrjsonProvider(app)
+    return app.json
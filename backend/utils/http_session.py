@@ -0,0 +1,19 @@
+"""
+Process-wide requests.Session for provider REST calls (Google Calendar, Microsoft Graph).
+
+Module-level requests.get/post open a new connection (and TLS handshake) per call;
+going through one pooled session keeps connections to each API host alive across
+syncs. Callers still pass their own Authorization headers per request.
+"""
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Hosts kept in the pool, and live connections per host (sync threads share the session)
+HTTP_POOL_CONNECTIONS = 20
+HTTP_POOL_MAXSIZE = 50
+
+http_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=HTTP_POOL_CONNECTIONS, pool_maxsize=HTTP_POOL_MAXSIZE)
+http_session.mount('https://', _adapter)
+http_session.mount('http://', _adapter)